@@ -0,0 +1,9 @@
+"""Benchmarks of the hot paths of the site.
+
+Run with `python -m benchmarks` from the root of the repository. A test database is created from the configured
+one (SQLite or MySQL), filled with synthetic data and destroyed afterwards; pass `--keepdb` to generate the data once
+and reuse it. Use `-o results.json` to store the timings of a commit and `-c results.json` on another to compare
+against them.
+
+`python -m benchmarks.bridge` load tests the bridge instead, with fake judges that pretend to grade submissions.
+"""
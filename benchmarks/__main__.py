@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from fnmatch import fnmatch
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Times the hot paths of the site against a test database filled '
+                                                 'with synthetic data.')
+    parser.add_argument('scenarios', nargs='*', default=['*'], help='glob patterns of the scenarios to run')
+    parser.add_argument('-l', '--list', action='store_true', help='list the scenarios and exit')
+    parser.add_argument('-o', '--output', help='file to store the results in as JSON')
+    parser.add_argument('-c', '--compare', help='results of an earlier run to compare against')
+    parser.add_argument('-t', '--threshold', type=float, default=1.2,
+                        help='slowdown ratio over the earlier run that counts as a regression')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='timed runs of each scenario')
+    parser.add_argument('--keepdb', action='store_true',
+                        help='reuse the test database, and the data generated in it, between runs')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--problems', type=int, default=1000)
+    parser.add_argument('--submissions', type=int, default=1000000)
+    parser.add_argument('--participants', type=int, default=500, help='participants in each generated contest')
+    return parser.parse_args()
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_scenario(run, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    run()
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'queries': len(queries),
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = 0
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = result['median'] / previous['median'] if previous['median'] else float('inf')
+        flag = ''
+        if ratio > threshold or result['queries'] > previous['queries']:
+            flag = '  REGRESSION'
+            regressions += 1
+        print('%-45s %8.1fx  queries %d -> %d%s' % (name, ratio, previous['queries'], result['queries'], flag))
+    return regressions
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dmoj.settings')
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from benchmarks.generate import generate, is_generated
+    from benchmarks.scenarios import scenarios
+
+    selected = [name for name in scenarios if any(fnmatch(name, pattern) for pattern in args.scenarios)]
+    if args.list:
+        print('\n'.join(selected))
+        return 0
+
+    setup_test_environment(debug=settings.DEBUG)
+    old_name = connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        if not is_generated():
+            print('Generating data...', file=sys.stderr)
+            start = time.perf_counter()
+            generate(seed=args.seed, users=args.users, problems=args.problems, submissions=args.submissions,
+                     participants=args.participants)
+            print('Generated in %.1fs' % (time.perf_counter() - start), file=sys.stderr)
+
+        results = {}
+        for name in selected:
+            run = scenarios[name](args)
+            results[name] = result = time_scenario(run, args.repeat)
+            print('%-45s %10.2f ms %10.2f ms %6d queries' % (
+                name, result['median'] * 1000, result['min'] * 1000, result['queries']))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'revision': git_revision(),
+                'date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'dataset': {key: getattr(args, key) for key in ('seed', 'users', 'problems', 'submissions',
+                                                                'participants')},
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""Load test of the bridge with fake judges.
+
+Run with `python -m benchmarks.bridge` from the root of the repository. A test database is created as for
+`python -m benchmarks`, the bridge is started in this process on the configured addresses and a number of fake judges
+connect to it from distinct loopback addresses. Submissions are then sent through `judge_submission`, and the
+throughput, the time submissions waited in the queue and the queries run per submission are reported.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+PERCENTILES = OrderedDict([('p50', .5), ('p90', .9), ('p99', .99), ('max', 1)])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bridge',
+                                     description='Measures the throughput of the bridge with fake judges.')
+    parser.add_argument('-j', '--judges', type=int, default=8, help='fake judges to connect')
+    parser.add_argument('-n', '--submissions', type=int, default=500, help='submissions to judge')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='submissions sent per second, or 0 to send them as fast as possible')
+    parser.add_argument('--cases', type=int, default=10, help='test cases reported for each submission')
+    parser.add_argument('--case-time', type=float, default=0.02, help='mean seconds taken by each test case')
+    parser.add_argument('--compile-time', type=float, default=0.1, help='mean seconds taken to compile')
+    parser.add_argument('--compile-error-rate', type=float, default=0.05)
+    parser.add_argument('--timeout', type=float, default=600, help='seconds to wait for grading to finish')
+    parser.add_argument('-o', '--output', help='file to store the results in as JSON')
+    parser.add_argument('--keepdb', action='store_true', help='reuse the test database between runs')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+class QueryCounter(object):
+    """Counts the queries run on every database connection, split between the driver thread and the others."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {'driver': 0, 'bridge': 0}
+        self.driver = threading.current_thread()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.counts['driver' if threading.current_thread() is self.driver else 'bridge'] += 1
+        return execute(sql, params, many, context)
+
+    def install(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        # The bridge opens a new connection in every handler thread.
+        connection_created.connect(self.connection_created, weak=False)
+        for connection in connections.all():
+            connection.execute_wrappers.append(self)
+
+    def connection_created(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+def create_judges(count):
+    from benchmarks.fake_judge import fake_judge_name
+    from judge.models import Judge
+
+    addresses = ['127.0.0.%d' % (i + 2) for i in range(count)]
+    for ip in addresses:
+        Judge.objects.update_or_create(name=fake_judge_name(ip), defaults={
+            'auth_key': 'bench', 'last_ip': ip, 'is_blocked': False,
+        })
+    return addresses
+
+
+def create_submissions(rng, count):
+    from benchmarks.generate import PREFIX, create_languages, create_problems, create_users, is_generated
+    from judge.models import Problem, Profile, Submission, SubmissionSource
+
+    languages = create_languages()
+    if not is_generated():
+        create_users(rng, 100)
+        create_problems(rng, 50, languages)
+    problems = list(Problem.objects.filter(code__startswith=PREFIX + 'p').order_by('id')[:50])
+    users = list(Profile.objects.filter(user__username__startswith=PREFIX).order_by('id')
+                 .values_list('id', flat=True)[:100])
+
+    submissions = []
+    for _ in range(count):
+        submission = Submission.objects.create(user_id=rng.choice(users), problem=rng.choice(problems),
+                                               language=rng.choice(languages)[0])
+        SubmissionSource.objects.create(submission=submission, source='int main() { return 0; }\n')
+        submissions.append(submission)
+    return problems, [language for language, _ in languages], submissions
+
+
+def start_bridge():
+    from functools import partial
+
+    from django.conf import settings
+
+    from judge.bridge.django_handler import DjangoHandler
+    from judge.bridge.judge_handler import JudgeHandler
+    from judge.bridge.judge_list import JudgeList
+    from judge.bridge.server import Server
+
+    judges = JudgeList()
+    servers = [Server(settings.BRIDGED_JUDGE_ADDRESS, partial(JudgeHandler, judges=judges)),
+               Server(settings.BRIDGED_DJANGO_ADDRESS, partial(DjangoHandler, judges=judges))]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
+
+
+def wait_for_judges(fakes, timeout=30):
+    from judge.models import Judge
+
+    deadline = time.monotonic() + timeout
+    names = [fake.name for fake in fakes]
+    while Judge.objects.filter(name__in=names, online=True).count() < len(names):
+        if time.monotonic() > deadline:
+            raise RuntimeError('fake judges failed to connect to the bridge')
+        time.sleep(0.1)
+
+
+def run(args, queries):
+    import random
+
+    from django.conf import settings
+
+    from benchmarks.fake_judge import FakeJudge, GradingStats
+    from judge.judgeapi import judge_submission
+    from judge.models import Submission
+
+    rng = random.Random(args.seed)
+    addresses = create_judges(args.judges)
+    problems, languages, submissions = create_submissions(rng, args.submissions)
+
+    servers = start_bridge()
+    stats = GradingStats()
+    host, port = settings.BRIDGED_JUDGE_ADDRESS[0]
+    fakes = [FakeJudge((host, port), ip, [problem.code for problem in problems],
+                       [language.key for language in languages], stats, cases=args.cases, case_time=args.case_time,
+                       compile_time=args.compile_time, compile_error_rate=args.compile_error_rate,
+                       seed=args.seed + i) for i, ip in enumerate(addresses)]
+    try:
+        for fake in fakes:
+            fake.start()
+        wait_for_judges(fakes)
+
+        before = queries.snapshot()
+        sent = {}
+        start = time.monotonic()
+        for i, submission in enumerate(submissions):
+            if args.rate:
+                time.sleep(max(0, start + i / args.rate - time.monotonic()))
+            sent[submission.id] = time.monotonic()
+            judge_submission(submission)
+        sending = time.monotonic() - start
+
+        if not stats.wait(len(submissions), args.timeout):
+            print('Timed out with %d of %d submissions graded' % (len(stats.finished), len(submissions)),
+                  file=sys.stderr)
+
+        # The bridge saves the results of a submission after its judge has sent them.
+        ids = list(sent)
+        deadline = time.monotonic() + 30
+        while Submission.objects.filter(id__in=ids, status__in=Submission.IN_PROGRESS_GRADING_STATUS).exists() \
+                and time.monotonic() < deadline:
+            time.sleep(0.1)
+        elapsed = time.monotonic() - start
+        after = queries.snapshot()
+    finally:
+        for fake in fakes:
+            fake.stop()
+        for server in servers:
+            server.shutdown()
+
+    with stats.lock:
+        queued = [stats.received[id] - sent[id] for id in sent if id in stats.received]
+        turnaround = [stats.finished[id] - sent[id] for id in sent if id in stats.finished]
+
+    count = len(submissions)
+    return {
+        'submissions': count,
+        'graded': len(turnaround),
+        'seconds': elapsed,
+        'send_seconds': sending,
+        'throughput': len(turnaround) / elapsed if elapsed else 0,
+        'queue_latency': {key: percentile(queued, fraction) for key, fraction in PERCENTILES.items()},
+        'turnaround': {key: percentile(turnaround, fraction) for key, fraction in PERCENTILES.items()},
+        'driver_queries_per_submission': (after['driver'] - before['driver']) / count,
+        'bridge_queries_per_submission': (after['bridge'] - before['bridge']) / count,
+    }
+
+
+def report(result):
+    print('graded %d of %d submissions in %.1fs (sent in %.1fs): %.1f submissions/s' % (
+        result['graded'], result['submissions'], result['seconds'], result['send_seconds'], result['throughput']))
+    for name in ('queue_latency', 'turnaround'):
+        print('%-15s %s' % (name, '  '.join('%s %.1f ms' % (key, result[name][key] * 1000) for key in PERCENTILES)))
+    print('queries per submission: %.1f by the driver, %.1f by the bridge' % (
+        result['driver_queries_per_submission'], result['bridge_queries_per_submission']))
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dmoj.settings')
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    queries = QueryCounter()
+    queries.install()
+
+    setup_test_environment(debug=settings.DEBUG)
+    old_name = connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        result = run(args, queries)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    report(result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import json
+import logging
+import random
+import socket
+import struct
+import threading
+import time
+import zlib
+from hashlib import sha256
+
+logger = logging.getLogger('judge.bridge')
+size_pack = struct.Struct('!I')
+
+
+def fake_judge_name(ip):
+    # The bridge only accepts a judge whose name is derived from the address it connects from.
+    return sha256(ip.encode()).hexdigest()[:8]
+
+
+class GradingStats(object):
+    """When each submission was handed to a judge and when its judge finished grading it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.received = {}
+        self.finished = {}
+        self.done = threading.Condition(self.lock)
+
+    def receive(self, id):
+        with self.lock:
+            self.received[id] = time.monotonic()
+
+    def finish(self, id):
+        with self.lock:
+            self.finished[id] = time.monotonic()
+            self.done.notify_all()
+
+    def wait(self, count, timeout):
+        with self.lock:
+            return self.done.wait_for(lambda: len(self.finished) >= count, timeout)
+
+
+class FakeJudge(threading.Thread):
+    """A judge that speaks the bridge protocol but only pretends to grade.
+
+    Every submission is acknowledged, then either fails to compile with probability `compile_error_rate` after
+    `compile_time` seconds, or has `cases` test cases reported one at a time, each taking `case_time` seconds on
+    average, before grading ends. Each judge must connect from its own address, such as 127.0.0.2.
+    """
+
+    def __init__(self, address, source_ip, problems, executors, stats, cases=10, case_time=0.05, compile_time=0.2,
+                 compile_error_rate=0.05, wrong_answer_rate=0.3, seed=None):
+        super().__init__(daemon=True)
+        self.address = address
+        self.source_ip = source_ip
+        self.name = fake_judge_name(source_ip)
+        self.problems = problems
+        self.executors = executors
+        self.stats = stats
+        self.cases = cases
+        self.case_time = case_time
+        self.compile_time = compile_time
+        self.compile_error_rate = compile_error_rate
+        self.wrong_answer_rate = wrong_answer_rate
+        self.random = random.Random(seed)
+        self.connected = threading.Event()
+        self.send_lock = threading.Lock()
+        self.sock = None
+        self.stopped = False
+
+    def send(self, packet):
+        data = zlib.compress(json.dumps(packet, separators=(',', ':')).encode('utf-8'))
+        with self.send_lock:
+            self.sock.sendall(size_pack.pack(len(data)) + data)
+
+    def read_exactly(self, size):
+        buffer = b''
+        while len(buffer) < size:
+            data = self.sock.recv(size - len(buffer))
+            if not data:
+                raise EOFError()
+            buffer += data
+        return buffer
+
+    def read(self):
+        size = size_pack.unpack(self.read_exactly(size_pack.size))[0]
+        return json.loads(zlib.decompress(self.read_exactly(size)).decode('utf-8'))
+
+    def run(self):
+        self.sock = socket.create_connection(self.address, source_address=(self.source_ip, 0))
+        try:
+            self.send({
+                'name': 'handshake',
+                'problems': [[problem, 0] for problem in self.problems],
+                'executors': {executor: [[executor.lower(), [1, 0]]] for executor in self.executors},
+                'id': self.name,
+                'key': '',
+            })
+            if self.read()['name'] != 'handshake-success':
+                logger.error('Fake judge %s failed to authenticate', self.name)
+                return
+            self.connected.set()
+
+            while True:
+                packet = self.read()
+                if packet['name'] == 'submission-request':
+                    self.grade(packet['submission-id'])
+                elif packet['name'] == 'ping':
+                    self.send({'name': 'ping-response', 'when': packet['when'], 'time': time.time(),
+                               'load': self.random.random()})
+                elif packet['name'] == 'disconnect':
+                    break
+        except (EOFError, OSError):
+            if not self.stopped:
+                logger.exception('Fake judge %s lost its connection', self.name)
+        finally:
+            self.sock.close()
+
+    def grade(self, id):
+        self.stats.receive(id)
+        self.send({'name': 'submission-acknowledged', 'submission-id': id})
+        time.sleep(self.random.expovariate(1 / self.compile_time) if self.compile_time else 0)
+
+        if self.random.random() < self.compile_error_rate:
+            self.send({'name': 'compile-error', 'submission-id': id, 'log': 'error: expected \';\' before \'}\''})
+            self.stats.finish(id)
+            return
+
+        self.send({'name': 'grading-begin', 'submission-id': id, 'pretested': False})
+        wrong = self.random.random() < self.wrong_answer_rate
+        for position in range(1, self.cases + 1):
+            elapsed = self.random.expovariate(1 / self.case_time) if self.case_time else 0
+            time.sleep(elapsed)
+            failed = wrong and position == self.cases
+            self.send({'name': 'test-case-status', 'submission-id': id, 'cases': [{
+                'position': position, 'status': 1 if failed else 0, 'time': elapsed,
+                'memory': self.random.randint(1000, 65536), 'points': 0 if failed else 1, 'total-points': 1,
+                'output': '', 'feedback': '',
+            }]})
+        self.send({'name': 'grading-end', 'submission-id': id})
+        self.stats.finish(id)
+
+    def stop(self):
+        self.stopped = True
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
@@ -0,0 +1,215 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from judge.contest_format import formats
+from judge.models import Contest, ContestParticipation, ContestProblem, ContestSubmission, Language, Problem, \
+    Profile, Submission, SubmissionTestCase
+
+PREFIX = 'bench'
+BATCH_SIZE = 5000
+CASES = 5
+
+LANGUAGES = [
+    # key, name, common name, ace, pygments, extension, share of submissions
+    ('CPP17', 'C++17', 'C++', 'c_cpp', 'cpp', 'cpp', 45),
+    ('PY3', 'Python 3', 'Python', 'python', 'python3', 'py', 30),
+    ('JAVA11', 'Java 11', 'Java', 'java', 'java', 'java', 15),
+    ('C', 'C', 'C', 'c_cpp', 'c', 'c', 10),
+]
+
+RESULTS = [('AC', 45), ('WA', 30), ('TLE', 9), ('RTE', 6), ('CE', 5), ('MLE', 2), ('IR', 3)]
+
+STATEMENT = '''\
+Given an array of $N$ integers $a_1, a_2, \\dots, a_N$, answer $Q$ queries of the form `l r`.
+
+## Input Specification
+
+The first line contains **two** integers $N$ and $Q$ ($1 \\le N, Q \\le 2 \\times 10^5$).
+
+| Subtask | Points | Constraints |
+|---------|--------|-------------|
+| 1 | 20 | $N \\le 100$ |
+| 2 | 80 | No additional constraints. |
+
+## Sample Input
+
+```
+5 2
+1 2 3 4 5
+1 3
+2 5
+```
+
+* Note that the answer may not fit in a 32-bit integer.
+* Read the [input format](/about/) carefully.
+
+'''
+
+
+@contextmanager
+def manual_dates(model, *fields):
+    """Lets bulk_create store the given `auto_now_add` fields instead of the current time."""
+    fields = [model._meta.get_field(name) for name in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def bulk_create(model, objs):
+    """Inserts in batches of at most BATCH_SIZE, which Django does not lower to what SQLite allows on its own."""
+    objs = list(objs)
+    if objs:
+        fields = model._meta.concrete_fields
+        model.objects.bulk_create(objs, batch_size=min(BATCH_SIZE, connection.ops.bulk_batch_size(fields, objs)))
+
+
+def weighted_picker(rng, values, weights):
+    cumulative = list(accumulate(weights))
+    return lambda: rng.choices(values, cum_weights=cumulative)[0]
+
+
+def create_languages():
+    languages = []
+    for key, name, common_name, ace, pygments, extension, share in LANGUAGES:
+        language, _ = Language.objects.get_or_create(key=key, defaults={
+            'name': name, 'short_name': name, 'common_name': common_name, 'ace': ace, 'pygments': pygments,
+            'extension': extension,
+        })
+        languages.append((language, share))
+    return languages
+
+
+def create_users(rng, count):
+    bulk_create(User, [User(username='%s%d' % (PREFIX, i), email='%s%d@example.com' % (PREFIX, i))
+                       for i in range(count)])
+    users = User.objects.filter(username__startswith=PREFIX).values_list('id', flat=True)
+    bulk_create(Profile, [Profile(user_id=id, points=round(rng.paretovariate(1.5), 2)) for id in users])
+    return list(Profile.objects.filter(user__username__startswith=PREFIX).values_list('id', flat=True))
+
+
+def create_problems(rng, count, languages):
+    bulk_create(Problem, [
+        Problem(code='%sp%d' % (PREFIX, i), name='Benchmark Problem %d' % i, description=STATEMENT * rng.randint(1, 4),
+                time_limit=rng.choice([1, 2, 3]), memory_limit=262144, points=rng.choice([3, 5, 7, 10, 15, 20, 25]),
+                partial=rng.random() < 0.3, is_public=rng.random() < 0.9, summary='Benchmark problem %d' % i)
+        for i in range(count)
+    ])
+    problems = list(Problem.objects.filter(code__startswith=PREFIX + 'p').order_by('id'))
+    bulk_create(Problem.allowed_languages.through, [
+        Problem.allowed_languages.through(problem_id=problem.id, language_id=language.id)
+        for problem in problems for language, _ in languages
+    ])
+    return problems
+
+
+def make_submission(rng, user, problem, language, result, date):
+    if result == 'AC':
+        case_points = problem.points
+    elif result == 'WA' and problem.partial:
+        case_points = round(problem.points * rng.random(), 1)
+    else:
+        case_points = 0
+    return Submission(user_id=user, problem_id=problem.id, language_id=language.id, date=date, status='D',
+                      result=result, points=case_points, case_points=case_points, case_total=problem.points,
+                      time=None if result == 'CE' else round(rng.expovariate(4), 3),
+                      memory=None if result == 'CE' else rng.randint(1000, 262144), judged_date=date)
+
+
+def make_test_cases(rng, submission):
+    """Splits the points of a graded submission over CASES test cases, passing as many as its points allow."""
+    if submission.result == 'CE':
+        return []
+    case_total = submission.case_total / CASES
+    passed = CASES if submission.result == 'AC' else \
+        int(submission.case_points / submission.case_total * CASES) if submission.case_total else 0
+    return [SubmissionTestCase(submission=submission, case=case, status='AC' if case <= passed else submission.result,
+                               time=round(rng.expovariate(8), 3), memory=rng.randint(1000, 262144),
+                               points=case_total if case <= passed else 0, total=case_total)
+            for case in range(1, CASES + 1)]
+
+
+def create_submissions(rng, count, users, problems, languages):
+    # Activity is heavy-tailed on both sides: a few users submit most of the time, and the easy early problems
+    # get most of the submissions.
+    pick_user = weighted_picker(rng, users, [rng.lognormvariate(0, 1.2) for _ in users])
+    pick_problem = weighted_picker(rng, problems, [1 / (rank + 1) ** 1.1 for rank in range(len(problems))])
+    pick_language = weighted_picker(rng, [language for language, _ in languages], [share for _, share in languages])
+    pick_result = weighted_picker(rng, [result for result, _ in RESULTS], [share for _, share in RESULTS])
+
+    now = timezone.now()
+    with manual_dates(Submission, 'date'):
+        for start in range(0, count, BATCH_SIZE):
+            bulk_create(Submission, [
+                make_submission(rng, pick_user(), pick_problem(), pick_language(), pick_result(),
+                                now - timedelta(seconds=rng.randint(0, 365 * 86400)))
+                for _ in range(min(BATCH_SIZE, count - start))
+            ])
+
+
+def create_contest(rng, format_name, users, problems, languages, participants):
+    now = timezone.now()
+    contest = Contest.objects.create(key='%s%s' % (PREFIX, format_name.replace('_', '')),
+                                     name='Benchmark %s contest' % format_name, format_name=format_name,
+                                     format_config={}, start_time=now - timedelta(days=1),
+                                     end_time=now - timedelta(hours=21), is_visible=True)
+    contest_problems = []
+    for order, problem in enumerate(rng.sample(problems, 6)):
+        contest_problems.append(ContestProblem.objects.create(
+            contest=contest, problem=problem, points=problem.points, partial=problem.partial, order=order))
+
+    participations = []
+    for user in rng.sample(users, min(participants, len(users))):
+        participations.append(ContestParticipation(contest=contest, user_id=user,
+                                                   real_start=contest.start_time))
+    bulk_create(ContestParticipation, participations)
+    participations = list(contest.users.all())
+
+    pick_result = weighted_picker(rng, [result for result, _ in RESULTS], [share for _, share in RESULTS])
+    language = languages[0][0]
+    test_cases = []
+    with manual_dates(Submission, 'date'):
+        for participation in participations:
+            skill = rng.random()
+            for contest_problem in contest_problems:
+                if rng.random() > skill:
+                    continue
+                for attempt in range(rng.randint(1, 4)):
+                    date = contest.start_time + timedelta(seconds=rng.randint(0, 3 * 3600))
+                    submission = make_submission(rng, participation.user_id, contest_problem.problem, language,
+                                                 pick_result(), date)
+                    submission.contest_object = contest
+                    submission.save()
+                    ContestSubmission.objects.create(submission=submission, problem=contest_problem,
+                                                     participation=participation, points=submission.points)
+                    test_cases += make_test_cases(rng, submission)
+    bulk_create(SubmissionTestCase, test_cases)
+
+    for participation in participations:
+        participation.recompute_results()
+    return contest
+
+
+def generate(seed=0, users=10000, problems=1000, submissions=1000000, participants=500):
+    """Fills the database with synthetic users, problems, submissions and one finished contest per format."""
+    rng = random.Random(seed)
+    with transaction.atomic():
+        languages = create_languages()
+        user_ids = create_users(rng, users)
+        problem_list = create_problems(rng, problems, languages)
+        create_submissions(rng, submissions, user_ids, problem_list, languages)
+        for format_name in sorted(formats):
+            create_contest(rng, format_name, user_ids, problem_list, languages, participants)
+
+
+def is_generated():
+    return Problem.objects.filter(code__startswith=PREFIX + 'p').exists()
@@ -0,0 +1,130 @@
+import itertools
+import random
+from collections import OrderedDict
+
+from django.db.models import Count
+from django.test import Client
+
+from benchmarks.generate import PREFIX, STATEMENT
+from judge.bridge.judge_list import JudgeList
+from judge.contest_format import formats
+from judge.jinja2.markdown import render_markdown
+from judge.models import Contest, Problem, Profile, Submission
+from judge.performance_points import get_pp_breakdown
+from judge.views.contests import contest_ranking_list
+
+scenarios = OrderedDict()
+
+
+def scenario(name):
+    """Registers a function that prepares a scenario and returns the callable to be timed."""
+    def register(prepare):
+        scenarios[name] = prepare
+        return prepare
+    return register
+
+
+def contest_problems(contest):
+    return list(contest.contest_problems.select_related('problem').defer('problem__description').order_by('order'))
+
+
+def register_contest_scenarios(format_name):
+    key = '%s%s' % (PREFIX, format_name.replace('_', ''))
+
+    @scenario('contest_ranking_list.%s' % format_name)
+    def ranking(options):
+        contest = Contest.objects.get(key=key)
+        problems = contest_problems(contest)
+        return lambda: contest_ranking_list(contest, problems)
+
+    @scenario('update_participation.%s' % format_name)
+    def update(options):
+        contest = Contest.objects.get(key=key)
+        participations = list(contest.users.order_by('id')[:50])
+        return lambda: [contest.format.update_participation(participation) for participation in participations]
+
+
+for format_name in sorted(formats):
+    register_contest_scenarios(format_name)
+
+
+@scenario('get_pp_breakdown')
+def pp_breakdown(options):
+    users = list(Profile.objects.filter(user__username__startswith=PREFIX)
+                 .annotate(count=Count('submission')).order_by('-count')[:20])
+    return lambda: [get_pp_breakdown(user) for user in users]
+
+
+def page_scenario(name, get_path):
+    @scenario('submission_list.%s' % name)
+    def page(options):
+        client = Client()
+        path = get_path()
+
+        def run():
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        return run
+
+
+page_scenario('all', lambda: '/submissions/')
+page_scenario('all.page10', lambda: '/submissions/10')
+page_scenario('problem', lambda: '/problem/%s/submissions/' % Problem.objects.filter(
+    code__startswith=PREFIX + 'p', is_public=True).order_by('id').values_list('code', flat=True)[0])
+page_scenario('user', lambda: '/submissions/user/%s/' % Submission.objects.values('user__user__username').annotate(
+    count=Count('id')).order_by('-count')[0]['user__user__username'])
+
+
+class FakeJudge(object):
+    def __init__(self, name, problems, executors):
+        self.name = name
+        self.problems = problems
+        self.executors = executors
+        self.load = random.random()
+        self._working = False
+
+    @property
+    def working(self):
+        return bool(self._working)
+
+    def can_judge(self, problem, executor, judge_id=None):
+        return problem in self.problems and executor in self.executors and (not judge_id or self.name == judge_id)
+
+    def submit(self, id, problem, language, source):
+        self._working = id
+
+    def get_current_submission(self):
+        return self._working or None
+
+
+@scenario('judge_list.dispatch')
+def judge_list_dispatch(options):
+    rng = random.Random(0)
+    problems = ['p%d' % i for i in range(2000)]
+    executors = ['CPP17', 'PY3', 'JAVA11', 'C']
+    judge_count, submission_count = 40, 5000
+
+    def run():
+        judges = JudgeList()
+        workers = [FakeJudge('judge%d' % i, set(rng.sample(problems, 1500)), set(executors))
+                   for i in range(judge_count)]
+        for judge in workers:
+            judges.register(judge)
+
+        for id in range(1, submission_count + 1):
+            judges.judge(id, rng.choice(problems), rng.choice(executors), '', None, rng.randrange(judges.priorities))
+
+        # Keep freeing judges until everything queued has been dispatched.
+        while judges.submission_map:
+            for judge in workers:
+                if judge.working:
+                    judges.on_judge_free(judge, judge._working)
+    return run
+
+
+@scenario('markdown.large_statement')
+def markdown_statement(options):
+    statement = STATEMENT * 40
+    runs = itertools.count()
+    # Every run renders content never seen before, so that no render cache keyed by content can be hit.
+    return lambda: render_markdown('%s\nRun %d.\n' % (statement, next(runs)), 'problem')
@@ -49,6 +49,8 @@ DMOJ_PP_BONUS_FUNCTION = lambda n: 300 * (1 - 0.997 ** n)  # noqa: E731
 
 NODEJS = '/usr/bin/node'
 EXIFTOOL = '/usr/bin/exiftool'
+# Used to merge problem PDFs into contest problem sets
+PDFUNITE = '/usr/bin/pdfunite'
 ACE_URL = '//cdnjs.cloudflare.com/ajax/libs/ace/1.1.3'
 SELECT2_JS_URL = '//cdnjs.cloudflare.com/ajax/libs/select2/4.0.3/js/select2.min.js'
 DEFAULT_SELECT2_CSS = '//cdnjs.cloudflare.com/ajax/libs/select2/4.0.3/css/select2.min.css'
@@ -72,11 +74,34 @@ DMOJ_SUBMISSIONS_REJUDGE_LIMIT = 10
 DMOJ_SUBMISSION_LIMIT = 2
 # Whether to allow users to view source code: 'all' | 'all-solved' | 'only-own'
 DMOJ_SUBMISSION_SOURCE_VISIBILITY = 'all-solved'
+# Whether to highlight submitted source code in a Celery task ahead of the first view
+DMOJ_SUBMISSION_SOURCE_PREHIGHLIGHT = True
+DMOJ_HIGHLIGHT_CACHE = 'default'
+DMOJ_HIGHLIGHT_CACHE_TTL = 86400 * 7
+# How long the test cases of a completed submission stay cached for its status page
+DMOJ_SUBMISSION_STATUS_CACHE_TTL = 86400
+# In-process index used to search problems and contests: 'ngram' | 'sqlite' (requires SQLite with FTS5)
+DMOJ_SEARCH_BACKEND = 'ngram'
+# Number of best matches ordered by relevance in search-as-you-type results
+DMOJ_SEARCH_RANKED_LIMIT = 200
+# Whether to record per-view and bridge performance metrics, exported at /metrics in the Prometheus text format
+DMOJ_METRICS = False
+# Directory in which every process saves its metrics, so that those of all processes are exported together
+DMOJ_METRICS_DIR = None
+DMOJ_METRICS_FLUSH_INTERVAL = 15  # seconds
+# Addresses allowed to fetch /metrics
+DMOJ_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
 DMOJ_BLOG_NEW_PROBLEM_COUNT = 7
 DMOJ_BLOG_RECENTLY_ATTEMPTED_PROBLEMS_COUNT = 7
 DMOJ_TOTP_TOLERANCE_HALF_MINUTES = 1
 DMOJ_SCRATCH_CODES_COUNT = 5
 DMOJ_USER_MAX_ORGANIZATION_COUNT = 3
+# Accesses from the same user and IP within this many seconds are not recorded again
+DMOJ_USER_ACCESS_LOG_WINDOW = 60  # seconds
+# Recorded accesses are buffered in memory and written to the database this often by a background thread
+DMOJ_USER_ACCESS_LOG_FLUSH_INTERVAL = 15  # seconds
+# How long a verified contest participation is trusted before access to the contest is checked again
+DMOJ_CONTEST_ACCESS_CHECK_TTL = 60  # seconds
 # Whether to allow users to download their data
 DMOJ_USER_DATA_DOWNLOAD = False
 DMOJ_USER_DATA_CACHE = ''
@@ -84,6 +109,8 @@ DMOJ_USER_DATA_DOWNLOAD_RATELIMIT = datetime.timedelta(days=1)
 DMOJ_COMMENT_VOTE_HIDE_THRESHOLD = -5
 DMOJ_PDF_PROBLEM_CACHE = ''
 DMOJ_PDF_PROBLEM_TEMP_DIR = tempfile.gettempdir()
+# Whether to render the PDFs of a public problem in a Celery task when it is saved
+DMOJ_PDF_PROBLEM_PRERENDER = True
 DMOJ_STATS_SUBMISSION_RESULT_COLORS = {
     'TLE': '#a3bcbd',
     'AC': '#00a92a',
@@ -95,6 +122,12 @@ DMOJ_API_PAGE_SIZE = 1000
 
 MARKDOWN_STYLES = {}
 MARKDOWN_DEFAULT_STYLE = {}
+MARKDOWN_RENDER_CACHE = 'default'
+MARKDOWN_RENDER_CACHE_TTL = 86400
+# How long to cache renders in which mathoid or texoid failed and the source was shown instead
+MARKDOWN_RENDER_CACHE_FAILED_TTL = 60
+# Number of rendered documents kept in each process
+MARKDOWN_RENDER_CACHE_SIZE = 512
 
 MATHOID_URL = False
 MATHOID_GZIP = False
@@ -104,8 +137,15 @@ MATHOID_DEFAULT_TYPE = 'auto'
 MATHOID_MML_CACHE_TTL = 86400
 MATHOID_CACHE_ROOT = ''
 MATHOID_CACHE_URL = False
+# How rendered formulas are stored in MATHOID_CACHE_ROOT: 'directory' | 'segment'
+# With 'segment', files are served by the site, so MATHOID_CACHE_URL should point to /widgets/file_cache/mathoid/
+MATHOID_CACHE_FORMAT = 'directory'
+# Maximum number of concurrent requests to mathoid when rendering a document
+MATHOID_CONCURRENCY = 8
 
 TEXOID_GZIP = False
+# How rendered documents are stored in TEXOID_CACHE_ROOT: 'directory' | 'segment'
+TEXOID_CACHE_FORMAT = 'directory'
 TEXOID_META_CACHE = 'default'
 TEXOID_META_CACHE_TTL = 86400
 DMOJ_NEWSLETTER_ID_ON_REGISTER = None
@@ -137,6 +177,9 @@ PUPPETEER_PAPER_SIZE = 'Letter'
 USE_SELENIUM = False
 SELENIUM_CUSTOM_CHROME_PATH = None
 SELENIUM_CHROMEDRIVER_PATH = 'chromedriver'
+# Number of headless Chrome instances each process keeps warm for rendering, and renders each serves before restarting
+SELENIUM_BROWSER_POOL_SIZE = 2
+SELENIUM_BROWSER_MAX_USES = 50
 
 PYGMENT_THEME = 'pygment-github.css'
 INLINE_JQUERY = True
@@ -241,6 +284,7 @@ INSTALLED_APPS += (
 )
 
 MIDDLEWARE = (
+    'judge.middleware.MetricsMiddleware',
     'judge.middleware.ShortCircuitMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -517,8 +561,21 @@ CACHES = {}
 JUDGE_AMQP_PATH = None
 
 MOSS_API_KEY = None
+# Number of (problem, language) pairs to submit to MOSS at once
+MOSS_CONCURRENCY = 4
+# If set, only submissions that the local similarity check pairs with another at this fraction of shared
+# fingerprints are uploaded to MOSS
+MOSS_PRESCREEN_THRESHOLD = None
 
 CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+CELERY_BEAT_SCHEDULE = {
+    # Recounts the last two days as a backstop for the counts kept up to date at grading, rejudging and deletion.
+    'rollup-submission-counts': {
+        'task': 'judge.tasks.stats.rollup_submission_counts',
+        'schedule': datetime.timedelta(hours=1),
+        'args': (2,),
+    },
+}
 
 WEBAUTHN_RP_ID = None
 
@@ -14,7 +14,7 @@ from judge.feed import AtomBlogFeed, AtomProblemFeed, BlogFeed, ProblemFeed
 from judge.sitemap import BlogPostSitemap, ContestSitemap, HomePageSitemap, ProblemSitemap, \
     SolutionSitemap, UrlSitemap, UserSitemap
 from judge.views import TitledTemplateView, blog, contests, language, \
-    preview, problem, problem_manage, ranked_submission, stats, status, submission, tasks, ticket, \
+    metrics, preview, problem, problem_manage, ranked_submission, stats, status, submission, tasks, ticket, \
     user, widgets
 from judge.views.problem_data import ProblemDataView, ProblemSubmissionDiff, \
     problem_data_file, problem_init_view
@@ -168,6 +168,8 @@ urlpatterns = [
         url(r'^$', contests.ContestDetail.as_view(), name='contest_view'),
         url(r'^/moss$', contests.ContestMossView.as_view(), name='contest_moss'),
         url(r'^/moss/delete$', contests.ContestMossDelete.as_view(), name='contest_moss_delete'),
+        url(r'^/pdf$', contests.ContestPdfView.as_view(), name='contest_pdf'),
+        url(r'^/pdf/(?P<language>[a-z-]+)$', contests.ContestPdfView.as_view(), name='contest_pdf'),
         url(r'^/clone$', contests.ContestClone.as_view(), name='contest_clone'),
         url(r'^/ranking/$', contests.ContestRanking.as_view(), name='contest_ranking'),
         url(r'^/ranking/ajax$', contests.contest_ranking_ajax, name='contest_ranking_ajax'),
@@ -204,6 +206,8 @@ urlpatterns = [
         url(r'^single_submission$', submission.single_submission, name='submission_single_query'),
         url(r'^submission_testcases$', submission.SubmissionTestCaseQuery.as_view(), name='submission_testcases_query'),
         url(r'^detect_timezone$', widgets.DetectTimezone.as_view(), name='detect_timezone'),
+        url(r'^file_cache/(?P<cache>mathoid|texoid)/(?P<hash>[0-9a-f]{40})/(?P<file>\w+)$',
+            widgets.file_cache_file, name='file_cache_file'),
         url(r'^status-table$', status.status_table, name='status_table'),
 
         url(r'^template$', problem.LanguageTemplateAjax.as_view(), name='language_template_ajax'),
@@ -287,6 +291,8 @@ urlpatterns = [
         url(r'^failure$', tasks.demo_failure),
         url(r'^progress$', tasks.demo_progress),
     ])),
+
+    url(r'^metrics$', metrics.prometheus_metrics, name='metrics'),
 ]
 
 favicon_paths = ['apple-touch-icon-180x180.png', 'apple-touch-icon-114x114.png', 'android-chrome-72x72.png',
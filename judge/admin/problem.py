@@ -219,11 +219,6 @@ class ProblemAdmin(NoBatchDeleteMixin, VersionAdmin):
         form.base_fields['authors'].queryset = Profile.objects.all()
         return form
 
-    def save_model(self, request, obj, form, change):
-        super(ProblemAdmin, self).save_model(request, obj, form, change)
-        if form.changed_data and any(f in form.changed_data for f in ('is_public', 'points', 'partial')):
-            self._rescore(request, obj.id)
-
     def construct_change_message(self, request, form, *args, **kwargs):
         if form.cleaned_data.get('change_message'):
             return form.cleaned_data['change_message']
@@ -12,7 +12,10 @@ class JudgeAppConfig(AppConfig):
         #          OPERATIONS MAY HAVE SIDE EFFECTS.
         #          DO NOT REMOVE THINKING THE IMPORT IS UNUSED.
         # noinspection PyUnresolvedReferences
-        from . import signals, jinja2  # noqa: F401, imported for side effects
+        from . import signals  # noqa: F401, imported for side effects
+
+        # judge.jinja2 is not imported here: it pulls in the markdown and highlighting libraries, which processes that
+        # render no templates, like the bridge, have no use for. The Jinja2 backend imports it with DMOJExtension.
 
         from judge.models import Language, Profile
         from django.contrib.auth.models import User
@@ -13,7 +13,9 @@ from django.utils import timezone
 from judge import event_poster as event
 from judge.bridge.base_handler import ZlibPacketHandler, proxy_list
 from judge.caching import finished_submission
-from judge.models import Judge, Language, LanguageLimit, Problem, RuntimeVersion, Submission, SubmissionTestCase
+from judge.models import ContestSubmissionCount, DailySubmissionCount, Judge, Language, LanguageLimit, Problem, \
+    RuntimeVersion, Submission, SubmissionTestCase
+from judge.utils import metrics
 
 logger = logging.getLogger('judge.bridge')
 json_log = logging.getLogger('judge.json.bridge')
@@ -91,7 +93,8 @@ class JudgeHandler(ZlibPacketHandler):
 
         json_log.info(self._make_json_log(action='disconnect', info='judge disconnected'))
         if self._working:
-            Submission.objects.filter(id=self._working).update(status='IE', result='IE', error='')
+            if Submission.objects.filter(id=self._working).update(status='IE', result='IE', error=''):
+                self._update_submission_counts(self._working, 'IE')
             json_log.error(self._make_json_log(sub=self._working, action='close', info='IE due to shutdown on grading'))
 
     def _authenticate(self, id):
@@ -256,8 +259,10 @@ class JudgeHandler(ZlibPacketHandler):
 
     def on_submission_wrong_acknowledge(self, packet, expected, got):
         json_log.error(self._make_json_log(packet, action='processing', info='wrong-acknowledge', expected=expected))
-        Submission.objects.filter(id=expected).update(status='IE', result='IE', error=None)
-        Submission.objects.filter(id=got, status='QU').update(status='IE', result='IE', error=None)
+        if Submission.objects.filter(id=expected).update(status='IE', result='IE', error=None):
+            self._update_submission_counts(expected, 'IE')
+        if Submission.objects.filter(id=got, status='QU').update(status='IE', result='IE', error=None):
+            self._update_submission_counts(got, 'IE')
 
     def on_submission_acknowledged(self, packet):
         if not packet.get('submission-id', None) == self._working:
@@ -290,7 +295,13 @@ class JudgeHandler(ZlibPacketHandler):
                 self.on_malformed(data)
             else:
                 handler = self.handlers.get(data['name'], self.on_malformed)
-                handler(data)
+                if settings.DMOJ_METRICS:
+                    with metrics.timer('dmoj_bridge_packet_seconds',
+                                       packet=data['name'] if data['name'] in self.handlers else 'malformed'):
+                        handler(data)
+                    metrics.start_flushing()
+                else:
+                    handler(data)
         except Exception:
             logger.exception('Error in packet handling (Judge-side): %s', self.name)
             self._packet_exception()
@@ -393,6 +404,8 @@ class JudgeHandler(ZlibPacketHandler):
             problem=problem.code, finish=True,
         ))
 
+        submission.user._updating_stats_only = True
+        submission.user.calculate_points()
         problem._updating_stats_only = True
         problem.update_stats()
         submission.update_contest()
@@ -411,6 +424,7 @@ class JudgeHandler(ZlibPacketHandler):
             participation = submission.contest.participation
             event.post('contest_%d' % participation.contest_id, {'type': 'update'})
         self._post_update_submission(submission.id, 'grading-end', done=True)
+        self._update_submission_counts(submission.id, submission.result)
 
     def on_compile_error(self, packet):
         logger.info('%s: Submission failed to compile: %s', self.name, packet['submission-id'])
@@ -422,6 +436,7 @@ class JudgeHandler(ZlibPacketHandler):
                 'log': packet['log'],
             })
             self._post_update_submission(packet['submission-id'], 'compile-error', done=True)
+            self._update_submission_counts(packet['submission-id'], 'CE')
             json_log.info(self._make_json_log(packet, action='compile-error', log=packet['log'],
                                               finish=True, result='CE'))
         else:
@@ -451,6 +466,7 @@ class JudgeHandler(ZlibPacketHandler):
         if Submission.objects.filter(id=id).update(status='IE', result='IE', error=packet['message']):
             event.post('sub_%s' % Submission.get_id_secret(id), {'type': 'internal-error'})
             self._post_update_submission(id, 'internal-error', done=True)
+            self._update_submission_counts(id, 'IE')
             json_log.info(self._make_json_log(packet, action='internal-error', message=packet['message'],
                                               finish=True, result='IE'))
         else:
@@ -465,6 +481,7 @@ class JudgeHandler(ZlibPacketHandler):
         if Submission.objects.filter(id=packet['submission-id']).update(status='AB', result='AB', points=0):
             event.post('sub_%s' % Submission.get_id_secret(packet['submission-id']), {'type': 'aborted-submission'})
             self._post_update_submission(packet['submission-id'], 'terminated', done=True)
+            self._update_submission_counts(packet['submission-id'], 'AB')
             json_log.info(self._make_json_log(packet, action='aborted', finish=True, result='AB'))
         else:
             logger.warning('Unknown submission: %s', packet['submission-id'])
@@ -597,13 +614,28 @@ class JudgeHandler(ZlibPacketHandler):
         data.update(kwargs)
         return json.dumps(data)
 
+    def _update_submission_counts(self, id, result):
+        # Done once the submission's caches and live pages are updated, as the counts are only statistics.
+        try:
+            if self._submission_cache_id == id:
+                data = self._submission_cache
+            else:
+                data = Submission.objects.filter(id=id).values(
+                    'contest_object_id', 'problem_id', 'date', 'language_id',
+                ).get()
+            if data['contest_object_id'] is not None:
+                ContestSubmissionCount.bump(data['contest_object_id'], data['problem_id'], data['language_id'], result)
+            DailySubmissionCount.bump(timezone.localdate(data['date']), data['language_id'], result)
+        except Exception:
+            logger.exception('Failed to update the submission counts of %s', id)
+
     def _post_update_submission(self, id, state, done=False):
         if self._submission_cache_id == id:
             data = self._submission_cache
         else:
             self._submission_cache = data = Submission.objects.filter(id=id).values(
-                'problem__is_public', 'contest_object__key',
-                'user_id', 'problem_id', 'status', 'language__key',
+                'problem__is_public', 'contest_object__key', 'contest_object_id',
+                'user_id', 'problem_id', 'status', 'language__key', 'language_id', 'date',
             ).get()
             self._submission_cache_id = id
 
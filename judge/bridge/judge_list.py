@@ -3,6 +3,10 @@ from collections import namedtuple
 from operator import attrgetter
 from threading import RLock
 
+from django.conf import settings
+
+from judge.utils.metrics import InstrumentedLock
+
 try:
     from llist import dllist
 except ImportError:
@@ -23,6 +27,8 @@ class JudgeList(object):
         self.node_map = {}
         self.submission_map = {}
         self.lock = RLock()
+        if settings.DMOJ_METRICS:
+            self.lock = InstrumentedLock(self.lock, 'judge_list')
 
     def _handle_free_judge(self, judge):
         with self.lock:
@@ -1,9 +1,14 @@
-from judge.contest_format.atcoder import AtCoderContestFormat
-from judge.contest_format.bonuses import BonusesContestFormat
-from judge.contest_format.default import DefaultContestFormat
-from judge.contest_format.ecoo import ECOOContestFormat
-from judge.contest_format.icpc import ICPCContestFormat
-from judge.contest_format.ics3u import ICS3UContestFormat
-from judge.contest_format.ioi import IOIContestFormat
-from judge.contest_format.legacy_ioi import LegacyIOIContestFormat
-from judge.contest_format.registry import choices, formats
+from django.utils.translation import gettext_lazy
+
+from judge.contest_format.registry import choices, formats, register_contest_format_module
+
+# Each module is only imported once a contest using its format is loaded. Until then, the names given here are the
+# ones shown in the choices of `Contest.format_name`, so they must match the `name` of each class.
+register_contest_format_module('atcoder', gettext_lazy('AtCoder'), 'judge.contest_format.atcoder')
+register_contest_format_module('bonuses', gettext_lazy('Bonuses'), 'judge.contest_format.bonuses')
+register_contest_format_module('default', gettext_lazy('Default'), 'judge.contest_format.default')
+register_contest_format_module('ecoo', gettext_lazy('ECOO'), 'judge.contest_format.ecoo')
+register_contest_format_module('icpc', gettext_lazy('ICPC'), 'judge.contest_format.icpc')
+register_contest_format_module('ics3u', gettext_lazy('ICS3U'), 'judge.contest_format.ics3u')
+register_contest_format_module('ioi', gettext_lazy('IOI (pre-2016)'), 'judge.contest_format.legacy_ioi')
+register_contest_format_module('ioi16', gettext_lazy('IOI'), 'judge.contest_format.ioi')
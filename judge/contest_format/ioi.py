@@ -96,6 +96,9 @@ class IOIContestFormat(LegacyIOIContestFormat):
                                              .values_list('problem_id', 'points', 'problem__points'))
 
         for problem_id, points, problem_points in queryset:
+            # Problems with no graded test cases, e.g. only compile errors, have no data to mark.
+            if str(problem_id) not in format_data:
+                continue
             format_data[str(problem_id)].update({
                 'first_solve': points == problem_points,
             })
@@ -1,16 +1,48 @@
-from django.utils import six
+from collections.abc import Mapping
+from importlib import import_module
 
-formats = {}
+
+class ContestFormatRegistry(Mapping):
+    """Maps the name of each contest format to its class, importing the module that defines a format declared with
+    `register_contest_format_module` only when the format is first used."""
+
+    def __init__(self):
+        self.classes = {}
+        self.modules = {}
+
+    def __getitem__(self, name):
+        if name not in self.classes and name in self.modules:
+            import_module(self.modules[name][0])
+        return self.classes[name]
+
+    def __iter__(self):
+        return iter(self.classes.keys() | self.modules.keys())
+
+    def __len__(self):
+        return len(self.classes.keys() | self.modules.keys())
+
+    def verbose_name(self, name):
+        if name in self.classes:
+            return self.classes[name].name
+        return self.modules[name][1]
+
+
+formats = ContestFormatRegistry()
 
 
 def register_contest_format(name):
     def register_class(contest_format_class):
-        assert name not in formats
-        formats[name] = contest_format_class
+        assert name not in formats.classes
+        formats.classes[name] = contest_format_class
         return contest_format_class
 
     return register_class
 
 
+def register_contest_format_module(name, verbose_name, module):
+    assert name not in formats.classes and name not in formats.modules
+    formats.modules[name] = (module, verbose_name)
+
+
 def choices():
-    return [(key, value.name) for key, value in sorted(six.iteritems(formats))]
+    return [(key, formats.verbose_name(key)) for key in sorted(formats)]
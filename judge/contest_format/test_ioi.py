@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from judge.models import Contest, ContestParticipation, ContestProblem, ContestSubmission, Language, Problem, Profile, \
+    Submission, SubmissionTestCase
+
+
+class IOIContestFormatTestCase(TestCase):
+    def setUp(self):
+        self.language = Language.objects.create(key='CPP17', name='C++17', common_name='C++', pygments='cpp')
+        now = timezone.now()
+        self.contest = Contest.objects.create(key='ioi', name='IOI', start_time=now - timedelta(hours=2),
+                                              end_time=now + timedelta(hours=1), format_name='ioi16',
+                                              format_config={'cumtime': True})
+        self.contest_problems = []
+        for code in ('a', 'b'):
+            problem = Problem.objects.create(code=code, name=code, description='', time_limit=1, memory_limit=65536,
+                                             points=10)
+            self.contest_problems.append(ContestProblem.objects.create(
+                contest=self.contest, problem=problem, points=10, order=len(self.contest_problems)))
+
+        profile = Profile.objects.create(user=User.objects.create(username='user'), language=self.language)
+        self.participation = ContestParticipation.objects.create(contest=self.contest, user=profile,
+                                                                 real_start=self.contest.start_time)
+
+    def submit(self, contest_problem, result, case_points):
+        submission = Submission.objects.create(user=self.participation.user, problem=contest_problem.problem,
+                                               language=self.language, status='D', result=result,
+                                               points=sum(case_points), contest_object=self.contest)
+        for case, points in enumerate(case_points, 1):
+            SubmissionTestCase.objects.create(submission=submission, case=case, batch=case,
+                                              status='AC' if points else 'WA', points=points, total=5)
+        ContestSubmission.objects.create(submission=submission, problem=contest_problem,
+                                         participation=self.participation, points=sum(case_points))
+
+    def test_first_solve_without_test_cases(self):
+        self.submit(self.contest_problems[0], 'AC', [5, 5])
+        # A compile error has no test cases, so the problem has no points to show.
+        self.submit(self.contest_problems[1], 'CE', [])
+
+        self.participation.recompute_results()
+        self.participation.refresh_from_db()
+        self.assertEqual(self.participation.score, 10)
+        self.assertEqual(set(self.participation.format_data), {str(self.contest_problems[0].id)})
+        self.assertTrue(self.participation.format_data[str(self.contest_problems[0].id)]['first_solve'])
@@ -1,6 +1,14 @@
+import hashlib
+from functools import lru_cache
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.cache import caches
 from django.utils.html import escape, mark_safe
 
-__all__ = ['highlight_code']
+from judge.utils.unicode import utf8bytes
+
+__all__ = ['highlight_code', 'cached_highlight_code', 'get_lexer']
 
 
 def _make_pre_code(code):
@@ -14,24 +22,61 @@ def _wrap_code(inner):
     yield 0, "</code>"
 
 
-try:
-    import pygments
-    import pygments.lexers
-    import pygments.formatters.html
-    import pygments.util
-except ImportError:
+# pygments is only imported once something is highlighted, as processes like the bridge never do.
+if find_spec('pygments') is None:
+    def get_lexer(language):
+        return None
+
     def highlight_code(code, language, cssclass=None):
         return _make_pre_code(code)
 else:
-    class HtmlCodeFormatter(pygments.formatters.HtmlFormatter):
-        def wrap(self, source, outfile):
-            return self._wrap_div(self._wrap_pre(_wrap_code(source)))
+    # Looking up a lexer scans every lexer pygments knows about, so both lexers and formatters are reused.
+    @lru_cache(maxsize=256)
+    def get_lexer(language):
+        import pygments.lexers
+        import pygments.util
 
-    def highlight_code(code, language, cssclass='codehilite'):
         try:
-            lexer = pygments.lexers.get_lexer_by_name(language)
+            return pygments.lexers.get_lexer_by_name(language)
         except pygments.util.ClassNotFound:
+            return None
+
+    @lru_cache(maxsize=None)
+    def _get_formatter_class():
+        import pygments.formatters.html
+
+        class HtmlCodeFormatter(pygments.formatters.HtmlFormatter):
+            def wrap(self, source, outfile):
+                return self._wrap_div(self._wrap_pre(_wrap_code(source)))
+
+        return HtmlCodeFormatter
+
+    @lru_cache(maxsize=16)
+    def _get_formatter(cssclass):
+        return _get_formatter_class()(cssclass=cssclass)
+
+    def highlight_code(code, language, cssclass='codehilite'):
+        import pygments
+
+        lexer = get_lexer(language)
+        if lexer is None:
             return _make_pre_code(code)
 
         # return mark_safe(pygments.highlight(code, lexer, HtmlCodeFormatter(cssclass=cssclass, linenos='table')))
-        return mark_safe(pygments.highlight(code, lexer, HtmlCodeFormatter(cssclass=cssclass)))
+        return mark_safe(pygments.highlight(code, lexer, _get_formatter(cssclass)))
+
+
+def get_highlight_cache_key(code, language, cssclass):
+    hash = hashlib.sha1(utf8bytes(code))
+    hash.update(utf8bytes('\0%s\0%s' % (language, cssclass)))
+    return 'highlight:' + hash.hexdigest()
+
+
+def cached_highlight_code(code, language, cssclass='codehilite'):
+    cache = caches[settings.DMOJ_HIGHLIGHT_CACHE]
+    key = get_highlight_cache_key(code, language, cssclass)
+    result = cache.get(key)
+    if result is None:
+        result = str(highlight_code(code, language, cssclass))
+        cache.set(key, result, settings.DMOJ_HIGHLIGHT_CACHE_TTL)
+    return mark_safe(result)
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import logging
 import re
 from html.parser import HTMLParser
@@ -6,6 +8,7 @@ from urllib.parse import urlparse
 import mistune
 from bleach.sanitizer import Cleaner
 from django.conf import settings
+from django.core.cache import caches
 from jinja2 import Markup
 from lxml import html
 from lxml.etree import ParserError, XMLSyntaxError
@@ -13,8 +16,10 @@ from lxml.etree import ParserError, XMLSyntaxError
 from judge.highlight_code import highlight_code
 from judge.jinja2.markdown.lazy_load import lazy_load as lazy_load_processor
 from judge.jinja2.markdown.math import MathInlineGrammar, MathInlineLexer, MathRenderer
+from judge.utils.cachedict import CacheDict, LRUCache
 from judge.utils.camo import client as camo_client
 from judge.utils.texoid import TEXOID_ENABLED, TexoidRenderer
+from judge.utils.unicode import utf8bytes
 from .bleach_whitelist import all_styles, mathml_attrs, mathml_tags
 from .. import registry
 
@@ -22,6 +27,9 @@ logger = logging.getLogger('judge.html')
 
 NOFOLLOW_WHITELIST = settings.NOFOLLOW_EXCLUDED
 
+# Bump this whenever a change to the renderer affects its output, to invalidate previously cached renders.
+RENDER_CACHE_VERSION = 1
+
 
 class CodeSafeInlineGrammar(mistune.InlineGrammar):
     double_emphasis = re.compile(r'^\*{2}([\s\S]+?)()\*{2}(?!\*)')  # **word**
@@ -40,6 +48,7 @@ class AwesomeRenderer(MathRenderer, mistune.Renderer):
     def __init__(self, *args, **kwargs):
         self.nofollow = kwargs.pop('nofollow', True)
         self.texoid = TexoidRenderer() if kwargs.pop('texoid', False) else None
+        self.texoid_failed = False
         self.parser = HTMLParser()
         super(AwesomeRenderer, self).__init__(*args, **kwargs)
 
@@ -85,6 +94,7 @@ class AwesomeRenderer(MathRenderer, mistune.Renderer):
             latex = self.parser.unescape(latex)
             result = self.texoid.get_result(latex)
             if not result:
+                self.texoid_failed = True
                 return '<pre>%s</pre>' % mistune.escape(latex, smart_amp=False)
             elif 'error' not in result:
                 img = ('''<img src="%(svg)s" onerror="this.src='%(png)s';this.onerror=null"'''
@@ -150,8 +160,56 @@ def fragment_tree_to_str(tree):
     return html.tostring(tree, encoding='unicode')[len('<div>'):-len('</div>')]
 
 
+def make_style_version(style):
+    styles = settings.MARKDOWN_STYLES.get(style, settings.MARKDOWN_DEFAULT_STYLE)
+    config = [RENDER_CACHE_VERSION, styles, bool(settings.MATHOID_URL), TEXOID_ENABLED,
+              camo_client is not None, sorted(NOFOLLOW_WHITELIST)]
+    return hashlib.sha1(utf8bytes(json.dumps(config, sort_keys=True, default=repr))).hexdigest()
+
+
+# Computed on first use of each style, before get_cleaner gets a chance to modify the bleach parameters.
+style_version = CacheDict(make_style_version)
+render_cache = LRUCache(settings.MARKDOWN_RENDER_CACHE_SIZE)
+
+
+def get_render_cache_key(value, style, math_engine, lazy_load):
+    hash = hashlib.sha1(utf8bytes(value))
+    hash.update(utf8bytes('\0%s\0%s\0%d\0%s' % (style, math_engine, lazy_load, style_version[style])))
+    return 'markdown:' + hash.hexdigest()
+
+
 @registry.filter
 def markdown(value, style, math_engine=None, lazy_load=False):
+    # Renders are cached in this process and in the shared cache, keyed by everything that affects the output,
+    # so identical content is only rendered once no matter where it is displayed.
+    key = get_render_cache_key(value, style, math_engine, lazy_load)
+    result = render_cache.get(key)
+    if result is None:
+        # Renders where mathoid or texoid failed show the source instead, so they are kept apart, and only in the
+        # shared cache for a short while, until those services are likely to be back.
+        failed_key = key + ':failed'
+        shared_cache = caches[settings.MARKDOWN_RENDER_CACHE]
+        cached = shared_cache.get_many([key, failed_key])
+        if failed_key in cached and key not in cached:
+            return Markup(cached[failed_key])
+        result = cached.get(key)
+        if result is None:
+            result, failed = _render_markdown(value, style, math_engine, lazy_load)
+            if failed:
+                shared_cache.set(failed_key, result, settings.MARKDOWN_RENDER_CACHE_FAILED_TTL)
+                return Markup(result)
+            shared_cache.set(key, result, settings.MARKDOWN_RENDER_CACHE_TTL)
+        render_cache.set(key, result)
+    return Markup(result)
+
+
+def render_markdown(value, style, math_engine=None, lazy_load=False):
+    return _render_markdown(value, style, math_engine, lazy_load)[0]
+
+
+def _render_markdown(value, style, math_engine, lazy_load):
+    """Returns the rendered HTML, and whether any formula or LaTeX document was left as source because mathoid or
+    texoid failed to render it."""
     styles = settings.MARKDOWN_STYLES.get(style, settings.MARKDOWN_DEFAULT_STYLE)
     escape = styles.get('safe_mode', True)
     nofollow = styles.get('nofollow', True)
@@ -169,7 +227,7 @@ def markdown(value, style, math_engine=None, lazy_load=False):
                                math=math and math_engine is not None, math_engine=math_engine)
     markdown = mistune.Markdown(renderer=renderer, inline=AwesomeInlineLexer,
                                 parse_block_html=1, parse_inline_html=1)
-    result = markdown(value)
+    result = renderer.substitute_math(markdown(value))
 
     if post_processors:
         tree = fragments_to_tree(result)
@@ -178,4 +236,4 @@ def markdown(value, style, math_engine=None, lazy_load=False):
         result = fragment_tree_to_str(tree)
     if bleach_params:
         result = get_cleaner(style, bleach_params).clean(result)
-    return Markup(result)
+    return result, renderer.math_failed or renderer.texoid_failed
@@ -49,11 +49,21 @@ class MathInlineLexer(mistune.InlineLexer):
 class MathRenderer(mistune.Renderer):
     def __init__(self, *args, **kwargs):
         if kwargs.pop('math', False):
-            self.mathoid = MathoidMathParser(kwargs.pop('math_engine', None) or 'svg')
+            # Formulas are collected while rendering and resolved together by substitute_math.
+            self.mathoid = MathoidMathParser(kwargs.pop('math_engine', None) or 'svg').batch()
         else:
             self.mathoid = None
         super(MathRenderer, self).__init__(*args, **kwargs)
 
+    @property
+    def math_failed(self):
+        return self.mathoid is not None and self.mathoid.failed
+
+    def substitute_math(self, html):
+        if self.mathoid is None:
+            return html
+        return self.mathoid.substitute(html)
+
     def block_math(self, math):
         if self.mathoid is None or not math:
             return r'\[%s\]' % mistune.escape(str(math))
@@ -1,7 +1,15 @@
-from django.test import SimpleTestCase
+import shutil
+import tempfile
+from unittest import mock
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
 from lxml import html
 
-from . import fragment_tree_to_str, fragments_to_tree, get_cleaner, markdown
+from . import _render_markdown, fragment_tree_to_str, fragments_to_tree, get_cleaner, get_render_cache_key, markdown, \
+    render_cache
 
 MATHML_N = '''\
 <math xmlns="http://www.w3.org/1998/Math/MathML">
@@ -130,6 +138,46 @@ class TestMarkdown(SimpleTestCase):
                              '<p><noscript><img src="test.png"></noscript>'
                              '<img src="/static/blank.gif" data-src="test.png" class="unveil"></p>')
 
+    def test_render_cache(self):
+        render_cache.clear()
+        with mock.patch('judge.jinja2.markdown._render_markdown', wraps=_render_markdown) as render:
+            self.assertHTMLEqual(markdown('**render cache**', self.UNBLEACHED_STYLE),
+                                 '<p><strong>render cache</strong></p>')
+            self.assertHTMLEqual(markdown('**render cache**', self.UNBLEACHED_STYLE),
+                                 '<p><strong>render cache</strong></p>')
+            self.assertEqual(render.call_count, 1)
+
+            markdown('**render cache**', self.UNBLEACHED_STYLE, lazy_load=True)
+            markdown('**render cache**', self.BLEACHED_STYLE)
+            self.assertEqual(render.call_count, 3)
+
+    def test_render_cache_math_failure(self):
+        render_cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        session = mock.Mock()
+        session.post.side_effect = requests.ConnectionError()
+        with override_settings(MATHOID_URL='http://mathoid.test/', MATHOID_CACHE_ROOT=root,
+                               MATHOID_CACHE_URL='/mathoid/'), \
+                mock.patch('judge.utils.mathoid.get_session', return_value=session):
+            with self.assertLogs('judge.mathoid', 'ERROR'):
+                self.assertHTMLEqual(markdown('~y~ failed', self.UNBLEACHED_STYLE, 'mml'), r'<p>\(y\) failed</p>')
+            # The failed render is cached briefly, so mathoid is not asked again right away.
+            self.assertHTMLEqual(markdown('~y~ failed', self.UNBLEACHED_STYLE, 'mml'), r'<p>\(y\) failed</p>')
+            self.assertEqual(session.post.call_count, 1)
+            self.assertEqual(len(render_cache), 0)
+
+            # Once the failed render expires, the formula is rendered again by mathoid and cached for good.
+            key = get_render_cache_key('~y~ failed', self.UNBLEACHED_STYLE, 'mml', False)
+            caches[settings.MARKDOWN_RENDER_CACHE].delete(key + ':failed')
+            session.post.side_effect = None
+            session.post.return_value.json.return_value = {
+                'success': True, 'mml': '<math>y</math>', 'svg': '<svg></svg>', 'png': {'data': [0]},
+                'mathoidStyle': 'vertical-align: 0',
+            }
+            self.assertHTMLEqual(markdown('~y~ failed', self.UNBLEACHED_STYLE, 'mml'), '<p><math>y</math> failed</p>')
+            self.assertEqual(len(render_cache), 1)
+
 
 class TestFragmentUtils(SimpleTestCase):
     def test_simple(self):
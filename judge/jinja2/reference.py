@@ -2,7 +2,6 @@ import re
 from collections import defaultdict
 from urllib.parse import urljoin
 
-from ansi2html import Ansi2HTMLConverter
 from django.contrib.auth.models import AbstractUser
 from django.urls import reverse
 from django.utils.safestring import mark_safe
@@ -10,8 +9,11 @@ from lxml.html import Element
 
 from judge import lxml_tree
 from judge.models import Contest, Problem, Profile
+from judge.utils.imports import lazy_import
 from . import registry
 
+ansi2html_module = lazy_import('ansi2html')
+
 rereference = re.compile(r'\[(r?user):(\w+)\]')
 
 
@@ -183,4 +185,4 @@ def join(first, second, *rest):
 
 @registry.filter(name='ansi2html')
 def ansi2html(s):
-    return mark_safe(Ansi2HTMLConverter(inline=True).convert(s, full=False))
+    return mark_safe(ansi2html_module.Ansi2HTMLConverter(inline=True).convert(s, full=False))
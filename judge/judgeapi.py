@@ -5,6 +5,7 @@ import struct
 import zlib
 
 from django.conf import settings
+from django.utils import timezone
 
 from judge import event_poster as event
 
@@ -48,6 +49,14 @@ def judge_request(packet, reply=True):
         return result
 
 
+def _count_result(submission, result, amount=1):
+    from .models import ContestSubmissionCount, DailySubmissionCount
+    if submission.contest_object_id is not None:
+        ContestSubmissionCount.bump(submission.contest_object_id, submission.problem_id, submission.language_id,
+                                    result, amount)
+    DailySubmissionCount.bump(timezone.localdate(submission.date), submission.language_id, result, amount)
+
+
 def judge_submission(submission, rejudge=False, batch_rejudge=False, judge_id=None):
     from .models import ContestSubmission, Submission, SubmissionTestCase
 
@@ -76,8 +85,14 @@ def judge_submission(submission, rejudge=False, batch_rejudge=False, judge_id=No
     # as that would prevent people from knowing a submission is being scheduled for rejudging.
     # It is worth noting that this mechanism does not prevent a new rejudge from being scheduled
     # while already queued, but that does not lead to data corruption.
-    if not Submission.objects.filter(id=submission.id).exclude(status__in=('P', 'G')).update(**updates):
+    # The result being cleared is taken back from the counts, and the new one is counted once graded. Updating only
+    # if the result is still the one read means that it is taken back exactly once.
+    old_result = Submission.objects.filter(id=submission.id).values_list('result', flat=True).first()
+    if not Submission.objects.filter(id=submission.id, result=old_result).exclude(status__in=('P', 'G')) \
+            .update(**updates):
         return False
+    if old_result is not None:
+        _count_result(submission, old_result, -1)
 
     SubmissionTestCase.objects.filter(submission_id=submission.id).delete()
 
@@ -94,10 +109,12 @@ def judge_submission(submission, rejudge=False, batch_rejudge=False, judge_id=No
     except BaseException:
         logger.exception('Failed to send request to judge')
         Submission.objects.filter(id=submission.id).update(status='IE', result='IE')
+        _count_result(submission, 'IE')
         success = False
     else:
         if response['name'] != 'submission-received' or response['submission-id'] != submission.id:
             Submission.objects.filter(id=submission.id).update(status='IE', result='IE')
+            _count_result(submission, 'IE')
         _post_update_submission(submission)
         success = True
     return success
@@ -114,5 +131,6 @@ def abort_submission(submission):
     # and returns a bad-request, the submission is not falsely shown as "Aborted" when it will still be judged.
     if not response.get('judge-aborted', True):
         Submission.objects.filter(id=submission.id).update(status='AB', result='AB', points=0)
+        _count_result(submission, 'AB')
         event.post('sub_%s' % Submission.get_id_secret(submission.id), {'type': 'aborted-submission'})
         _post_update_submission(submission, done=True)
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from judge.utils.file_cache import SegmentFileCache
+
+
+class Command(BaseCommand):
+    help = 'compacts a segment file cache, discarding overwritten entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('cache', choices=('mathoid', 'texoid'), help='file cache to compact')
+
+    def handle(self, *args, **options):
+        prefix = options['cache'].upper()
+        if getattr(settings, prefix + '_CACHE_FORMAT') != 'segment':
+            raise CommandError('%s_CACHE_FORMAT is not segment' % prefix)
+
+        cache = SegmentFileCache(getattr(settings, prefix + '_CACHE_ROOT'), getattr(settings, prefix + '_CACHE_URL'))
+        old_size, new_size = cache.compact()
+        print('Compacted %d bytes into %d bytes' % (old_size, new_size))
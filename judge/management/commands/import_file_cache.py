@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from judge.utils.file_cache import SegmentFileCache
+
+
+class Command(BaseCommand):
+    help = 'imports a directory file cache into a segment file cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('cache', choices=('mathoid', 'texoid'), help='file cache to import into')
+        parser.add_argument('directory', help='root of the directory file cache to import')
+
+    def handle(self, *args, **options):
+        prefix = options['cache'].upper()
+        root = getattr(settings, prefix + '_CACHE_ROOT')
+        if not root:
+            raise CommandError('%s_CACHE_ROOT is not set' % prefix)
+
+        cache = SegmentFileCache(root, getattr(settings, prefix + '_CACHE_URL'))
+        count = cache.import_directory(options['directory'])
+        print('Imported %d files' % count)
+        print('Set %s_CACHE_FORMAT to segment to start using the imported cache' % prefix)
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SETUP = '''
+try:
+    import MySQLdb
+except ImportError:
+    import dmoj_install_pymysql
+import django
+django.setup()
+'''
+
+# What each kind of process imports before it can do its work.
+TARGETS = {
+    'setup': SETUP,
+    'web': '''
+from dmoj.wsgi import application
+from django.template import engines
+from django.urls import get_resolver
+get_resolver().url_patterns
+engines.all()
+''',
+    'bridge': SETUP + '''
+import judge.bridge.daemon
+''',
+    'celery': SETUP + '''
+from dmoj.celery import app
+app.loader.import_default_modules()
+''',
+}
+
+EPILOGUE = '''
+import resource
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+
+def parse_importtime(output):
+    """Parses the report of `python -X importtime` into (module, self microseconds, cumulative microseconds)."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'reports the modules that take the longest to import when a web worker, the bridge or celery starts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', nargs='?', choices=sorted(TARGETS), default='web',
+                            help='the kind of process to start')
+        parser.add_argument('-n', '--limit', type=int, default=30, help='number of modules and packages to list')
+        parser.add_argument('-s', '--sort', choices=('self', 'cumulative'), default='cumulative',
+                            help='whether to rank modules by their own import time or including what they import')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'dmoj.settings'))
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                                  TARGETS[options['target']] + EPILOGUE],
+                                 cwd=settings.BASE_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 universal_newlines=True)
+        modules = parse_importtime(process.stderr)
+        if process.returncode or not modules:
+            raise CommandError('Failed to start %s:\n%s' % (options['target'], process.stderr[-2000:]))
+
+        limit = options['limit']
+        index = 1 if options['sort'] == 'self' else 2
+        print('%-60s %10s %10s' % ('module', 'self ms', 'total ms'))
+        for name, self_us, cumulative_us in sorted(modules, key=lambda module: module[index], reverse=True)[:limit]:
+            print('%-60s %10.1f %10.1f' % (name[:60], self_us / 1000, cumulative_us / 1000))
+
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split('.')[0]] += self_us
+        print()
+        print('%-60s %10s' % ('package', 'ms'))
+        for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            print('%-60s %10.1f' % (name[:60], self_us / 1000))
+
+        print()
+        print('%d modules imported in %.1f ms, peak memory %.1f MiB' % (
+            len(modules), sum(self_us for _, self_us, _ in modules) / 1000,
+            int(process.stdout.split()[-1]) / 1024))
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from judge.utils.metrics import collect
+
+SORT_KEYS = {
+    'time': lambda view: view['seconds'] / view['requests'],
+    'total-time': lambda view: view['seconds'],
+    'queries': lambda view: view['queries'] / view['requests'],
+    'query-time': lambda view: view['query_seconds'] / view['requests'],
+    'cache-misses': lambda view: view['cache_misses'] / view['requests'],
+}
+
+
+class Command(BaseCommand):
+    help = 'lists the views and bridge packet handlers that are the slowest or run the most queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-s', '--sort', choices=sorted(SORT_KEYS), default='queries',
+                            help='what to rank views by, per request unless total')
+        parser.add_argument('-n', '--limit', type=int, default=20, help='number of views to list')
+
+    def handle(self, *args, **options):
+        if not settings.DMOJ_METRICS_DIR:
+            raise CommandError('DMOJ_METRICS_DIR must be set to read the metrics of other processes')
+
+        counters, histograms = collect()
+        views = {}
+
+        def get_view(labels):
+            name = dict(labels)['view']
+            return views.setdefault(name, {'name': name, 'requests': 0, 'seconds': 0, 'queries': 0,
+                                           'query_seconds': 0, 'cache_misses': 0})
+
+        for (name, labels), histogram in histograms.items():
+            if name == 'dmoj_view_seconds':
+                get_view(labels).update(requests=histogram['count'], seconds=histogram['sum'])
+            elif name == 'dmoj_view_queries':
+                get_view(labels)['queries'] = histogram['sum']
+            elif name == 'dmoj_view_query_seconds':
+                get_view(labels)['query_seconds'] = histogram['sum']
+        for (name, labels), value in counters.items():
+            if name == 'dmoj_view_cache_misses_total':
+                get_view(labels)['cache_misses'] = value
+
+        key = SORT_KEYS[options['sort']]
+        ranked = sorted((view for view in views.values() if view['requests']), key=key, reverse=True)
+        print('%-40s %8s %10s %10s %10s %10s' % ('view', 'requests', 'avg ms', 'queries', 'query ms', 'misses'))
+        for view in ranked[:options['limit']]:
+            requests = view['requests']
+            print('%-40s %8d %10.1f %10.1f %10.1f %10.1f' % (
+                view['name'][:40], requests, view['seconds'] / requests * 1000, view['queries'] / requests,
+                view['query_seconds'] / requests * 1000, view['cache_misses'] / requests,
+            ))
+
+        packets = sorted(((dict(labels).get('packet') or dict(labels).get('lock'), name, histogram)
+                          for (name, labels), histogram in histograms.items()
+                          if name in ('dmoj_bridge_packet_seconds', 'dmoj_lock_wait_seconds') and histogram['count']),
+                         key=lambda item: item[2]['sum'] / item[2]['count'], reverse=True)
+        if packets:
+            print()
+            print('%-40s %8s %10s %10s' % ('bridge', 'count', 'avg ms', 'total s'))
+            for label, name, histogram in packets[:options['limit']]:
+                kind = 'lock' if name == 'dmoj_lock_wait_seconds' else 'packet'
+                print('%-40s %8d %10.2f %10.1f' % ('%s %s' % (kind, label), histogram['count'],
+                                                   histogram['sum'] / histogram['count'] * 1000, histogram['sum']))
@@ -0,0 +1,45 @@
+import shutil
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from judge.models import Contest
+from judge.pdf_problems import HAS_PDF, HAS_PDFUNITE, PdfRenderError, render_contest_pdf
+
+
+class Command(BaseCommand):
+    help = 'renders the problems of a contest into a single PDF file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('key', help='key of contest to render')
+        parser.add_argument('output', nargs='?', help='file to copy the PDF to')
+        parser.add_argument('-l', '--language', default=settings.LANGUAGE_CODE,
+                            help='language to render PDF in')
+
+    def handle(self, *args, **options):
+        if not HAS_PDF or not HAS_PDFUNITE:
+            raise CommandError('Rendering contest PDFs requires Selenium, DMOJ_PDF_PROBLEM_CACHE and pdfunite')
+
+        try:
+            contest = Contest.objects.get(key=options['key'])
+        except Contest.DoesNotExist:
+            raise CommandError('Bad contest key')
+
+        total = contest.contest_problems.count()
+        done = 0
+
+        def callback():
+            nonlocal done
+            done += 1
+            print('Rendered %d/%d problems' % (done, total))
+
+        try:
+            cache = render_contest_pdf(contest, options['language'], callback=callback)
+        except PdfRenderError as e:
+            print(e.log, file=sys.stderr)
+            raise CommandError('Failed to render contest PDF')
+
+        if options['output']:
+            shutil.copyfile(cache, options['output'])
+        print('Rendered to %s' % (options['output'] or cache))
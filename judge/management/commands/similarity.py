@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from judge.models import Contest, ContestMoss
+from judge.tasks.contest import get_moss_sources
+from judge.utils.similarity import SimilarityIndex
+
+
+class Command(BaseCommand):
+    help = 'checks for similar code in a contest without using MOSS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('contest', help='the key of the contest')
+        parser.add_argument('-t', '--threshold', type=float, default=0.5,
+                            help='fraction of fingerprints two submissions must share to be reported')
+
+    def handle(self, *args, **options):
+        try:
+            contest = Contest.objects.get(key=options['contest'])
+        except Contest.DoesNotExist:
+            raise CommandError('Bad contest key')
+
+        for problem in contest.problems.order_by('code'):
+            print('========== %s / %s ==========' % (problem.code, problem.name))
+            for dmoj_lang, _ in ContestMoss.LANG_MAPPING:
+                index = SimilarityIndex()
+                for username, source, language in get_moss_sources(contest, problem, dmoj_lang):
+                    index.add(username, source, language)
+
+                pairs = index.pairs(options['threshold'])
+                print('%s: %d submissions, %d similar pairs' % (dmoj_lang, len(index.fingerprints), len(pairs)))
+                for a, b, similarity in pairs:
+                    print('    %s, %s: %.0f%%' % (a, b, similarity * 100))
@@ -1,5 +1,13 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.urls import Resolver404, resolve
 
+from judge.utils import metrics
+
 
 class ShortCircuitMiddleware:
     def __init__(self, get_response):
@@ -40,16 +48,95 @@ class DMOJImpersonationMiddleware(object):
 
 
 class ContestMiddleware(object):
+    session_key = 'contest_access_check'
+
     def __init__(self, get_response):
         self.get_response = get_response
 
+    def update_contest(self, request, profile):
+        participation_id = profile.current_contest_id
+        if participation_id is None:
+            return
+
+        # The session remembers until when the participation was last verified to be running and accessible,
+        # so the common case of a user browsing during a contest costs a single timestamp comparison.
+        current = time.time()
+        checked = request.session.get(self.session_key)
+        if checked is not None and checked[0] == participation_id and current < checked[1]:
+            return
+
+        profile.update_contest()
+        if profile.current_contest_id is None:
+            request.session.pop(self.session_key, None)
+        else:
+            valid_until = min(current + settings.DMOJ_CONTEST_ACCESS_CHECK_TTL,
+                              profile.current_contest.end_time.timestamp())
+            request.session[self.session_key] = (participation_id, valid_until)
+
     def __call__(self, request):
         profile = request.profile
         if profile:
-            profile.update_contest()
+            self.update_contest(request, profile)
             request.participation = profile.current_contest
             request.in_contest = request.participation is not None
         else:
             request.in_contest = False
             request.participation = None
         return self.get_response(request)
+
+
+class MetricsMiddleware(object):
+    """Records, per URL name, the time spent in each request, its database queries and cache lookups, and the time
+    taken to render its template response."""
+
+    def __init__(self, get_response):
+        if not settings.DMOJ_METRICS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        metrics.instrument_cache_backends()
+
+    def get_view_name(self, request):
+        if request.resolver_match is not None:
+            return request.resolver_match.view_name
+        try:
+            return resolve(request.path_info, getattr(request, 'urlconf', None)).view_name
+        except Resolver404:
+            return '<unresolved>'
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def rendered(response):
+            metrics.observe('dmoj_view_render_seconds', time.perf_counter() - start, view=self.get_view_name(request))
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def __call__(self, request):
+        queries = [0, 0]
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries[0] += 1
+                queries[1] += time.perf_counter() - start
+
+        hits, misses = metrics.cache_counts()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+        end_hits, end_misses = metrics.cache_counts()
+
+        view = self.get_view_name(request)
+        metrics.observe('dmoj_view_seconds', elapsed, view=view)
+        metrics.observe('dmoj_view_queries', queries[0], metrics.COUNT_BUCKETS, view=view)
+        metrics.observe('dmoj_view_query_seconds', queries[1], view=view)
+        metrics.increment('dmoj_view_cache_hits_total', end_hits - hits, view=view)
+        metrics.increment('dmoj_view_cache_misses_total', end_misses - misses, view=view)
+        metrics.start_flushing()
+        return response
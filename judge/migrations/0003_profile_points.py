@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def calculate_points(apps, schema_editor):
+    Profile = apps.get_model('judge', 'Profile')
+    Problem = apps.get_model('judge', 'Problem')
+    public_problems = Problem.objects.filter(is_public=True)
+    for profile in Profile.objects.iterator():
+        points = sum(public_problems.filter(submission__user=profile, submission__points__isnull=False)
+                                    .annotate(max_points=models.Max('submission__points'))
+                                    .filter(max_points__gt=0).values_list('max_points', flat=True))
+        problems = (public_problems.filter(submission__user=profile, submission__result='AC')
+                                   .values('id').distinct().count())
+        Profile.objects.filter(id=profile.id).update(points=points, problem_count=problems)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0002_auto_20210410_2352'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='points',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['is_unlisted', '-points', 'id'], name='profile_ranking_idx'),
+        ),
+        migrations.RunPython(calculate_points, migrations.RunPython.noop, atomic=True),
+    ]
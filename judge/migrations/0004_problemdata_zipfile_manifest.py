@@ -0,0 +1,17 @@
+import jsonfield.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0003_profile_points'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problemdata',
+            name='zipfile_manifest',
+            field=jsonfield.fields.JSONField(blank=True, help_text='name, size and CRC-32 of each file in the data zip file', null=True, verbose_name='data zip file manifest'),
+        ),
+    ]
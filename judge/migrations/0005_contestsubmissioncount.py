@@ -0,0 +1,47 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def recompute_counts(apps, schema_editor):
+    Submission = apps.get_model('judge', 'Submission')
+    ContestSubmissionCount = apps.get_model('judge', 'ContestSubmissionCount')
+    counts = (Submission.objects.filter(contest_object__isnull=False)
+              .values('contest_object_id', 'problem_id', 'language_id', 'result').annotate(count=models.Count('id'))
+              .values_list('contest_object_id', 'problem_id', 'language_id', 'result', 'count'))
+    ContestSubmissionCount.objects.bulk_create([
+        ContestSubmissionCount(contest_id=contest_id, problem_id=problem_id, language_id=language_id,
+                               result=result, count=count)
+        for contest_id, problem_id, language_id, result, count in counts.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0004_problemdata_zipfile_manifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContestSubmissionCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result', models.CharField(blank=True, choices=[('AC', 'Accepted'), ('WA', 'Wrong Answer'), ('TLE', 'Time Limit Exceeded'), ('MLE', 'Memory Limit Exceeded'), ('OLE', 'Output Limit Exceeded'), ('IR', 'Invalid Return'), ('RTE', 'Runtime Error'), ('CE', 'Compile Error'), ('IE', 'Internal Error'), ('SC', 'Short circuit'), ('AB', 'Aborted')], default=None, max_length=3, null=True, verbose_name='result')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='count')),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_counts', to='judge.Contest', verbose_name='contest')),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='judge.Language', verbose_name='language')),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='judge.Problem', verbose_name='problem')),
+            ],
+            options={
+                'verbose_name': 'contest submission count',
+                'verbose_name_plural': 'contest submission counts',
+                'unique_together': {('contest', 'problem', 'language', 'result')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['contest_object', 'problem', 'language', 'result'],
+                               name='submission_contest_count_idx'),
+        ),
+        migrations.RunPython(recompute_counts, migrations.RunPython.noop, atomic=True),
+    ]
@@ -0,0 +1,40 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def recompute_counts(apps, schema_editor):
+    Submission = apps.get_model('judge', 'Submission')
+    DailySubmissionCount = apps.get_model('judge', 'DailySubmissionCount')
+    counts = (Submission.objects.annotate(day=TruncDate('date')).values('day', 'language_id', 'result')
+              .annotate(count=models.Count('id')).values_list('day', 'language_id', 'result', 'count'))
+    DailySubmissionCount.objects.bulk_create([
+        DailySubmissionCount(date=day, language_id=language_id, result=result, count=count)
+        for day, language_id, result, count in counts.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judge', '0005_contestsubmissioncount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySubmissionCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, verbose_name='date')),
+                ('result', models.CharField(blank=True, choices=[('AC', 'Accepted'), ('WA', 'Wrong Answer'), ('TLE', 'Time Limit Exceeded'), ('MLE', 'Memory Limit Exceeded'), ('OLE', 'Output Limit Exceeded'), ('IR', 'Invalid Return'), ('RTE', 'Runtime Error'), ('CE', 'Compile Error'), ('IE', 'Internal Error'), ('SC', 'Short circuit'), ('AB', 'Aborted')], default=None, max_length=3, null=True, verbose_name='result')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='count')),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='judge.Language', verbose_name='language')),
+            ],
+            options={
+                'verbose_name': 'daily submission count',
+                'verbose_name_plural': 'daily submission counts',
+                'unique_together': {('date', 'language', 'result')},
+            },
+        ),
+        migrations.RunPython(recompute_counts, migrations.RunPython.noop, atomic=True),
+    ]
@@ -2,7 +2,7 @@ from reversion import revisions
 
 from judge.models.choices import ACE_THEMES, EFFECTIVE_MATH_ENGINES, MATH_ENGINES_CHOICES, TIMEZONE
 from judge.models.contest import Contest, ContestMoss, ContestParticipation, ContestProblem, \
-    ContestSubmission, Rating
+    ContestSubmission, ContestSubmissionCount, Rating
 from judge.models.interface import BlogPost, MiscConfig, NavigationBar, validate_regex
 from judge.models.message import PrivateMessage, PrivateMessageThread
 from judge.models.problem import LanguageLimit, Problem, ProblemClarification, \
@@ -11,7 +11,8 @@ from judge.models.problem_data import CHECKERS, ProblemData, ProblemTestCase, pr
     problem_directory_file
 from judge.models.profile import Profile
 from judge.models.runtime import Judge, Language, RuntimeVersion
-from judge.models.submission import SUBMISSION_RESULT, Submission, SubmissionSource, SubmissionTestCase
+from judge.models.submission import DailySubmissionCount, SUBMISSION_RESULT, Submission, SubmissionSource, \
+    SubmissionTestCase
 from judge.models.ticket import Ticket, TicketMessage
 
 revisions.register(Profile, exclude=['points', 'last_access', 'ip', 'rating'])
@@ -1,21 +1,24 @@
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.db import models, transaction
-from django.db.models import CASCADE, Q
+from django.db.models import CASCADE, Count, Q
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import gettext, gettext_lazy as _
 from jsonfield import JSONField
-from lupa import LuaRuntime
-from moss import MOSS_LANG_C, MOSS_LANG_CC, MOSS_LANG_JAVA, MOSS_LANG_PYTHON
 
 from judge import contest_format
 from judge.models.problem import Problem
 from judge.models.profile import Profile
-from judge.models.submission import Submission
+from judge.models.submission import SUBMISSION_RESULT, Submission, bump_count
+from judge.utils.imports import lazy_import
 
-__all__ = ['Contest', 'ContestParticipation', 'ContestProblem', 'ContestSubmission', 'Rating']
+lupa = lazy_import('lupa')
+
+__all__ = ['Contest', 'ContestParticipation', 'ContestProblem', 'ContestSubmission', 'ContestSubmissionCount',
+           'Rating']
 
 
 class MinValueOrNoneValidator(MinValueValidator):
@@ -83,7 +86,7 @@ class Contest(models.Model):
 
         def DENY_ALL(obj, attr_name, is_setting):
             raise AttributeError()
-        lua = LuaRuntime(attribute_filter=DENY_ALL, register_eval=False, register_builtins=False)
+        lua = lupa.LuaRuntime(attribute_filter=DENY_ALL, register_eval=False, register_builtins=False)
         return lua.eval(self.problem_label_script)
 
     def clean(self):
@@ -410,11 +413,13 @@ class Rating(models.Model):
 
 
 class ContestMoss(models.Model):
+    # The language names understood by MOSS, as in the MOSS_LANG_* constants of `moss`, which is only imported when
+    # MOSS is run.
     LANG_MAPPING = [
-        ('C', MOSS_LANG_C),
-        ('C++', MOSS_LANG_CC),
-        ('Java', MOSS_LANG_JAVA),
-        ('Python', MOSS_LANG_PYTHON),
+        ('C', 'c'),
+        ('C++', 'cc'),
+        ('Java', 'java'),
+        ('Python', 'python'),
     ]
 
     contest = models.ForeignKey(Contest, verbose_name=_('contest'), related_name='moss', on_delete=CASCADE)
@@ -427,3 +432,35 @@ class ContestMoss(models.Model):
         unique_together = ('contest', 'problem', 'language')
         verbose_name = _('contest moss result')
         verbose_name_plural = _('contest moss results')
+
+
+class ContestSubmissionCount(models.Model):
+    contest = models.ForeignKey(Contest, verbose_name=_('contest'), related_name='submission_counts',
+                                on_delete=CASCADE)
+    problem = models.ForeignKey(Problem, verbose_name=_('problem'), related_name='+', on_delete=CASCADE)
+    language = models.ForeignKey('Language', verbose_name=_('language'), related_name='+', on_delete=CASCADE)
+    result = models.CharField(verbose_name=_('result'), max_length=3, choices=SUBMISSION_RESULT,
+                              default=None, null=True, blank=True)
+    count = models.PositiveIntegerField(verbose_name=_('count'), default=0)
+
+    @classmethod
+    def bump(cls, contest_id, problem_id, language_id, result, amount=1):
+        bump_count(cls, amount, contest_id=contest_id, problem_id=problem_id, language_id=language_id, result=result)
+        cache.delete('contest_stats_version:%d' % contest_id)
+
+    @classmethod
+    def recompute(cls, contest_id, problem_id):
+        """Recounts the submissions to a problem of a contest from scratch, to repair counts that went wrong."""
+        counts = (Submission.objects.filter(contest_object_id=contest_id, problem_id=problem_id)
+                  .values('language_id', 'result').annotate(count=Count('id'))
+                  .values_list('language_id', 'result', 'count'))
+        with transaction.atomic():
+            cls.objects.filter(contest_id=contest_id, problem_id=problem_id).delete()
+            cls.objects.bulk_create([cls(contest_id=contest_id, problem_id=problem_id, language_id=language_id,
+                                         result=result, count=count) for language_id, result, count in counts])
+        cache.delete('contest_stats_version:%d' % contest_id)
+
+    class Meta:
+        unique_together = ('contest', 'problem', 'language', 'result')
+        verbose_name = _('contest submission count')
+        verbose_name_plural = _('contest submission counts')
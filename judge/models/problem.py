@@ -4,7 +4,7 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
 from django.core.cache import cache
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import CASCADE, F, Q, QuerySet, SET_NULL
 from django.db.models.expressions import RawSQL
 from django.db.models.functions import Coalesce
@@ -102,6 +102,11 @@ class Problem(models.Model):
         self._translated_name_cache = {}
         self._i18n_name = None
         self.__original_code = self.code
+        # Read from __dict__ so that loading a problem with these fields deferred does not query them.
+        self.__original_scoring = self._get_scoring()
+
+    def _get_scoring(self):
+        return self.__dict__.get('is_public'), self.__dict__.get('points'), self.__dict__.get('partial')
 
     @cached_property
     def types_list(self):
@@ -111,14 +116,14 @@ class Problem(models.Model):
         return self.allowed_languages.values_list('common_name', flat=True).distinct().order_by('common_name')
 
     def is_editor(self, profile):
-        return (self.authors.filter(id=profile.id) | self.curators.filter(id=profile.id)).exists()
+        return self.id in Problem.get_role_problem_ids(profile.id)[0]
 
     def is_editable_by(self, user):
         if not user.is_authenticated:
             return False
         if user.has_perm('judge.edit_all_problem') or user.has_perm('judge.edit_public_problem') and self.is_public:
             return True
-        return user.has_perm('judge.edit_own_problem') and user.profile.id in self.editor_ids
+        return user.has_perm('judge.edit_own_problem') and self.is_editor(user.profile)
 
     def is_accessible_by(self, user, skip_contest_problem_check=False):
         # If we don't want to check if the user is in a contest containing that problem.
@@ -141,16 +146,13 @@ class Problem(models.Model):
         if user.has_perm('judge.see_private_problem'):
             return True
 
-        # If the user can edit the problem.
-        # We are using self.editor_ids to take advantage of caching.
-        if self.is_editable_by(user) or user.profile.id in self.editor_ids:
-            return True
-
-        # If user is a tester.
-        if self.testers.filter(id=user.profile.id).exists():
+        # If the user can edit all problems.
+        if user.has_perm('judge.edit_all_problem'):
             return True
 
-        return False
+        # If the user is an author, curator or tester of the problem.
+        editor_ids, tester_ids = Problem.get_role_problem_ids(user.profile.id)
+        return self.id in editor_ids or self.id in tester_ids
 
     def is_subs_manageable_by(self, user):
         return user.is_staff and user.has_perm('judge.rejudge_submission') and self.is_editable_by(user)
@@ -172,13 +174,33 @@ class Problem(models.Model):
         if not (user.has_perm('judge.see_private_problem') or user.has_perm('judge.edit_all_problem')):
             q = Q(is_public=True)
             # Authors, curators, and testers should always have access, so OR at the very end.
-            q |= Q(authors=user.profile)
-            q |= Q(curators=user.profile)
-            q |= Q(testers=user.profile)
+            # The ids come from the cache instead of joining the relations, so no `distinct()` is needed.
+            editor_ids, tester_ids = cls.get_role_problem_ids(user.profile.id)
+            if editor_ids or tester_ids:
+                q |= Q(id__in=editor_ids | tester_ids)
             queryset = queryset.filter(q)
 
         return queryset
 
+    @classmethod
+    def get_role_problem_ids(cls, profile_id):
+        """Returns the ids of the problems the profile is an author or curator of, and of those it is a tester of.
+
+        Both sets are cached until the authors, curators or testers of any of those problems change.
+        """
+        key = 'problem_roles:%d' % profile_id
+        result = cache.get(key)
+        if result is None:
+            editor_ids = set(cls.authors.through.objects.filter(profile_id=profile_id)
+                             .values_list('problem_id', flat=True))
+            editor_ids.update(cls.curators.through.objects.filter(profile_id=profile_id)
+                              .values_list('problem_id', flat=True))
+            tester_ids = set(cls.testers.through.objects.filter(profile_id=profile_id)
+                             .values_list('problem_id', flat=True))
+            result = editor_ids, tester_ids
+            cache.set(key, result, 86400)
+        return result
+
     @classmethod
     def get_public_problems(cls):
         return cls.objects.filter(is_public=True).defer('description')
@@ -303,6 +325,7 @@ class Problem(models.Model):
         return 'problem-full'
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         super(Problem, self).save(*args, **kwargs)
         if self.code != self.__original_code:
             try:
@@ -312,6 +335,15 @@ class Problem(models.Model):
             else:
                 problem_data._update_code(self.__original_code, self.code)
 
+        # Submission points and the points of every user who submitted depend on these, however they are changed.
+        scoring = self._get_scoring()
+        if not adding and any(original is not None and original != value
+                              for original, value in zip(self.__original_scoring, scoring)):
+            from judge.tasks import rescore_problem
+            transaction.on_commit(rescore_problem.s(self.id).delay)
+        self.__original_code = self.code
+        self.__original_scoring = scoring
+
     save.alters_data = True
 
     class Meta:
@@ -1,10 +1,12 @@
 import errno
 import os
+from zipfile import BadZipfile
 
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from jsonfield import JSONField
 
-from judge.utils.problem_data import ProblemDataStorage
+from judge.utils.problem_data import ProblemDataStorage, get_zip_manifest
 
 __all__ = ['problem_data_storage', 'problem_directory_file', 'ProblemData', 'ProblemTestCase', 'CHECKERS']
 
@@ -36,6 +38,8 @@ class ProblemData(models.Model):
                                    on_delete=models.CASCADE)
     zipfile = models.FileField(verbose_name=_('data zip file'), storage=problem_data_storage, null=True, blank=True,
                                upload_to=problem_directory_file)
+    zipfile_manifest = JSONField(verbose_name=_('data zip file manifest'), null=True, blank=True,
+                                 help_text=_('name, size and CRC-32 of each file in the data zip file'))
     generator = models.FileField(verbose_name=_('generator file'), storage=problem_data_storage, null=True, blank=True,
                                  upload_to=problem_directory_file)
     output_prefix = models.IntegerField(verbose_name=_('output prefix length'), blank=True, null=True)
@@ -56,6 +60,17 @@ class ProblemData(models.Model):
             self.__original_zipfile.delete(save=False)
         return super(ProblemData, self).save(*args, **kwargs)
 
+    def get_zipfile_manifest(self):
+        if not self.zipfile:
+            return []
+        if self.zipfile_manifest is None:
+            try:
+                self.zipfile_manifest = get_zip_manifest(self.zipfile.path)
+            except BadZipfile:
+                return []
+            ProblemData.objects.filter(id=self.id).update(zipfile_manifest=self.zipfile_manifest)
+        return self.zipfile_manifest
+
     def has_yml(self):
         return problem_data_storage.exists('%s/init.yml' % self.problem.code)
 
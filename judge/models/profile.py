@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Max, Q
 from django.urls import reverse
 from django.utils.functional import cached_property
 from django.utils.timezone import now
@@ -18,6 +19,7 @@ class Profile(models.Model):
                                 default=settings.DEFAULT_USER_TIME_ZONE)
     language = models.ForeignKey('Language', verbose_name=_('preferred language'), on_delete=models.SET_DEFAULT,
                                  default=Language.get_default_language_pk)
+    points = models.FloatField(default=0)
     problem_count = models.IntegerField(default=0, db_index=True)
     ace_theme = models.CharField(max_length=30, choices=ACE_THEMES, default='github')
     last_access = models.DateTimeField(verbose_name=_('last access time'), default=now)
@@ -39,6 +41,35 @@ class Profile(models.Model):
     def username(self):
         return self.user.username
 
+    def calculate_points(self):
+        from judge.models import Problem
+        public_problems = Problem.get_public_problems()
+        data = (
+            public_problems.filter(submission__user=self, submission__points__isnull=False)
+                           .annotate(max_points=Max('submission__points')).filter(max_points__gt=0)
+                           .values_list('max_points', flat=True)
+        )
+        problems = (
+            public_problems.filter(submission__user=self, submission__result='AC').values('id').distinct().count()
+        )
+        points = sum(data)
+        if self.points != points or self.problem_count != problems:
+            self.points = points
+            self.problem_count = problems
+            self.save(update_fields=['points', 'problem_count'])
+        return points
+
+    calculate_points.alters_data = True
+
+    @property
+    def leaderboard_position(self):
+        # Ties on points are broken by id, matching the leaderboard ordering, so this is a single
+        # range count over the (is_unlisted, points, id) index instead of a scan of the whole table.
+        if self.is_unlisted:
+            return None
+        return Profile.objects.filter(Q(points__gt=self.points) | Q(points=self.points, id__lt=self.id),
+                                      is_unlisted=False).count() + 1
+
     def remove_contest(self):
         self.current_contest = None
         self.save()
@@ -69,6 +100,9 @@ class Profile(models.Model):
         return self.get_user_css_class(self.display_rank)
 
     class Meta:
+        indexes = [
+            models.Index(fields=['is_unlisted', '-points', 'id'], name='profile_ranking_idx'),
+        ]
         permissions = (
             ('view_name', _("View user's real name")),
         )
@@ -1,11 +1,15 @@
 import hashlib
 import hmac
+from datetime import datetime
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
 from django.urls import reverse
 from django.utils.functional import cached_property
+from django.utils.timezone import make_aware
 from django.utils.translation import gettext_lazy as _
 
 from judge.judgeapi import abort_submission, judge_submission
@@ -14,7 +18,7 @@ from judge.models.profile import Profile
 from judge.models.runtime import Language
 from judge.utils.unicode import utf8bytes
 
-__all__ = ['SUBMISSION_RESULT', 'Submission', 'SubmissionSource', 'SubmissionTestCase']
+__all__ = ['SUBMISSION_RESULT', 'DailySubmissionCount', 'Submission', 'SubmissionSource', 'SubmissionTestCase']
 
 SUBMISSION_RESULT = (
     ('AC', _('Accepted')),
@@ -126,26 +130,44 @@ class Submission(models.Model):
     abort.alters_data = True
 
     def can_see_detail(self, user):
+        return self.id in Submission.get_visible_detail_ids(user, [self])
+
+    @classmethod
+    def get_visible_detail_ids(cls, user, submissions):
+        """Returns the ids of those of `submissions` whose details `user` can see.
+
+        The decision is made in Python from the cached sets of problems the user has solved, edits and tests, so
+        a whole page of submissions costs no more queries than a single one.
+        """
         if not user.is_authenticated:
-            return False
+            return set()
+        if user.has_perm('judge.edit_all_problem') or user.has_perm('judge.view_all_submission'):
+            return {submission.id for submission in submissions}
+
+        from judge.utils.problems import user_completed_ids
+
         profile = user.profile
-        if self.problem.is_editable_by(user):
-            return True
-        elif user.has_perm('judge.view_all_submission'):
-            return True
-        elif self.user_id == profile.id:
-            return True
-        elif settings.DMOJ_SUBMISSION_SOURCE_VISIBILITY == 'all':
-            return True
-        elif settings.DMOJ_SUBMISSION_SOURCE_VISIBILITY == 'all-solved' and \
-                (self.problem.is_public or self.problem.testers.filter(id=profile.id).exists()) and \
-                self.problem.submission_set.filter(user_id=profile.id, result='AC',
-                                                   points=self.problem.points).exists():
-            return True
-        elif settings.DMOJ_SUBMISSION_SOURCE_VISIBILITY == 'only-own' and \
-                self.problem.testers.filter(id=profile.id).exists():
-            return True
-        return False
+        visibility = settings.DMOJ_SUBMISSION_SOURCE_VISIBILITY
+        editor_ids, tester_ids = Problem.get_role_problem_ids(profile.id)
+        edit_own = user.has_perm('judge.edit_own_problem')
+        edit_public = user.has_perm('judge.edit_public_problem')
+        completed_ids = None
+
+        result = set()
+        for submission in submissions:
+            problem_id = submission.problem_id
+            if submission.user_id == profile.id or visibility == 'all' or edit_own and problem_id in editor_ids or \
+                    edit_public and submission.problem.is_public:
+                result.add(submission.id)
+            elif visibility == 'only-own':
+                if problem_id in tester_ids:
+                    result.add(submission.id)
+            elif visibility == 'all-solved' and (problem_id in tester_ids or submission.problem.is_public):
+                if completed_ids is None:
+                    completed_ids = user_completed_ids(profile)
+                if problem_id in completed_ids:
+                    result.add(submission.id)
+        return result
 
     def update_contest(self):
         try:
@@ -217,6 +239,11 @@ class Submission(models.Model):
         return self.get_id_secret(self.id)
 
     class Meta:
+        indexes = [
+            # Covers the GROUP BY that recounts a contest problem in ContestSubmissionCount.recompute.
+            models.Index(fields=['contest_object', 'problem', 'language', 'result'],
+                         name='submission_contest_count_idx'),
+        ]
         permissions = (
             ('abort_any_submission', _('Abort any submission')),
             ('rejudge_submission', _('Rejudge the submission')),
@@ -263,3 +290,51 @@ class SubmissionTestCase(models.Model):
         unique_together = ('submission', 'case')
         verbose_name = _('submission test case')
         verbose_name_plural = _('submission test cases')
+
+
+def bump_count(model, amount, **fields):
+    """Adds `amount` to the `count` of the row of `model` identified by `fields`, creating the row if needed.
+
+    A negative amount takes back a result that a rejudge or deletion replaced, and never takes a count below zero.
+    Only single rows are updated, so concurrent bumps do not contend on more than the rows they change.
+    """
+    counts = model.objects.filter(**fields)
+    if amount < 0:
+        counts.filter(count__gte=-amount).update(count=F('count') + amount)
+        return
+    if counts.update(count=F('count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=amount, **fields)
+    except IntegrityError:
+        counts.update(count=F('count') + amount)
+
+
+class DailySubmissionCount(models.Model):
+    date = models.DateField(verbose_name=_('date'), db_index=True)
+    language = models.ForeignKey(Language, verbose_name=_('language'), related_name='+', on_delete=models.CASCADE)
+    result = models.CharField(verbose_name=_('result'), max_length=3, choices=SUBMISSION_RESULT,
+                              default=None, null=True, blank=True)
+    count = models.PositiveIntegerField(verbose_name=_('count'), default=0)
+
+    @classmethod
+    def bump(cls, date, language_id, result, amount=1):
+        bump_count(cls, amount, date=date, language_id=language_id, result=result)
+
+    @classmethod
+    def recompute(cls, start, end):
+        """Recounts the submissions made on the days from `start` up to, but not including, `end`."""
+        counts = (Submission.objects.filter(date__gte=make_aware(datetime.combine(start, datetime.min.time())),
+                                            date__lt=make_aware(datetime.combine(end, datetime.min.time())))
+                  .annotate(day=TruncDate('date')).values('day', 'language_id', 'result')
+                  .annotate(count=Count('id')).values_list('day', 'language_id', 'result', 'count'))
+        with transaction.atomic():
+            cls.objects.filter(date__gte=start, date__lt=end).delete()
+            cls.objects.bulk_create([cls(date=day, language_id=language_id, result=result, count=count)
+                                     for day, language_id, result, count in counts], batch_size=1000)
+
+    class Meta:
+        unique_together = ('date', 'language', 'result')
+        verbose_name = _('daily submission count')
+        verbose_name_plural = _('daily submission counts')
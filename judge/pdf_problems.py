@@ -1,28 +1,35 @@
+import atexit
 import base64
 import errno
+import fcntl
 import io
 import logging
 import os
 import shutil
 import subprocess
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from importlib.util import find_spec
 
 from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import translation
 from django.utils.translation import gettext
 
 logger = logging.getLogger('judge.problem.pdf')
 
+# Selenium is only imported once a PDF is rendered, as most processes never render one.
 HAS_SELENIUM = False
 if settings.USE_SELENIUM:
-    try:
-        from selenium import webdriver
-        from selenium.common.exceptions import TimeoutException
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.support.ui import WebDriverWait
+    if find_spec('selenium') is not None:
         HAS_SELENIUM = True
-    except ImportError:
-        logger.warning('Failed to import Selenium', exc_info=True)
+    else:
+        logger.warning('Failed to find Selenium')
 
 
 HAS_PDF = os.path.isdir(settings.DMOJ_PDF_PROBLEM_CACHE) and HAS_SELENIUM
@@ -30,6 +37,9 @@ HAS_PDF = os.path.isdir(settings.DMOJ_PDF_PROBLEM_CACHE) and HAS_SELENIUM
 EXIFTOOL = settings.EXIFTOOL
 HAS_EXIFTOOL = os.access(EXIFTOOL, os.X_OK)
 
+PDFUNITE = settings.PDFUNITE
+HAS_PDFUNITE = os.access(PDFUNITE, os.X_OK)
+
 
 class BasePdfMaker(object):
     math_engine = 'jax'
@@ -90,6 +100,61 @@ class BasePdfMaker(object):
             shutil.rmtree(self.dir, ignore_errors=True)
 
 
+class BrowserPool(object):
+    """Keeps up to `size` headless Chrome instances warm between PDF renders.
+
+    Renders beyond `size` wait for a browser to be returned. A browser that raises during a render, or that
+    has served `max_uses` renders, is quit instead of going back to the pool.
+    """
+
+    def __init__(self, size, max_uses):
+        self.max_uses = max_uses
+        self.semaphore = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        # (browser, number of renders served)
+        self.idle = []
+
+    def launch(self):
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless')
+        options.binary_location = settings.SELENIUM_CUSTOM_CHROME_PATH
+        return webdriver.Chrome(settings.SELENIUM_CHROMEDRIVER_PATH, options=options)
+
+    def quit(self, browser):
+        try:
+            browser.quit()
+        except Exception:
+            logger.exception('Failed to quit browser')
+
+    @contextmanager
+    def browser(self):
+        with self.semaphore:
+            with self.lock:
+                browser, uses = self.idle.pop() if self.idle else (None, 0)
+            if browser is None:
+                browser = self.launch()
+
+            try:
+                yield browser
+            except Exception:
+                self.quit(browser)
+                raise
+
+            if uses + 1 >= self.max_uses:
+                self.quit(browser)
+            else:
+                with self.lock:
+                    self.idle.append((browser, uses + 1))
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for browser, uses in idle:
+            self.quit(browser)
+
+
 class SeleniumPDFRender(BasePdfMaker):
     success = False
     template = {
@@ -106,24 +171,24 @@ class SeleniumPDFRender(BasePdfMaker):
         return '\n'.join(map(str, driver.get_log('driver') + driver.get_log('browser')))
 
     def _make(self, debug):
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.binary_location = settings.SELENIUM_CUSTOM_CHROME_PATH
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
 
-        browser = webdriver.Chrome(settings.SELENIUM_CHROMEDRIVER_PATH, options=options)
-        browser.get('file://%s' % self.htmlfile)
-        self.log = self.get_log(browser)
+        with browser_pool.browser() as browser:
+            browser.get('file://%s' % self.htmlfile)
+            self.log = self.get_log(browser)
 
-        try:
-            WebDriverWait(browser, 15).until(EC.presence_of_element_located((By.CLASS_NAME, 'math-loaded')))
-        except TimeoutException:
-            logger.error('PDF math rendering timed out')
-            self.log = self.get_log(browser) + '\nPDF math rendering timed out'
-            return
+            try:
+                WebDriverWait(browser, 15).until(EC.presence_of_element_located((By.CLASS_NAME, 'math-loaded')))
+            except TimeoutException:
+                logger.error('PDF math rendering timed out')
+                self.log = self.get_log(browser) + '\nPDF math rendering timed out'
+                return
 
-        response = browser.execute_cdp_cmd('Page.printToPDF', self.template)
-        self.log = self.get_log(browser)
-        browser.quit()
+            response = browser.execute_cdp_cmd('Page.printToPDF', self.template)
+            self.log = self.get_log(browser)
         if not response:
             return
 
@@ -135,5 +200,128 @@ class SeleniumPDFRender(BasePdfMaker):
 
 if HAS_SELENIUM:
     DefaultPdfMaker = SeleniumPDFRender
+    browser_pool = BrowserPool(settings.SELENIUM_BROWSER_POOL_SIZE, settings.SELENIUM_BROWSER_MAX_USES)
+    atexit.register(browser_pool.close)
 else:
     DefaultPdfMaker = None
+
+
+class PdfRenderError(Exception):
+    def __init__(self, log):
+        super().__init__(log)
+        self.log = log
+
+
+def get_problem_pdf_path(code, language):
+    return os.path.join(settings.DMOJ_PDF_PROBLEM_CACHE, '%s.%s.pdf' % (code, language))
+
+
+def get_problem_pdf_url(code, language):
+    scheme = 'https' if settings.DMOJ_SSL else 'http'
+    return '%s://%s%s' % (scheme, Site.objects.get_current().domain, reverse('problem_pdf', args=[code, language]))
+
+
+# Problem codes cannot contain underscores, so these never collide with problem PDFs.
+def get_contest_pdf_path(key, language):
+    return os.path.join(settings.DMOJ_PDF_PROBLEM_CACHE, 'contest_%s.%s.pdf' % (key, language))
+
+
+def get_contest_pdf_task_key(key, language):
+    # Holds the id of the task rendering the contest PDF, which deletes it when it finishes.
+    return 'contest_pdf_task:%s:%s' % (key, language)
+
+
+@contextmanager
+def pdf_cache_lock(path):
+    with open(os.path.join(settings.DMOJ_PDF_PROBLEM_TEMP_DIR, os.path.basename(path) + '.lock'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def render_problem_pdf(problem, language, url, force=False):
+    """Renders the PDF for `problem` in `language` into the PDF cache and returns its path.
+
+    Concurrent renders of the same problem and language on this machine wait for the one in progress and reuse
+    its output, unless `force` is set. Raises PdfRenderError with the renderer log if rendering fails.
+    """
+    cache = get_problem_pdf_path(problem.code, language)
+
+    with pdf_cache_lock(cache):
+        if not force and os.path.exists(cache):
+            return cache
+
+        try:
+            trans = problem.translations.get(language=language)
+        except problem.translations.model.DoesNotExist:
+            trans = None
+
+        logger.info('Rendering: %s.%s.pdf', problem.code, language)
+        with DefaultPdfMaker() as maker, translation.override(language):
+            problem_name = problem.name if trans is None else trans.name
+            maker.html = get_template('problem/raw.html').render({
+                'problem': problem,
+                'problem_name': problem_name,
+                'description': problem.description if trans is None else trans.description,
+                'url': url,
+                'math_engine': maker.math_engine,
+            }).replace('"//', '"https://').replace("'//", "'https://")
+            maker.title = problem_name
+
+            assets = ['style.css', 'pygment-github.css']
+            if maker.math_engine == 'jax':
+                assets.append('mathjax_config.js')
+            for file in assets:
+                maker.load(file, os.path.join(settings.DMOJ_RESOURCES, file))
+            maker.make()
+            if not maker.success:
+                logger.error('Failed to render PDF for %s', problem.code)
+                raise PdfRenderError(maker.log)
+            shutil.move(maker.pdffile, cache)
+    return cache
+
+
+def _render_problem_pdf_thread(*args):
+    try:
+        return render_problem_pdf(*args)
+    finally:
+        connections.close_all()
+
+
+def render_contest_pdf(contest, language, callback=None):
+    """Merges the PDFs of every problem in `contest`, in order, into one PDF in the PDF cache and returns its path.
+
+    Problems whose PDFs are not cached are rendered concurrently, at most SELENIUM_BROWSER_POOL_SIZE at a time.
+    `callback` is called from the calling thread whenever the PDF of a problem becomes available.
+    """
+    problems = [contest_problem.problem for contest_problem in
+                contest.contest_problems.order_by('order').select_related('problem')]
+    if not problems:
+        raise ValueError('Contest %s has no problems to render' % (contest.key,))
+
+    with ThreadPoolExecutor(max_workers=settings.SELENIUM_BROWSER_POOL_SIZE) as executor:
+        futures = [executor.submit(_render_problem_pdf_thread, problem, language,
+                                   get_problem_pdf_url(problem.code, language)) for problem in problems]
+        for future in as_completed(futures):
+            future.result()
+            if callback is not None:
+                callback()
+
+    cache = get_contest_pdf_path(contest.key, language)
+    with pdf_cache_lock(cache), BasePdfMaker() as maker:
+        try:
+            files = [get_problem_pdf_path(problem.code, language) for problem in problems]
+            subprocess.check_output([PDFUNITE] + files + [maker.pdffile], stderr=subprocess.STDOUT)
+        except subprocess.CalledProcessError as e:
+            logger.error('Failed to merge PDFs for contest %s', contest.key)
+            raise PdfRenderError(e.output.decode('utf-8', 'replace'))
+
+        if HAS_EXIFTOOL:
+            try:
+                subprocess.check_output([EXIFTOOL, '-Title=%s' % (contest.name,), maker.pdffile])
+            except subprocess.CalledProcessError as e:
+                logger.error('Failed to run exiftool to set title for: %s\n%s', contest.name, e.output)
+        shutil.move(maker.pdffile, cache)
+    return cache
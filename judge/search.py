@@ -0,0 +1,172 @@
+import threading
+from collections import defaultdict, namedtuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Value, When
+
+from judge.models import Contest, Problem, ProblemTranslation, Profile
+from judge.utils.search import PrefixIndex, SEARCH_INDEXES
+
+__all__ = ['get_search_index', 'search_ids', 'filter_search', 'invalidate_search_index', 'UsernameMatch',
+           'search_usernames', 'invalidate_username_index', 'username_index_add']
+
+PROBLEM_SEARCH_WEIGHTS = {'code': 8, 'name': 6, 'translations': 4, 'summary': 1}
+CONTEST_SEARCH_WEIGHTS = {'key': 8, 'name': 6}
+
+
+def problem_documents():
+    translations = defaultdict(list)
+    for problem_id, name in ProblemTranslation.objects.values_list('problem_id', 'name'):
+        translations[problem_id].append(name)
+
+    for id, code, name, summary in Problem.objects.values_list('id', 'code', 'name', 'summary').iterator():
+        yield id, {
+            'code': code, 'name': name, 'summary': summary,
+            'translations': ' '.join(translations[id]),
+        }
+
+
+def contest_documents():
+    for id, key, name in Contest.objects.values_list('id', 'key', 'name').iterator():
+        yield id, {'key': key, 'name': name}
+
+
+SEARCH_DOCUMENTS = {
+    'problem': (PROBLEM_SEARCH_WEIGHTS, problem_documents),
+    'contest': (CONTEST_SEARCH_WEIGHTS, contest_documents),
+}
+
+_search_indexes = {}
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def get_search_index(name):
+    # Like the navigation bar, each index is built once per process and rebuilt whenever the version in the
+    # shared cache changes, which happens when any of the indexed objects are saved or deleted.
+    version = get_version('search:%s:version' % name)
+
+    cached = _search_indexes.get(name)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    weights, documents = SEARCH_DOCUMENTS[name]
+    index = SEARCH_INDEXES[settings.DMOJ_SEARCH_BACKEND](weights)
+    for id, fields in documents():
+        index.add(id, fields)
+    _search_indexes[name] = version, index
+    return index
+
+
+def invalidate_search_index(name):
+    cache.delete('search:%s:version' % name)
+
+
+def search_ids(name, query):
+    return get_search_index(name).search(query)
+
+
+def filter_search(queryset, name, query, ranked=None):
+    """Restricts `queryset` to the objects matching `query` in the index `name`.
+
+    If `ranked` is given, the queryset is also ordered by relevance, considering at most that many of the best
+    matches.
+    """
+    ids = search_ids(name, query)
+    if ranked is None:
+        return queryset.filter(id__in=ids)
+
+    ids = ids[:ranked]
+    if not ids:
+        return queryset.none()
+    return queryset.filter(id__in=ids).order_by(Case(*[When(id=id, then=Value(rank)) for rank, id in enumerate(ids)],
+                                                     output_field=IntegerField()))
+
+
+UsernameMatch = namedtuple('UsernameMatch', 'pk username')
+
+# Profiles created around the same time may commit in a different order than their ids, so catching up loads the
+# profiles from this many ids below the highest one already loaded.
+USERNAME_CATCH_UP_MARGIN = 100
+
+_username_index = None
+_username_lock = threading.Lock()
+
+
+class UsernameIndex(object):
+    def __init__(self, version, added):
+        self.version = version
+        self.added = added
+        self.last_id = 0
+        self.ids = set()
+        self.index = PrefixIndex()
+        self.update()
+
+    def update(self):
+        profiles = [(username, id) for username, id in
+                    Profile.objects.filter(id__gt=self.last_id - USERNAME_CATCH_UP_MARGIN)
+                                   .values_list('user__username', 'id') if id not in self.ids]
+        if profiles:
+            self.index.update(profiles)
+            self.ids.update(id for username, id in profiles)
+            self.last_id = max(self.last_id, max(id for username, id in profiles))
+
+
+def get_username_index():
+    # Built once per process. Renames and deletions delete the version in the shared cache and cause a rebuild,
+    # while new profiles replace the addition token, which makes each process load the profiles created since.
+    global _username_index
+    version = get_version('search:username:version')
+    added = cache.get('search:username:added')
+    with _username_lock:
+        index = _username_index
+        if index is None or index.version != version:
+            index = _username_index = UsernameIndex(version, added)
+        elif index.added != added:
+            index.added = added
+            index.update()
+    return index.index
+
+
+class UsernameMatches(object):
+    def __init__(self, matches):
+        self.matches = matches
+
+    def __len__(self):
+        return len(self.matches)
+
+    def __iter__(self):
+        return (UsernameMatch(id, username) for username, id in self.matches)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [UsernameMatch(id, username) for username, id in self.matches[item]]
+        username, id = self.matches[item]
+        return UsernameMatch(id, username)
+
+    def ids(self):
+        return [id for username, id in self.matches]
+
+
+def search_usernames(term):
+    """Returns a sequence of UsernameMatch for the profiles whose username starts with `term`, ordered by username.
+
+    Only the matches that are actually accessed are copied, so it can be paginated cheaply even for short terms.
+    """
+    return UsernameMatches(get_username_index().prefix(term))
+
+
+def invalidate_username_index():
+    cache.delete('search:username:version')
+
+
+def username_index_add():
+    cache.set('search:username:added', uuid4().hex, None)
@@ -2,15 +2,21 @@ import errno
 import os
 
 from django.conf import settings
+from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
 from django.core.cache import cache
 from django.core.cache.utils import make_template_fragment_key
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 from .caching import finished_submission
-from .models import BlogPost, Contest, ContestSubmission, EFFECTIVE_MATH_ENGINES, Judge, Language, \
-    MiscConfig, Problem, Profile, Submission
+from .models import BlogPost, Contest, ContestSubmission, ContestSubmissionCount, DailySubmissionCount, \
+    EFFECTIVE_MATH_ENGINES, Judge, Language, MiscConfig, NavigationBar, Problem, ProblemTranslation, Profile, Submission
+from .pdf_problems import HAS_PDF, get_contest_pdf_path
+from .search import invalidate_search_index, invalidate_username_index, username_index_add
+from .tasks import render_problem_pdfs
 
 
 def get_pdf_path(basename):
@@ -40,9 +46,43 @@ def problem_update(sender, instance, **kwargs):
     cache.delete_many([make_template_fragment_key('problem_authors', (instance.id, lang))
                        for lang, _ in settings.LANGUAGES])
     cache.delete_many(['generated-meta-problem:%s:%d' % (lang, instance.id) for lang, _ in settings.LANGUAGES])
+    invalidate_search_index('problem')
 
     for lang, _ in settings.LANGUAGES:
         unlink_if_exists(get_pdf_path('%s.%s.pdf' % (instance.code, lang)))
+    if HAS_PDF:
+        for key in Contest.objects.filter(contest_problems__problem=instance).values_list('key', flat=True):
+            unlink_contest_pdfs(key)
+
+    if HAS_PDF and settings.DMOJ_PDF_PROBLEM_PRERENDER and instance.is_public:
+        transaction.on_commit(lambda: render_problem_pdfs.delay(instance.id))
+
+
+@receiver(post_delete, sender=Problem)
+@receiver(post_save, sender=ProblemTranslation)
+@receiver(post_delete, sender=ProblemTranslation)
+def problem_search_update(sender, instance, **kwargs):
+    invalidate_search_index('problem')
+
+
+@receiver(m2m_changed, sender=Problem.authors.through)
+@receiver(m2m_changed, sender=Problem.curators.through)
+@receiver(m2m_changed, sender=Problem.testers.through)
+def problem_roles_update(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        profile_ids = [instance.id]
+    elif action == 'pre_clear':
+        profile_ids = sender.objects.filter(problem=instance).values_list('profile_id', flat=True)
+    else:
+        profile_ids = pk_set
+    cache.delete_many(['problem_roles:%d' % id for id in profile_ids])
+
+
+def unlink_contest_pdfs(key):
+    for lang, _ in settings.LANGUAGES:
+        unlink_if_exists(get_contest_pdf_path(key, lang))
 
 
 @receiver(post_save, sender=Contest)
@@ -52,7 +92,16 @@ def contest_update(sender, instance, **kwargs):
 
     cache.delete_many(['generated-meta-contest:%d' % instance.id] +
                       [make_template_fragment_key('contest_html', (instance.id, engine))
-                       for engine in EFFECTIVE_MATH_ENGINES])
+                       for engine in EFFECTIVE_MATH_ENGINES] +
+                      ['contest_stats_version:%d' % instance.id])
+    invalidate_search_index('contest')
+    if HAS_PDF:
+        unlink_contest_pdfs(instance.key)
+
+
+@receiver(post_delete, sender=Contest)
+def contest_delete(sender, instance, **kwargs):
+    invalidate_search_index('contest')
 
 
 @receiver(post_save, sender=Language)
@@ -66,6 +115,12 @@ def judge_update(sender, instance, **kwargs):
     cache.delete(make_template_fragment_key('judge_html', (instance.id,)))
 
 
+@receiver(post_save, sender=NavigationBar)
+@receiver(post_delete, sender=NavigationBar)
+def navigation_bar_update(sender, instance, **kwargs):
+    cache.delete('navbar:version')
+
+
 @receiver(post_save, sender=BlogPost)
 def post_update(sender, instance, **kwargs):
     cache.delete_many([
@@ -80,10 +135,36 @@ def post_update(sender, instance, **kwargs):
 @receiver(post_delete, sender=Submission)
 def submission_delete(sender, instance, **kwargs):
     finished_submission(instance)
+    if instance.result is not None:
+        if instance.contest_object_id is not None:
+            ContestSubmissionCount.bump(instance.contest_object_id, instance.problem_id, instance.language_id,
+                                        instance.result, -1)
+        DailySubmissionCount.bump(timezone.localdate(instance.date), instance.language_id, instance.result, -1)
+    instance.user._updating_stats_only = True
+    instance.user.calculate_points()
     instance.problem._updating_stats_only = True
     instance.problem.update_stats()
 
 
+@receiver(post_save, sender=Profile)
+def profile_update(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(username_index_add)
+
+
+@receiver(post_delete, sender=Profile)
+def profile_delete(sender, instance, **kwargs):
+    invalidate_username_index()
+
+
+@receiver(pre_save, sender=User)
+def user_pre_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    if instance.id is not None and not User.objects.filter(id=instance.id, username=instance.username).exists():
+        transaction.on_commit(invalidate_username_index)
+
+
 @receiver(post_delete, sender=ContestSubmission)
 def contest_submission_delete(sender, instance, **kwargs):
     participation = instance.participation
@@ -1,3 +1,5 @@
 from judge.tasks.contest import *
 from judge.tasks.demo import *
+from judge.tasks.problem import *
+from judge.tasks.stats import *
 from judge.tasks.submission import *
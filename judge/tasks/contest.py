@@ -1,13 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from celery import shared_task
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.models import OuterRef, Subquery
 from django.utils.translation import gettext as _
-from moss import MOSS
 
 from judge.models import Contest, ContestMoss, ContestParticipation, Submission
+from judge.pdf_problems import HAS_PDF, HAS_PDFUNITE, get_contest_pdf_task_key, render_contest_pdf
 from judge.utils.celery import Progress
+from judge.utils.imports import lazy_import
+from judge.utils.similarity import SimilarityIndex
+
+moss = lazy_import('moss')
 
-__all__ = ('rescore_contest', 'run_moss')
+__all__ = ('render_contest_problem_pdf', 'rescore_contest', 'run_moss')
 
 
 @shared_task(bind=True)
@@ -25,6 +34,52 @@ def rescore_contest(self, contest_key):
     return rescored
 
 
+def get_moss_sources(contest, problem, language):
+    """Yields (username, source, pygments lexer) of the best submission by each participant, preferring the latest
+    among ties."""
+    submissions = Submission.objects.filter(
+        contest__participation__virtual__in=(ContestParticipation.LIVE, ContestParticipation.SPECTATE),
+        contest_object=contest,
+        problem=problem,
+        language__common_name=language,
+    )
+    best = submissions.filter(user_id=OuterRef('user_id')).order_by('-points', '-id').values('id')[:1]
+    return (submissions.filter(id=Subquery(best))
+            .values_list('user__user__username', 'source__source', 'language__pygments').iterator())
+
+
+def prescreen_moss_sources(sources, threshold):
+    """Keeps only the sources that the local similarity index pairs with another source."""
+    sources = list(sources)
+    index = SimilarityIndex()
+    for username, source, language in sources:
+        index.add(username, source, language)
+    flagged = {username for pair in index.pairs(threshold) for username in pair[:2]}
+    return [source for source in sources if source[0] in flagged]
+
+
+def run_moss_job(moss_api_key, contest, problem, dmoj_lang, moss_lang):
+    try:
+        result = ContestMoss(contest=contest, problem=problem, language=dmoj_lang)
+        sources = get_moss_sources(contest, problem, dmoj_lang)
+        if settings.MOSS_PRESCREEN_THRESHOLD is not None:
+            sources = prescreen_moss_sources(sources, settings.MOSS_PRESCREEN_THRESHOLD)
+
+        moss_call = None
+        for username, source, language in sources:
+            if moss_call is None:
+                moss_call = moss.MOSS(moss_api_key, language=moss_lang, matching_file_limit=100,
+                                      comment='%s - %s' % (contest.key, problem.code))
+            moss_call.add_file_from_memory(username, source.encode('utf-8'))
+            result.submission_count += 1
+
+        if moss_call is not None:
+            result.url = moss_call.process()
+        return result
+    finally:
+        connections.close_all()
+
+
 @shared_task(bind=True)
 def run_moss(self, contest_key):
     moss_api_key = settings.MOSS_API_KEY
@@ -34,39 +89,29 @@ def run_moss(self, contest_key):
     contest = Contest.objects.get(key=contest_key)
     ContestMoss.objects.filter(contest=contest).delete()
 
-    length = len(ContestMoss.LANG_MAPPING) * contest.problems.count()
-    moss_results = []
+    problems = list(contest.problems.all())
+    length = len(ContestMoss.LANG_MAPPING) * len(problems)
 
-    with Progress(self, length, stage=_('Running MOSS')) as p:
-        for problem in contest.problems.all():
-            for dmoj_lang, moss_lang in ContestMoss.LANG_MAPPING:
-                result = ContestMoss(contest=contest, problem=problem, language=dmoj_lang)
+    with Progress(self, length, stage=_('Running MOSS')) as p, \
+            ThreadPoolExecutor(max_workers=settings.MOSS_CONCURRENCY) as executor:
+        futures = [executor.submit(run_moss_job, moss_api_key, contest, problem, dmoj_lang, moss_lang)
+                   for problem in problems for dmoj_lang, moss_lang in ContestMoss.LANG_MAPPING]
+        for future in as_completed(futures):
+            future.result().save()
+            p.did(1)
 
-                subs = Submission.objects.filter(
-                    contest__participation__virtual__in=(ContestParticipation.LIVE, ContestParticipation.SPECTATE),
-                    contest_object=contest,
-                    problem=problem,
-                    language__common_name=dmoj_lang,
-                ).order_by('-points').values_list('user__user__username', 'source__source')
+    return length
 
-                if subs.exists():
-                    moss_call = MOSS(moss_api_key, language=moss_lang, matching_file_limit=100,
-                                     comment='%s - %s' % (contest.key, problem.code))
 
-                    users = set()
-
-                    for username, source in subs:
-                        if username in users:
-                            continue
-                        users.add(username)
-                        moss_call.add_file_from_memory(username, source.encode('utf-8'))
-
-                    result.url = moss_call.process()
-                    result.submission_count = len(users)
-
-                moss_results.append(result)
-                p.did(1)
+@shared_task(bind=True)
+def render_contest_problem_pdf(self, contest_key, language):
+    if not HAS_PDF or not HAS_PDFUNITE:
+        raise ImproperlyConfigured('Rendering contest PDFs requires Selenium and pdfunite')
 
-    ContestMoss.objects.bulk_create(moss_results)
+    try:
+        contest = Contest.objects.get(key=contest_key)
 
-    return len(moss_results)
+        with Progress(self, contest.contest_problems.count(), stage=_('Rendering problem PDFs')) as p:
+            render_contest_pdf(contest, language, callback=lambda: p.did(1))
+    finally:
+        cache.delete(get_contest_pdf_task_key(contest_key, language))
@@ -0,0 +1,39 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from judge.models import Problem
+from judge.pdf_problems import HAS_PDF, PdfRenderError, get_problem_pdf_url, render_problem_pdf
+
+__all__ = ('render_problem_pdfs',)
+logger = logging.getLogger('judge.problem.pdf')
+
+
+@shared_task
+def render_problem_pdfs(problem_id):
+    if not HAS_PDF:
+        return 0
+
+    try:
+        problem = Problem.objects.get(id=problem_id)
+    except Problem.DoesNotExist:
+        return 0
+
+    # Every other language falls back to the untranslated statement, so only translated languages are rendered.
+    site_languages = {code for code, _ in settings.LANGUAGES}
+    languages = [settings.LANGUAGE_CODE]
+    for language in problem.translations.values_list('language', flat=True):
+        if language in site_languages and language != settings.LANGUAGE_CODE:
+            languages.append(language)
+
+    rendered = 0
+    for language in languages:
+        try:
+            # Forced, since a render started before the problem was saved may have put an outdated PDF in the cache.
+            render_problem_pdf(problem, language, get_problem_pdf_url(problem.code, language), force=True)
+        except PdfRenderError:
+            logger.warning('Failed to pre-render %s.%s.pdf', problem.code, language)
+        else:
+            rendered += 1
+    return rendered
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from judge.models import DailySubmissionCount, Submission
+
+__all__ = ('rollup_submission_counts',)
+
+
+@shared_task
+def rollup_submission_counts(days=None):
+    """Recounts the submissions of the last `days` days, or of every day if `days` is None.
+
+    Counts are moved between results as submissions are graded, rejudged and deleted, so this is only a backstop for
+    updates that were missed, such as submissions reset to internal errors when the bridge restarts.
+    """
+    end = timezone.localdate() + timedelta(days=1)
+    if days is not None:
+        start = end - timedelta(days=days)
+    else:
+        first = Submission.objects.order_by('date').values_list('date', flat=True).first()
+        if first is None:
+            return
+        start = timezone.localdate(first)
+
+    # Done a month at a time to keep each aggregation and transaction small.
+    while start < end:
+        DailySubmissionCount.recompute(start, min(start + timedelta(days=30), end))
+        start += timedelta(days=30)
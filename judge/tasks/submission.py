@@ -2,10 +2,11 @@ from celery import shared_task
 from django.core.cache import cache
 from django.utils.translation import gettext as _
 
-from judge.models import Problem, Profile, Submission
+from judge.highlight_code import cached_highlight_code
+from judge.models import Problem, Profile, Submission, SubmissionSource
 from judge.utils.celery import Progress
 
-__all__ = ('apply_submission_filter', 'rejudge_problem_filter', 'rescore_problem')
+__all__ = ('apply_submission_filter', 'highlight_submission_source', 'rejudge_problem_filter', 'rescore_problem')
 
 
 def apply_submission_filter(queryset, id_range, languages, results):
@@ -57,9 +58,21 @@ def rescore_problem(self, problem_id):
         users = 0
         profiles = Profile.objects.filter(id__in=submissions.values_list('user_id', flat=True).distinct())
         for profile in profiles.iterator():
+            profile._updating_stats_only = True
+            profile.calculate_points()
             cache.delete('user_complete:%d' % profile.id)
             cache.delete('user_attempted:%d' % profile.id)
             users += 1
             if users % 10 == 0:
                 p.done = users
     return rescored
+
+
+@shared_task
+def highlight_submission_source(submission_id):
+    try:
+        source, language = (SubmissionSource.objects.filter(submission_id=submission_id)
+                            .values_list('source', 'submission__language__pygments').get())
+    except SubmissionSource.DoesNotExist:
+        return
+    cached_highlight_code(source, language)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from judge.models import Contest, ContestMoss, ContestParticipation, ContestProblem, ContestSubmission, Language, \
+    Problem, Profile, Submission, SubmissionSource
+from judge.tasks.contest import get_moss_sources, run_moss
+
+
+class FakeMOSS(object):
+    calls = []
+
+    def __init__(self, api_key, language, matching_file_limit, comment):
+        self.language = language
+        self.comment = comment
+        self.files = {}
+        self.calls.append(self)
+
+    def add_file_from_memory(self, name, data):
+        self.files[name] = data
+
+    def process(self):
+        return 'http://moss.example.com/%s/%s' % (self.comment.replace(' ', ''), self.language)
+
+
+# MOSS is run from a thread pool, whose connections only see committed rows.
+@override_settings(MOSS_API_KEY='key', MOSS_PRESCREEN_THRESHOLD=None)
+@mock.patch('judge.tasks.contest.moss', SimpleNamespace(MOSS=FakeMOSS))
+@mock.patch('judge.tasks.contest.Progress', mock.MagicMock())
+class RunMossTestCase(TransactionTestCase):
+    def setUp(self):
+        FakeMOSS.calls = []
+        self.cpp = Language.objects.create(key='CPP17', name='C++17', common_name='C++', pygments='cpp')
+        self.python = Language.objects.create(key='PY3', name='Python 3', common_name='Python', pygments='python3')
+        now = timezone.now()
+        self.contest = Contest.objects.create(key='moss', name='MOSS', start_time=now - timedelta(hours=2),
+                                              end_time=now - timedelta(hours=1))
+        self.problems = []
+        for code in ('a', 'b'):
+            problem = Problem.objects.create(code=code, name=code, description='', time_limit=1, memory_limit=65536,
+                                             points=10)
+            ContestProblem.objects.create(contest=self.contest, problem=problem, points=10, order=len(self.problems))
+            self.problems.append(problem)
+
+        self.participations = {}
+        for username, virtual in (('alice', ContestParticipation.LIVE), ('bob', ContestParticipation.LIVE),
+                                  ('carol', 1)):
+            profile = Profile.objects.create(user=User.objects.create(username=username), language=self.cpp)
+            self.participations[username] = ContestParticipation.objects.create(
+                contest=self.contest, user=profile, real_start=self.contest.start_time, virtual=virtual)
+
+    def submit(self, username, language, points, source, problem=0):
+        participation = self.participations[username]
+        submission = Submission.objects.create(user=participation.user, problem=self.problems[problem],
+                                               language=language, points=points, status='D', result='AC')
+        SubmissionSource.objects.create(submission=submission, source=source)
+        ContestSubmission.objects.create(submission=submission, participation=participation, points=points,
+                                         problem=self.contest.contest_problems.get(problem=self.problems[problem]))
+
+    def test_moss(self):
+        self.submit('alice', self.cpp, 10, 'alice tied')
+        self.submit('alice', self.cpp, 10, 'alice latest')
+        self.submit('alice', self.cpp, 5, 'alice worse')
+        self.submit('bob', self.cpp, 3, 'bob worse')
+        self.submit('bob', self.cpp, 7, 'bob best')
+        self.submit('bob', self.python, 2, 'bob python')
+        self.submit('carol', self.cpp, 10, 'carol virtual')
+
+        self.assertEqual(sorted(get_moss_sources(self.contest, self.problems[0], 'C++')),
+                         [('alice', 'alice latest', 'cpp'), ('bob', 'bob best', 'cpp')])
+
+        run_moss.run(self.contest.key)
+        run_moss.run(self.contest.key)
+
+        results = {(result.problem.code, result.language): result for result in self.contest.moss.all()}
+        self.assertEqual(set(results), {(problem.code, language) for problem in self.problems
+                                        for language, _ in ContestMoss.LANG_MAPPING})
+        self.assertEqual(results['a', 'C++'].submission_count, 2)
+        self.assertEqual(results['a', 'C++'].url, 'http://moss.example.com/moss-a/cc')
+        self.assertEqual(results['a', 'Python'].submission_count, 1)
+        self.assertEqual(results['b', 'C++'].submission_count, 0)
+        self.assertIsNone(results['b', 'C++'].url)
+
+        # No MOSS submission is made for a problem and language without sources.
+        self.assertEqual(len(FakeMOSS.calls), 4)
+        cpp_call = next(call for call in FakeMOSS.calls if call.language == 'cc')
+        self.assertEqual(cpp_call.files, {'alice': b'alice latest', 'bob': b'bob best'})
@@ -1,10 +1,13 @@
-from functools import partial
+import re
+from functools import lru_cache, partial
+from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.auth.context_processors import PermWrapper
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.cache import cache
 from django.utils.functional import SimpleLazyObject, new_method_proxy
+from mptt.utils import get_cached_trees
 
 from judge.utils.caniuse import CanIUse, SUPPORT
 from .models import MiscConfig, NavigationBar, Profile
@@ -51,16 +54,56 @@ def comet_location(request):
             'EVENT_DAEMON_POLL_LOCATION': poll}
 
 
+class NavigationTree(object):
+    def __init__(self, version):
+        self.version = version
+        nodes = list(NavigationBar.objects.all())
+        self.roots = get_cached_trees(nodes)
+        self.patterns = [(re.compile(node.regex), node) for node in nodes]
+        self.nodes = {node.id: node for node in nodes}
+        self.tab = lru_cache(maxsize=1024)(self._tab)
+
+    def _tab(self, path):
+        for pattern, node in self.patterns:
+            if pattern.search(path):
+                keys = []
+                while node is not None:
+                    keys.append(node.key)
+                    node = self.nodes.get(node.parent_id)
+                return tuple(reversed(keys))
+        return ()
+
+
+_navigation_tree = None
+
+
+def get_navigation_tree():
+    # The tree is built once per process and rebuilt whenever the version in the shared cache changes,
+    # which happens when any NavigationBar is saved or deleted.
+    global _navigation_tree
+    version = cache.get('navbar:version')
+    if version is None:
+        cache.add('navbar:version', uuid4().hex, None)
+        version = cache.get('navbar:version')
+    tree = _navigation_tree
+    if tree is None or tree.version != version:
+        tree = _navigation_tree = NavigationTree(version)
+    return tree
+
+
 def __nav_tab(path):
-    result = list(NavigationBar.objects.extra(where=['%s REGEXP BINARY regex'], params=[path])[:1])
-    return result[0].get_ancestors(include_self=True).values_list('key', flat=True) if result else []
+    return get_navigation_tree().tab(path)
+
+
+def __nav_bar():
+    return get_navigation_tree().roots
 
 
 def general_info(request):
     path = request.get_full_path()
     return {
         'nav_tab': FixedSimpleLazyObject(partial(__nav_tab, request.path)),
-        'nav_bar': NavigationBar.objects.all(),
+        'nav_bar': FixedSimpleLazyObject(__nav_bar),
         'LOGIN_RETURN_PATH': '' if path.startswith('/accounts/') else path,
         'perms': PermWrapper(request.user),
         'HAS_WEBAUTHN': bool(settings.WEBAUTHN_RP_ID),
@@ -1,6 +1,78 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
 from django.utils.timezone import now
 
 from judge.models import Profile
+from judge.utils.periodic import PeriodicTask
+
+logger = logging.getLogger('judge.user_log')
+
+
+class AccessLogBuffer(object):
+    """Collects last access updates in memory and writes them to judge_profile in bulk.
+
+    An access is only recorded if the user has not been seen within `window` seconds from the same IP. Recorded
+    accesses are written every `flush_interval` seconds by a background thread, never by the request recording them,
+    and are kept for the next flush if writing them fails.
+    """
+
+    def __init__(self, window, flush_interval, batch_size=1000):
+        self.window = window
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        # profile id: (last_access, ip)
+        self.pending = {}
+        # profile id: (monotonic time recorded, ip)
+        self.recorded = {}
+        self.flusher = PeriodicTask(flush_interval, self.flush)
+
+    def record(self, profile_id, ip):
+        self.flusher.start()
+        current = time.monotonic()
+        with self.lock:
+            last = self.recorded.get(profile_id)
+            if last is not None and current - last[0] < self.window and last[1] == ip:
+                return
+            self.recorded[profile_id] = (current, ip)
+            self.pending[profile_id] = (now(), ip)
+
+    def flush(self):
+        with self.lock:
+            pending = self._take_pending(time.monotonic())
+        if not pending:
+            return
+        try:
+            self.write(pending)
+        except Exception:
+            logger.exception('Failed to save the last access of %d users', len(pending))
+            with self.lock:
+                # Accesses recorded since are newer than the ones that failed to save.
+                for id, value in pending.items():
+                    self.pending.setdefault(id, value)
+
+    def _take_pending(self, current):
+        pending, self.pending = self.pending, {}
+        self.recorded = {id: value for id, value in self.recorded.items() if current - value[0] < self.window}
+        return pending
+
+    def write(self, pending):
+        # Only the listed fields are saved. Passing the language skips the query for its default in every instance.
+        with_ip = [Profile(id=id, last_access=last_access, ip=ip, language_id=None)
+                   for id, (last_access, ip) in pending.items() if ip]
+        without_ip = [Profile(id=id, last_access=last_access, language_id=None)
+                      for id, (last_access, ip) in pending.items() if not ip]
+        if with_ip:
+            Profile.objects.bulk_update(with_ip, ['last_access', 'ip'], batch_size=self.batch_size)
+        if without_ip:
+            Profile.objects.bulk_update(without_ip, ['last_access'], batch_size=self.batch_size)
+
+
+access_log = AccessLogBuffer(settings.DMOJ_USER_ACCESS_LOG_WINDOW, settings.DMOJ_USER_ACCESS_LOG_FLUSH_INTERVAL)
+atexit.register(access_log.flush)
 
 
 class LogUserAccessMiddleware(object):
@@ -12,10 +84,7 @@ class LogUserAccessMiddleware(object):
 
         if (hasattr(request, 'user') and request.user.is_authenticated and
                 not getattr(request, 'no_profile_update', False)):
-            updates = {'last_access': now()}
             # Decided on using REMOTE_ADDR as nginx will translate it to the external IP that hits it.
-            if request.META.get('REMOTE_ADDR'):
-                updates['ip'] = request.META.get('REMOTE_ADDR')
-            Profile.objects.filter(user_id=request.user.pk).update(**updates)
+            access_log.record(request.profile.id, request.META.get('REMOTE_ADDR'))
 
         return response
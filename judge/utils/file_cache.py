@@ -1,6 +1,15 @@
 import errno
+import fcntl
+import hashlib
+import mmap
 import os
-from gzip import open as gzip_open
+import re
+import struct
+import threading
+from contextlib import contextmanager
+from gzip import compress as gzip_compress, open as gzip_open
+from io import BytesIO
+from operator import itemgetter
 from urllib.parse import urljoin
 
 
@@ -43,3 +52,338 @@ class HashFileCache(object):
 
         if url:
             return self.get_url(hash, file)
+
+
+class SegmentFileCache(object):
+    """A drop-in replacement for HashFileCache that packs every file into a few large segment files.
+
+    Files are appended to the newest segment and located through fixed size records. New records are appended to a
+    journal, which is merged into an index sorted by key once it grows past `journal_limit` records. The index is
+    memory mapped and binary searched, so only the journal is held in memory by each process. Segments are memory
+    mapped too, so reads do not copy data. Since nothing is ever overwritten, `compact` rewrites the live entries
+    into fresh segments to reclaim space.
+
+    Other processes pick up new entries on their next lookup miss. As entries are addressed by the hash of their
+    content, rewriting an existing entry is not guaranteed to be visible to processes that have already read it.
+    """
+    record = struct.Struct('<20sIQI')
+    segment_size = 256 * 1024 * 1024
+    segment_re = re.compile(r'^(\d+)\.seg$')
+    journal_limit = 4096
+
+    def __init__(self, root, url, gzip=False):
+        self.root = root
+        self.url = url
+        self.gzip = gzip
+        self.lock = threading.RLock()
+        self.segments = {}
+        self.index = None
+        self.index_count = 0
+        self.index_version = None
+        # key: (segment number, offset, length)
+        self.journal = {}
+        self.journal_inode = None
+        self.journal_size = 0
+
+    @staticmethod
+    def get_key(hash, file):
+        return hashlib.sha1(('%s/%s' % (hash, file)).encode('utf-8')).digest()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.root, 'index')
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.root, 'journal')
+
+    def get_segment_path(self, number):
+        return os.path.join(self.root, '%08d.seg' % number)
+
+    def get_segment_numbers(self):
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        return sorted(int(match.group(1)) for match in map(self.segment_re.match, names) if match)
+
+    def _reset(self):
+        # Segments are not closed explicitly, as memoryviews handed out by read_view may still refer to them.
+        self.segments = {}
+        if self.index is not None:
+            self.index.close()
+        self.index = None
+        self.index_count = 0
+        self.index_version = None
+        self.journal = {}
+        self.journal_inode = None
+        self.journal_size = 0
+
+    @staticmethod
+    def _open(path):
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self):
+        # Merges and compactions replace the index before the journal, so opening the journal first guarantees that
+        # a new journal is never paired with an old index.
+        journal = self._open(self.journal_path)
+        index = self._open(self.index_path)
+        try:
+            journal_stat = journal and os.fstat(journal.fileno())
+            index_stat = index and os.fstat(index.fileno())
+            journal_inode = journal_stat and journal_stat.st_ino
+            # The index is never modified in place, so its modification time tells it apart from an earlier index
+            # whose inode number was reused.
+            index_version = index_stat and (index_stat.st_ino, index_stat.st_mtime_ns)
+            if journal_inode != self.journal_inode or index_version != self.index_version:
+                self._reset()
+                self.journal_inode = journal_inode
+                self.index_version = index_version
+                if index is not None:
+                    self.index_count = index_stat.st_size // self.record.size
+                    if self.index_count:
+                        self.index = mmap.mmap(index.fileno(), self.index_count * self.record.size,
+                                               access=mmap.ACCESS_READ)
+
+            if journal is None:
+                return
+            # Ignore a partially written trailing record, the writer will truncate it.
+            end = journal_stat.st_size - journal_stat.st_size % self.record.size
+            if end > self.journal_size:
+                journal.seek(self.journal_size)
+                for key, number, position, length in self.record.iter_unpack(journal.read(end - self.journal_size)):
+                    self.journal[key] = (number, position, length)
+                self.journal_size = end
+        finally:
+            for f in (journal, index):
+                if f is not None:
+                    f.close()
+
+    def _search(self, key):
+        index = self.index
+        if index is None:
+            return None
+        size = self.record.size
+        low, high = 0, self.index_count
+        while low < high:
+            middle = (low + high) // 2
+            if index[middle * size:middle * size + 20] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.index_count:
+            found, number, position, length = self.record.unpack_from(index, low * size)
+            if found == key:
+                return number, position, length
+        return None
+
+    def _find(self, key):
+        entry = self.journal.get(key)
+        return self._search(key) if entry is None else entry
+
+    def _lookup(self, hash, file):
+        key = self.get_key(hash, file)
+        with self.lock:
+            entry = self._find(key)
+            if entry is None:
+                self._refresh()
+                entry = self._find(key)
+        return entry
+
+    def _iter_index(self):
+        size = self.record.size
+        for offset in range(0, self.index_count * size, size):
+            yield self.index[offset:offset + size]
+
+    def _write_index(self, records):
+        """Replaces the index with `records`, which must be sorted by key, and starts a new journal."""
+        with open(self.index_path + '.new', 'wb') as index:
+            index.writelines(records)
+        os.replace(self.index_path + '.new', self.index_path)
+        open(self.journal_path + '.new', 'wb').close()
+        os.replace(self.journal_path + '.new', self.journal_path)
+
+    def _get_segment(self, number, end):
+        segment = self.segments.get(number)
+        if segment is None or len(segment) < end:
+            with open(self.get_segment_path(number), 'rb') as f:
+                segment = self.segments[number] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return segment
+
+    def _read_entry(self, entry):
+        number, position, length = entry
+        if not length:
+            return memoryview(b'')
+        return memoryview(self._get_segment(number, position + length))[position:position + length]
+
+    def create(self, hash):
+        pass
+
+    def has_file(self, hash, file):
+        return self._lookup(hash, file) is not None
+
+    def get_url(self, hash, file):
+        return urljoin(self.url, '%s/%s' % (hash, file))
+
+    def read_view(self, hash, file):
+        for retry in (False, True):
+            entry = self._lookup(hash, file)
+            if entry is None:
+                raise FileNotFoundError(errno.ENOENT, 'No such cached file', '%s/%s' % (hash, file))
+
+            with self.lock:
+                try:
+                    return self._read_entry(entry)
+                except FileNotFoundError:
+                    if retry:
+                        raise
+                    # The segment was removed by a compaction in another process, so reload the index.
+                    self._reset()
+
+    def read_file(self, hash, file):
+        return BytesIO(self.read_view(hash, file))
+
+    def read_data(self, hash, file):
+        return bytes(self.read_view(hash, file))
+
+    def cache_data(self, hash, file, data, url=True, gzip=True):
+        items = [(self.get_key(hash, file), data)]
+        if gzip and self.gzip:
+            items.append((self.get_key(hash, file + '.gz'), gzip_compress(data)))
+        self.store(items)
+
+        if url:
+            return self.get_url(hash, file)
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self.lock, open(os.path.join(self.root, 'lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def store(self, items):
+        with self._write_lock():
+            numbers = self.get_segment_numbers()
+            number = numbers[-1] if numbers else 0
+            if numbers and os.path.getsize(self.get_segment_path(number)) >= self.segment_size:
+                number += 1
+
+            records = []
+            with open(self.get_segment_path(number), 'ab') as segment:
+                for key, data in items:
+                    records.append(self.record.pack(key, number, segment.tell(), len(data)))
+                    segment.write(data)
+
+            # The data is written out before the journal, so readers never see records pointing to missing data.
+            with open(self.journal_path, 'ab') as journal:
+                size = journal.tell()
+                if size % self.record.size:
+                    journal.truncate(size - size % self.record.size)
+                journal.write(b''.join(records))
+            self._refresh()
+
+            if len(self.journal) >= self.journal_limit:
+                self._merge()
+
+    def _merge(self):
+        # Both the index and the journal are sorted by key, so they are merged in one pass, preferring the journal.
+        journal = sorted((key, self.record.pack(key, *entry)) for key, entry in self.journal.items())
+        records = []
+        i = 0
+        for record in self._iter_index():
+            key = record[:20]
+            while i < len(journal) and journal[i][0] < key:
+                records.append(journal[i][1])
+                i += 1
+            if i < len(journal) and journal[i][0] == key:
+                continue
+            records.append(record)
+        records.extend(record for key, record in journal[i:])
+        self._write_index(records)
+        self._refresh()
+
+    def compact(self):
+        """Rewrites all live entries into new segments and removes the old ones.
+
+        Returns the total size of the segments before and after compaction.
+        """
+        with self._write_lock():
+            self._reset()
+            self._refresh()
+
+            entries = {record[:20]: self.record.unpack(record)[1:] for record in self._iter_index()}
+            entries.update(self.journal)
+
+            old_numbers = self.get_segment_numbers()
+            old_size = sum(os.path.getsize(self.get_segment_path(number)) for number in old_numbers)
+            number = old_numbers[-1] + 1 if old_numbers else 0
+            new_numbers = []
+
+            records = []
+            segment = None
+            try:
+                # Sorting by location makes reading the old segments sequential.
+                for key, entry in sorted(entries.items(), key=itemgetter(1)):
+                    if segment is None or segment.tell() >= self.segment_size:
+                        if segment is not None:
+                            segment.close()
+                            number += 1
+                        segment = open(self.get_segment_path(number), 'wb')
+                        new_numbers.append(number)
+                    records.append(self.record.pack(key, number, segment.tell(), entry[2]))
+                    segment.write(self._read_entry(entry))
+            finally:
+                if segment is not None:
+                    segment.close()
+
+            records.sort()
+            self._write_index(records)
+
+            for old in old_numbers:
+                os.unlink(self.get_segment_path(old))
+            self._reset()
+
+        return old_size, sum(os.path.getsize(self.get_segment_path(new)) for new in new_numbers)
+
+    def import_directory(self, root, batch_size=1000):
+        """Copies every file stored by a HashFileCache at `root` into this cache, returning the number of files."""
+        count = 0
+        items = []
+        for hash in os.listdir(root):
+            directory = os.path.join(root, hash)
+            if not os.path.isdir(directory):
+                continue
+            for file in os.listdir(directory):
+                with open(os.path.join(directory, file), 'rb') as f:
+                    items.append((self.get_key(hash, file), f.read()))
+                if len(items) >= batch_size:
+                    self.store(items)
+                    count += len(items)
+                    items = []
+        if items:
+            self.store(items)
+            count += len(items)
+        return count
+
+
+FILE_CACHE_FORMATS = {
+    'directory': HashFileCache,
+    'segment': SegmentFileCache,
+}
+
+_file_caches = {}
+
+
+def get_file_cache(format, root, url, gzip=False):
+    # Segment caches keep their index in memory, so they are shared within a process.
+    key = (format, root, url, gzip)
+    if key not in _file_caches:
+        _file_caches[key] = FILE_CACHE_FORMATS[format](root, url, gzip)
+    return _file_caches[key]
@@ -0,0 +1,14 @@
+from importlib import import_module
+
+from django.utils.functional import SimpleLazyObject
+
+__all__ = ['lazy_import']
+
+
+def lazy_import(name):
+    """Returns a stand-in for the module `name` that only imports it when one of its attributes is first used.
+
+    This keeps heavy or optional dependencies that are needed by few code paths from slowing down the start of every
+    process, e.g. `lupa = lazy_import('lupa')` followed by `lupa.LuaRuntime()` where it is needed.
+    """
+    return SimpleLazyObject(lambda: import_module(name))
@@ -1,6 +1,8 @@
 import hashlib
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
 
 import requests
 from django.conf import settings
@@ -8,8 +10,9 @@ from django.core.cache import caches
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from mistune import escape
+from requests.adapters import HTTPAdapter
 
-from judge.utils.file_cache import HashFileCache
+from judge.utils.file_cache import get_file_cache
 from judge.utils.unicode import utf8bytes, utf8text
 
 logger = logging.getLogger('judge.mathoid')
@@ -40,6 +43,66 @@ def format_math(math):
     return math
 
 
+_session = None
+
+
+def get_session():
+    # A single session per process lets requests to mathoid reuse connections.
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.MATHOID_CONCURRENCY)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+    return _session
+
+
+class MathoidBatch(object):
+    """Defers rendering of formulas until the whole document is known.
+
+    Formulas are replaced by placeholders as they are encountered, and `substitute` then renders
+    every distinct formula in one go and puts the results back into the document.
+    """
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.nonce = uuid4().hex
+        self.placeholder = re.compile('\x02mathoid:%s:(\\d+)\x03' % self.nonce)
+        self.formulas = []
+        # Whether any formula was left as TeX because mathoid failed to render it.
+        self.failed = False
+
+    def _defer(self, formula, fallback):
+        self.formulas.append((formula, fallback))
+        return '\x02mathoid:%s:%d\x03' % (self.nonce, len(self.formulas) - 1)
+
+    def display_math(self, math):
+        math = format_math(math)
+        return self._defer(r'\displaystyle ' + math, r'\[%s\]' % escape(math))
+
+    def inline_math(self, math):
+        math = format_math(math)
+        return self._defer(math, r'\(%s\)' % escape(math))
+
+    def substitute(self, html):
+        if not self.formulas:
+            return html
+
+        formulas, self.formulas = self.formulas, []
+        results = self.parser.get_results({formula for formula, fallback in formulas})
+
+        def replace(match):
+            formula, fallback = formulas[int(match.group(1))]
+            result = results.get(formula)
+            if not result:
+                self.failed = self.parser.type != 'tex'
+                return fallback
+            return result
+
+        return self.placeholder.sub(replace, html)
+
+
 class MathoidMathParser(object):
     types = ('svg', 'mml', 'tex', 'jax')
 
@@ -47,9 +110,10 @@ class MathoidMathParser(object):
         self.type = type
 
         self.mathoid_url = settings.MATHOID_URL
-        self.cache = HashFileCache(settings.MATHOID_CACHE_ROOT,
-                                   settings.MATHOID_CACHE_URL,
-                                   settings.MATHOID_GZIP)
+        self.cache = get_file_cache(settings.MATHOID_CACHE_FORMAT,
+                                    settings.MATHOID_CACHE_ROOT,
+                                    settings.MATHOID_CACHE_URL,
+                                    settings.MATHOID_GZIP)
 
         mml_cache = settings.MATHOID_MML_CACHE
         self.mml_cache = mml_cache and caches[mml_cache]
@@ -61,7 +125,7 @@ class MathoidMathParser(object):
         self.cache.create(hash)
 
         try:
-            response = requests.post(self.mathoid_url, data={
+            response = get_session().post(self.mathoid_url, data={
                 'q': reescape.sub(lambda m: '\\' + m.group(0), formula).encode('utf-8'),
                 'type': 'tex' if formula.startswith(r'\displaystyle') else 'inline-tex',
             })
@@ -117,6 +181,38 @@ class MathoidMathParser(object):
                 self.mml_cache.set('mathoid:mml:' + hash, mml, self.mml_cache_ttl)
         return result
 
+    def query_cache_many(self, hashes):
+        """Looks up many cached formulas at once, leaving out those whose files are no longer in the file cache."""
+        css = self.css_cache.get_many(['mathoid:css:' + hash for hash in hashes])
+        mml = self.mml_cache.get_many(['mathoid:mml:' + hash for hash in hashes]) if self.mml_cache else {}
+
+        results = {}
+        missing_css = {}
+        missing_mml = {}
+        for hash in hashes:
+            css_key, mml_key = 'mathoid:css:' + hash, 'mathoid:mml:' + hash
+            result = {
+                'svg': self.cache.get_url(hash, 'svg'),
+                'png': self.cache.get_url(hash, 'png'),
+                'css': css.get(css_key),
+                'mml': mml.get(mml_key),
+            }
+            try:
+                if result['css'] is None:
+                    result['css'] = missing_css[css_key] = self.cache.read_data(hash, 'css').decode('utf-8')
+                if result['mml'] is None:
+                    result['mml'] = missing_mml[mml_key] = self.cache.read_data(hash, 'mml').decode('utf-8')
+            except FileNotFoundError:
+                missing_css.pop(css_key, None)
+                continue
+            results[hash] = result
+
+        if missing_css:
+            self.css_cache.set_many(missing_css, self.mml_cache_ttl)
+        if missing_mml and self.mml_cache:
+            self.mml_cache.set_many(missing_mml, self.mml_cache_ttl)
+        return results
+
     def get_result(self, formula):
         if self.type == 'tex':
             return
@@ -128,6 +224,32 @@ class MathoidMathParser(object):
         else:
             result = self.query_mathoid(formula, hash)
 
+        return self.format_result(formula, result)
+
+    def get_results(self, formulas):
+        """Renders many formulas at once, returning a dictionary mapping each formula to its output.
+
+        Cached formulas are looked up in bulk, and the rest are sent to mathoid concurrently.
+        """
+        if self.type == 'tex' or not formulas:
+            return {}
+
+        formulas = {hashlib.sha1(utf8bytes(formula)).hexdigest(): utf8text(formula) for formula in formulas}
+        # The images are only served from the file cache, so a formula whose CSS is only in the Django cache is a miss.
+        hits = [hash for hash in formulas if self.cache.has_file(hash, 'css')]
+
+        results = self.query_cache_many(hits) if hits else {}
+        misses = [hash for hash in formulas if hash not in results]
+        if len(misses) == 1:
+            results[misses[0]] = self.query_mathoid(formulas[misses[0]], misses[0])
+        elif misses:
+            with ThreadPoolExecutor(max_workers=min(len(misses), settings.MATHOID_CONCURRENCY)) as executor:
+                results.update(zip(misses, executor.map(lambda hash: self.query_mathoid(formulas[hash], hash),
+                                                        misses)))
+
+        return {formula: self.format_result(formula, results.get(hash)) for hash, formula in formulas.items()}
+
+    def format_result(self, formula, result):
         if not result:
             return None
 
@@ -176,6 +298,9 @@ class MathoidMathParser(object):
                            result['png'], result['css'], result['tex'],
                            ['inline-math', 'display-math'][result['display']])
 
+    def batch(self):
+        return MathoidBatch(self)
+
     def display_math(self, math):
         math = format_math(math)
         return self.get_result(r'\displaystyle ' + math) or r'\[%s\]' % escape(math)
@@ -0,0 +1,261 @@
+import json
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from judge.utils.periodic import PeriodicTask
+
+__all__ = ['TIME_BUCKETS', 'COUNT_BUCKETS', 'registry', 'increment', 'observe', 'timer', 'InstrumentedLock',
+           'start_flushing', 'collect', 'render_prometheus', 'instrument_cache_backends', 'cache_counts']
+
+TIME_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Snapshots of other hosts that have not been saved for this many flush intervals are considered abandoned. Every
+# process saves its snapshot once per flush interval from a background thread, even when it is idle.
+STALE_FLUSH_INTERVALS = 4
+
+
+class MetricRegistry(object):
+    """Counters and histograms kept in the memory of one process, keyed by name and a tuple of label pairs."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+    def increment(self, name, amount, labels):
+        key = name, tuple(sorted(labels.items()))
+        with self.lock:
+            self.counters[key] += amount
+
+    def observe(self, name, value, buckets, labels):
+        key = name, tuple(sorted(labels.items()))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': list(buckets), 'counts': [0] * len(buckets),
+                                                    'sum': 0, 'count': 0}
+            for i, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][i] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), dict(histogram, counts=list(histogram['counts']))]
+                               for (name, labels), histogram in self.histograms.items()],
+            }
+
+
+registry = MetricRegistry()
+
+
+def increment(name, amount=1, **labels):
+    registry.increment(name, amount, labels)
+
+
+def observe(name, value, buckets=TIME_BUCKETS, **labels):
+    registry.observe(name, value, buckets, labels)
+
+
+@contextmanager
+def timer(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(name, time.perf_counter() - start, TIME_BUCKETS, labels)
+
+
+class InstrumentedLock(object):
+    """Wraps a lock to record how long each acquisition waited in the `dmoj_lock_wait_seconds` histogram."""
+
+    def __init__(self, lock, name):
+        self.lock = lock
+        self.name = name
+
+    def acquire(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = self.lock.acquire(*args, **kwargs)
+        observe('dmoj_lock_wait_seconds', time.perf_counter() - start, lock=self.name)
+        return result
+
+    def release(self):
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+def get_snapshot_path():
+    return os.path.join(settings.DMOJ_METRICS_DIR, '%s-%d.json' % (socket.gethostname(), os.getpid()))
+
+
+def save_snapshot():
+    path = get_snapshot_path()
+    with open(path + '.tmp', 'w') as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(path + '.tmp', path)
+
+
+_flusher = PeriodicTask(settings.DMOJ_METRICS_FLUSH_INTERVAL, save_snapshot)
+
+
+def start_flushing():
+    """Makes this process save its metrics to DMOJ_METRICS_DIR every flush interval, so that they can be exported by
+    any other process."""
+    if settings.DMOJ_METRICS_DIR:
+        _flusher.start()
+
+
+def is_stale(path, name):
+    """Returns whether the snapshot at `path` was left behind by a process that no longer runs."""
+    host, _, pid = name.split('.json')[0].rpartition('-')
+    if host == socket.gethostname() and pid.isdigit():
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+    return time.time() - os.path.getmtime(path) > STALE_FLUSH_INTERVALS * settings.DMOJ_METRICS_FLUSH_INTERVAL
+
+
+def merge(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, histogram in snapshot['histograms']:
+            key = name, tuple(map(tuple, labels))
+            merged = histograms.get(key)
+            if merged is None or merged['buckets'] != histogram['buckets']:
+                histograms[key] = dict(histogram, counts=list(histogram['counts']))
+                continue
+            merged['counts'] = [a + b for a, b in zip(merged['counts'], histogram['counts'])]
+            merged['sum'] += histogram['sum']
+            merged['count'] += histogram['count']
+    return counters, histograms
+
+
+def collect():
+    """Returns the counters and histograms of this process merged with those saved by every other running process.
+
+    Snapshots left behind by processes that have exited are deleted.
+    """
+    snapshots = [registry.snapshot()]
+    if settings.DMOJ_METRICS_DIR:
+        own = os.path.basename(get_snapshot_path())
+        for name in os.listdir(settings.DMOJ_METRICS_DIR):
+            if not name.endswith(('.json', '.json.tmp')) or name == own:
+                continue
+            path = os.path.join(settings.DMOJ_METRICS_DIR, name)
+            try:
+                if is_stale(path, name):
+                    os.unlink(path)
+                elif name.endswith('.json'):
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return merge(snapshots)
+
+
+def format_labels(labels, extra=()):
+    labels = list(labels) + list(extra)
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (key, str(value).replace('\\', r'\\').replace('"', r'\"')
+                                          .replace('\n', r'\n')) for key, value in labels)
+
+
+def format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render_prometheus(counters, histograms):
+    """Renders metrics in the Prometheus text exposition format."""
+    lines = []
+    declared = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in declared:
+            declared.add(name)
+            lines.append('# TYPE %s counter' % name)
+        lines.append('%s%s %s' % (name, format_labels(labels), format_value(value)))
+
+    for (name, labels), histogram in sorted(histograms.items()):
+        if name not in declared:
+            declared.add(name)
+            lines.append('# TYPE %s histogram' % name)
+        cumulative = 0
+        for bound, count in zip(histogram['buckets'], histogram['counts']):
+            cumulative += count
+            lines.append('%s_bucket%s %d' % (name, format_labels(labels, [('le', format_value(bound))]), cumulative))
+        lines.append('%s_bucket%s %d' % (name, format_labels(labels, [('le', '+Inf')]), histogram['count']))
+        lines.append('%s_sum%s %s' % (name, format_labels(labels), format_value(histogram['sum'])))
+        lines.append('%s_count%s %d' % (name, format_labels(labels), histogram['count']))
+    return '\n'.join(lines) + '\n'
+
+
+_cache_local = threading.local()
+
+
+def cache_counts():
+    """Returns the number of cache hits and misses in the current thread so far."""
+    return getattr(_cache_local, 'hits', 0), getattr(_cache_local, 'misses', 0)
+
+
+def _count_cache(hits, misses):
+    _cache_local.hits = getattr(_cache_local, 'hits', 0) + hits
+    _cache_local.misses = getattr(_cache_local, 'misses', 0) + misses
+
+
+def instrument_cache_backends():
+    """Makes the `get` and `get_many` of every configured cache backend count hits and misses for cache_counts."""
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        if backend.__dict__.get('_metrics_instrumented'):
+            continue
+
+        def make_get(get):
+            def instrumented_get(self, key, default=None, version=None):
+                value = get(self, key, default, version)
+                if not getattr(_cache_local, 'in_get_many', False):
+                    _count_cache(value is not default, value is default)
+                return value
+            return instrumented_get
+
+        def make_get_many(get_many):
+            def instrumented_get_many(self, keys, version=None):
+                keys = list(keys)
+                # The default implementation of `get_many` calls `get`, which must not count the keys again.
+                _cache_local.in_get_many = True
+                try:
+                    values = get_many(self, keys, version)
+                finally:
+                    _cache_local.in_get_many = False
+                _count_cache(len(values), len(keys) - len(values))
+                return values
+            return instrumented_get_many
+
+        backend.get = make_get(backend.get)
+        backend.get_many = make_get_many(backend.get_many)
+        backend._metrics_instrumented = True
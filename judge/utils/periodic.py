@@ -0,0 +1,49 @@
+import logging
+import os
+import threading
+
+from django.db import close_old_connections
+
+logger = logging.getLogger('judge.periodic')
+
+
+class PeriodicTask(object):
+    """Calls `function` every `interval` seconds from a daemon thread until `stop` is called.
+
+    `start` may be called any number of times. It starts the thread once in every process that calls it, so that
+    processes forked after the first call, such as prefork web workers, run the task too.
+    """
+
+    def __init__(self, interval, function):
+        self.interval = interval
+        self.function = function
+        self.lock = threading.Lock()
+        self.pid = None
+        self.stopped = None
+
+    def start(self):
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+        with self.lock:
+            if self.pid == pid:
+                return
+            self.pid = pid
+            self.stopped = threading.Event()
+            threading.Thread(target=self._run, args=(self.stopped,), name='periodic-%s' % self.function.__name__,
+                             daemon=True).start()
+
+    def stop(self):
+        with self.lock:
+            if self.stopped is not None:
+                self.stopped.set()
+            self.pid = None
+
+    def _run(self, stopped):
+        while not stopped.wait(self.interval):
+            try:
+                self.function()
+            except Exception:
+                logger.exception('Periodic task %s failed', self.function.__name__)
+            finally:
+                close_old_connections()
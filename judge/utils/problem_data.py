@@ -1,6 +1,7 @@
 import json
 import os
 import re
+from zipfile import ZipFile
 
 import yaml
 from django.conf import settings
@@ -39,6 +40,39 @@ class ProblemDataStorage(FileSystemStorage):
         return os.rename(self.path(old), self.path(new))
 
 
+def get_zip_manifest(file):
+    """Returns [name, size, CRC-32] for each file in a ZIP archive.
+
+    Only the central directory at the end of the archive is read, so this does not depend on the size of the data.
+    """
+    with ZipFile(file) as archive:
+        return [[info.filename, info.file_size, info.CRC] for info in archive.infolist() if not info.is_dir()]
+
+
+def natural_sort_key(name, split=re.compile(r'(\d+)').split):
+    return [int(part) if part.isdigit() else part for part in split(name)]
+
+
+def pair_test_cases(files):
+    """Pairs each input file with an output file named the same with its last "in" replaced by "out" or "ans".
+
+    Returns a list of (input, output) pairs sorted naturally by input name, so that 2.in comes before 10.in.
+    """
+    files = set(files)
+    pairs = []
+    for file in files:
+        head, sep, tail = file.rpartition('in')
+        if not sep:
+            continue
+        for replacement in ('out', 'ans'):
+            output = head + replacement + tail
+            if output in files:
+                pairs.append((file, output))
+                break
+    pairs.sort(key=lambda pair: natural_sort_key(pair[0]))
+    return pairs
+
+
 class ProblemDataError(Exception):
     def __init__(self, message):
         super(ProblemDataError, self).__init__(message)
@@ -54,7 +88,22 @@ class ProblemDataCompiler(object):
 
         self.generator = data.generator
 
+    # Fields of ProblemTestCase that make_init normalizes.
+    case_fields = ('is_pretest', 'input_file', 'output_file', 'generator_args', 'checker', 'checker_args')
+
     def make_init(self):
+        from judge.models import ProblemTestCase
+
+        original = {}
+        try:
+            return self._make_init(original)
+        finally:
+            changed = [case for case, values in original.values()
+                       if values != [getattr(case, field) for field in self.case_fields]]
+            if changed:
+                ProblemTestCase.objects.bulk_update(changed, self.case_fields)
+
+    def _make_init(self, original):
         cases = []
         batch = None
 
@@ -72,6 +121,7 @@ class ProblemDataCompiler(object):
             return case.checker
 
         for i, case in enumerate(self.cases, 1):
+            original[case.id] = (case, [getattr(case, field) for field in self.case_fields])
             if case.type == 'C':
                 data = {}
                 if batch:
@@ -106,7 +156,6 @@ class ProblemDataCompiler(object):
                     data['checker'] = make_checker(case)
                 else:
                     case.checker_args = ''
-                case.save(update_fields=('checker_args', 'is_pretest'))
                 (batch['batched'] if batch else cases).append(data)
             elif case.type == 'S':
                 if batch:
@@ -130,7 +179,6 @@ class ProblemDataCompiler(object):
                     case.checker_args = ''
                 case.input_file = ''
                 case.output_file = ''
-                case.save(update_fields=('checker_args', 'input_file', 'output_file'))
             elif case.type == 'E':
                 if not batch:
                     raise ProblemDataError(_('Attempt to end batch outside of one in case #%d') % i)
@@ -140,7 +188,6 @@ class ProblemDataCompiler(object):
                 case.generator_args = ''
                 case.checker = ''
                 case.checker_args = ''
-                case.save()
                 end_batch()
                 batch = None
         if batch:
@@ -191,13 +238,24 @@ class ProblemDataCompiler(object):
             self.data.feedback = ''
             self.data.save()
             if init:
-                problem_data_storage.save(yml_file, ContentFile(init))
+                # Rewriting an identical init.yml would still make judges reload the problem.
+                if self.read_init(yml_file) != init.encode('utf-8'):
+                    problem_data_storage.save(yml_file, ContentFile(init))
             else:
                 # Don't write empty init.yml since we should be looking in manually managed
                 # judge-server#670 will not update cache on empty init.yml,
                 # but will do so if there is no init.yml, so we delete the init.yml
                 problem_data_storage.delete(yml_file)
 
+    def read_init(self, yml_file):
+        from judge.models import problem_data_storage
+
+        try:
+            with problem_data_storage.open(yml_file, 'rb') as f:
+                return f.read()
+        except IOError:
+            return None
+
     @classmethod
     def generate(cls, *args, **kwargs):
         self = cls(*args, **kwargs)
@@ -13,7 +13,7 @@ __all__ = ['contest_completed_ids', 'get_result_data', 'user_completed_ids', 'us
 
 
 def user_tester_ids(profile):
-    return set(Problem.objects.filter(testers=profile).values_list('id', flat=True))
+    return Problem.get_role_problem_ids(profile.id)[1]
 
 
 def user_editable_ids(profile):
@@ -0,0 +1,189 @@
+import re
+import sqlite3
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+__all__ = ['NgramSearchIndex', 'SQLiteSearchIndex', 'SEARCH_INDEXES', 'PrefixIndex', 'PrefixMatches',
+           'normalize']
+
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    return unicodedata.normalize('NFKC', text or '').casefold()
+
+
+def word_grams(word, n=3):
+    """Returns `word` itself if it is at most `n` characters long, and its `n`-grams otherwise."""
+    if len(word) <= n:
+        return {word}
+    return {word[i:i + n] for i in range(len(word) - n + 1)}
+
+
+def text_grams(text, n=3):
+    """Returns every 1- to `n`-gram of every word, so that any query word has all of its grams indexed."""
+    grams = set()
+    for word in WORD_RE.findall(text):
+        for size in range(1, n + 1):
+            grams.update(word[i:i + size] for i in range(len(word) - size + 1))
+    return grams
+
+
+class NgramSearchIndex(object):
+    """An in-memory n-gram index over documents made of several weighted text fields.
+
+    A document matches a query if every word of the query appears in one of its fields, like a conjunction of
+    `icontains` lookups. Matches are ranked by the weight of the fields the words appear in, with a boost for
+    fields that equal or start with the word.
+    """
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.postings = defaultdict(set)
+        self.documents = {}
+
+    def add(self, id, fields):
+        fields = {name: normalize(value) for name, value in fields.items() if value}
+        self.documents[id] = fields
+        for text in fields.values():
+            for gram in text_grams(text):
+                self.postings[gram].add(id)
+
+    def score(self, fields, words):
+        total = 0
+        for word in words:
+            best = 0
+            for name, text in fields.items():
+                if word not in text:
+                    continue
+                if text == word:
+                    boost = 3
+                elif any(part.startswith(word) for part in WORD_RE.findall(text)):
+                    boost = 2
+                else:
+                    boost = 1
+                best = max(best, self.weights.get(name, 1) * boost)
+            if not best:
+                return 0
+            total += best
+        return total
+
+    def search(self, query):
+        """Returns the ids of the documents matching `query`, best match first."""
+        words = WORD_RE.findall(normalize(query))
+        if not words:
+            return []
+
+        grams = set()
+        for word in words:
+            grams |= word_grams(word)
+        postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+
+        scored = []
+        for id in candidates:
+            score = self.score(self.documents[id], words)
+            if score:
+                scored.append((-score, id))
+        scored.sort()
+        return [id for score, id in scored]
+
+
+class SQLiteSearchIndex(object):
+    """The same index kept in an in-memory SQLite FTS5 table and ranked with bm25.
+
+    Requires SQLite to be compiled with FTS5. Matching is by n-grams only, so it may return documents that contain
+    every gram of a word without containing the word itself.
+    """
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.fields = list(weights)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(':memory:', check_same_thread=False)
+        self.db.execute('CREATE VIRTUAL TABLE documents USING fts5(%s)' % ', '.join(self.fields))
+
+    def add(self, id, fields):
+        values = [' '.join(sorted(text_grams(normalize(fields.get(name))))) for name in self.fields]
+        insert = 'INSERT INTO documents (rowid, %s) VALUES (?%s)' % (', '.join(self.fields), ', ?' * len(self.fields))
+        with self.lock:
+            self.db.execute('DELETE FROM documents WHERE rowid = ?', (id,))
+            self.db.execute(insert, [id] + values)
+
+    def search(self, query):
+        grams = set()
+        for word in WORD_RE.findall(normalize(query)):
+            grams |= word_grams(word)
+        if not grams:
+            return []
+
+        match = ' AND '.join('"%s"' % gram for gram in sorted(grams))
+        weights = ', '.join(str(float(self.weights[name])) for name in self.fields)
+        with self.lock:
+            rows = self.db.execute('SELECT rowid FROM documents WHERE documents MATCH ? '
+                                   'ORDER BY bm25(documents, %s), rowid' % weights, (match,)).fetchall()
+        return [row[0] for row in rows]
+
+
+SEARCH_INDEXES = {
+    'ngram': NgramSearchIndex,
+    'sqlite': SQLiteSearchIndex,
+}
+
+
+class PrefixMatches(object):
+    """The entries of a PrefixIndex between two positions, which can be counted and sliced without copying them."""
+
+    def __init__(self, entries, start, end):
+        self.entries = entries
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __iter__(self):
+        for i in range(self.start, self.end):
+            yield self.entries[i][1:]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.entries[i][1:] for i in range(self.start, self.end)[item]]
+        return self.entries[range(self.start, self.end)[item]][1:]
+
+
+class PrefixIndex(object):
+    """A sorted array of (key, value) pairs that finds every pair whose key starts with a prefix by bisection.
+
+    Keys are compared case-insensitively. The array is replaced rather than modified on updates, so that matches
+    already returned are unaffected.
+    """
+
+    def __init__(self, items=()):
+        self.entries = sorted((normalize(key), key, value) for key, value in items)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, key, value):
+        entries = list(self.entries)
+        insort(entries, (normalize(key), key, value))
+        self.entries = entries
+
+    def update(self, items):
+        self.entries = sorted(self.entries + [(normalize(key), key, value) for key, value in items])
+
+    def remove(self, key, value):
+        entry = (normalize(key), key, value)
+        index = bisect_left(self.entries, entry)
+        if index < len(self.entries) and self.entries[index] == entry:
+            self.entries = self.entries[:index] + self.entries[index + 1:]
+
+    def prefix(self, term):
+        """Returns the (key, value) pairs whose key starts with `term`, ordered by key."""
+        term = normalize(term)
+        entries = self.entries
+        start = bisect_left(entries, (term,))
+        return PrefixMatches(entries, start, bisect_left(entries, (term + '\U0010ffff',), start))
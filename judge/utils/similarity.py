@@ -0,0 +1,95 @@
+import re
+import zlib
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from judge.highlight_code import get_lexer
+
+__all__ = ['normalize_tokens', 'winnow', 'fingerprint', 'SimilarityIndex']
+
+
+def _fallback_tokens(source, split=re.compile(r'\w+|\S').findall):
+    from pygments.token import Name, Text
+
+    for token in split(source):
+        yield Name if token[0].isalpha() or token[0] == '_' else Text, token
+
+
+def normalize_tokens(source, language):
+    """Lexes `source` with the pygments lexer for `language` into tokens that survive renaming and reformatting.
+
+    Comments and whitespace are dropped, and identifiers, strings and numbers are each replaced by a placeholder.
+    """
+    # Imported here so that the processes that import this module through the tasks, like the bridge, skip pygments.
+    from pygments.token import Comment, Name, Number, String
+
+    lexer = get_lexer(language)
+    tokens = _fallback_tokens(source) if lexer is None else lexer.get_tokens(source)
+
+    result = []
+    for type, value in tokens:
+        if type in Comment or not value.strip():
+            continue
+        elif type in Name and type not in Name.Builtin:
+            result.append('N')
+        elif type in String:
+            if not result or result[-1] != 'S':
+                result.append('S')
+        elif type in Number:
+            result.append('0')
+        else:
+            result.append(value.strip())
+    return result
+
+
+def winnow(hashes, window):
+    """Selects the minimum of every `window` consecutive hashes, which guarantees that any match of at least
+    `window` + k - 1 tokens shares a fingerprint."""
+    if len(hashes) <= window:
+        return {min(hashes)} if hashes else set()
+
+    return {min(hashes[i:i + window]) for i in range(len(hashes) - window + 1)}
+
+
+def fingerprint(tokens, k, window):
+    hashes = [zlib.crc32('\0'.join(tokens[i:i + k]).encode('utf-8')) for i in range(len(tokens) - k + 1)]
+    return winnow(hashes, window)
+
+
+class SimilarityIndex(object):
+    """An inverted index from winnowed fingerprints to the documents containing them.
+
+    Fingerprints present in more than `max_share` of the documents are treated as shared boilerplate and ignored.
+    """
+
+    def __init__(self, k=5, window=4, max_share=0.5):
+        self.k = k
+        self.window = window
+        self.max_share = max_share
+        self.fingerprints = {}
+        self.index = defaultdict(list)
+
+    def add(self, key, source, language):
+        fingerprints = fingerprint(normalize_tokens(source, language), self.k, self.window)
+        self.fingerprints[key] = fingerprints
+        for hash in fingerprints:
+            self.index[hash].append(key)
+
+    def pairs(self, threshold):
+        """Returns (key, key, similarity) for every pair sharing at least `threshold` of the smaller document's
+        fingerprints, most similar first."""
+        limit = max(2, int(len(self.fingerprints) * self.max_share))
+        shared = Counter()
+        for keys in self.index.values():
+            if len(keys) > limit:
+                continue
+            for pair in combinations(sorted(keys), 2):
+                shared[pair] += 1
+
+        result = []
+        for (a, b), count in shared.items():
+            similarity = count / min(len(self.fingerprints[a]), len(self.fingerprints[b]))
+            if similarity >= threshold:
+                result.append((a, b, similarity))
+        result.sort(key=lambda pair: -pair[2])
+        return result
@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+
+from judge.utils.cachedict import LRUCache
+
+
+class LRUCacheTestCase(SimpleTestCase):
+    def test_get_set(self):
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('a', 0), 0)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('a', 2)
+        self.assertEqual(cache.get('a'), 2)
+        self.assertEqual(len(cache), 1)
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+
+    def test_delete(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.delete('a')
+        cache.delete('b')
+        self.assertNotIn('a', cache)
+        cache.set('b', 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
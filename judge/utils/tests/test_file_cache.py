@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from judge.utils.file_cache import HashFileCache, SegmentFileCache
+
+
+class SegmentFileCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_read_write(self):
+        writer = SegmentFileCache(self.root, '/cache/')
+        reader = SegmentFileCache(self.root, '/cache/')
+        self.assertFalse(reader.has_file('abc', 'svg'))
+
+        self.assertEqual(writer.cache_data('abc', 'svg', b'<svg></svg>'), '/cache/abc/svg')
+        writer.cache_data('abc', 'css', b'', url=False)
+        self.assertTrue(reader.has_file('abc', 'svg'))
+        self.assertEqual(reader.read_data('abc', 'svg'), b'<svg></svg>')
+        self.assertEqual(reader.read_data('abc', 'css'), b'')
+        with self.assertRaises(FileNotFoundError):
+            reader.read_data('abc', 'png')
+
+        writer.cache_data('abc', 'svg', b'<svg/>')
+        self.assertEqual(writer.read_data('abc', 'svg'), b'<svg/>')
+
+    def test_compact(self):
+        writer = SegmentFileCache(self.root, '/cache/')
+        reader = SegmentFileCache(self.root, '/cache/')
+        writer.cache_data('abc', 'svg', b'<svg></svg>')
+        writer.cache_data('abc', 'svg', b'<svg/>')
+        writer.cache_data('def', 'svg', b'<svg>def</svg>')
+        self.assertEqual(reader.read_data('abc', 'svg'), b'<svg/>')
+
+        self.assertEqual(writer.compact(), (31, 20))
+        self.assertEqual(reader.read_data('abc', 'svg'), b'<svg/>')
+        self.assertEqual(reader.read_data('def', 'svg'), b'<svg>def</svg>')
+
+    def test_import_directory(self):
+        source = os.path.join(self.root, 'source')
+        directory = HashFileCache(source, '/cache/', gzip=True)
+        directory.create('abc')
+        directory.cache_data('abc', 'svg', b'<svg/>')
+
+        cache = SegmentFileCache(os.path.join(self.root, 'segments'), '/cache/')
+        self.assertEqual(cache.import_directory(source), 2)
+        self.assertEqual(cache.read_data('abc', 'svg'), b'<svg/>')
+        self.assertTrue(cache.has_file('abc', 'svg.gz'))
+
+    def test_merge(self):
+        writer = SegmentFileCache(self.root, '/cache/')
+        writer.journal_limit = 3
+        reader = SegmentFileCache(self.root, '/cache/')
+        for i in range(10):
+            writer.cache_data('%03d' % i, 'svg', b'<svg>%d</svg>' % i)
+            self.assertEqual(reader.read_data('%03d' % i, 'svg'), b'<svg>%d</svg>' % i)
+        writer.cache_data('004', 'svg', b'<svg/>')
+
+        # Every third entry was merged into the index, leaving only the latest ones in the journal.
+        self.assertEqual(len(writer.journal), 2)
+        self.assertEqual(os.path.getsize(os.path.join(self.root, 'index')), 9 * writer.record.size)
+        self.assertEqual(writer.read_data('004', 'svg'), b'<svg/>')
+        self.assertEqual(SegmentFileCache(self.root, '/cache/').read_data('004', 'svg'), b'<svg/>')
+        for cache in (writer, reader):
+            for i in (0, 5, 9):
+                self.assertEqual(cache.read_data('%03d' % i, 'svg'), b'<svg>%d</svg>' % i)
+            self.assertFalse(cache.has_file('010', 'svg'))
+
+        writer.compact()
+        self.assertEqual(len(writer.journal), 0)
+        self.assertEqual(reader.read_data('004', 'svg'), b'<svg/>')
+        self.assertEqual(reader.read_data('009', 'svg'), b'<svg>9</svg>')
@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from judge.utils.mathoid import MathoidMathParser
+
+
+class StubMathoidResponse(object):
+    def __init__(self, formula):
+        self.formula = formula
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {
+            'success': True,
+            'mml': '<math>%s</math>' % self.formula,
+            'svg': '<svg></svg>',
+            'png': {'data': [0]},
+            'mathoidStyle': 'vertical-align: 0',
+        }
+
+
+class StubMathoidSession(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = []
+
+    def post(self, url, data):
+        formula = data['q'].decode('utf-8')
+        with self.lock:
+            self.queries.append(formula)
+        return StubMathoidResponse(formula)
+
+
+class MathoidBatchTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(MATHOID_URL='http://mathoid.test/', MATHOID_CACHE_ROOT=self.root,
+                                          MATHOID_CACHE_URL='/mathoid/', MATHOID_GZIP=False)
+        self.settings.enable()
+        self.session = StubMathoidSession()
+        self.patcher = mock.patch('judge.utils.mathoid.get_session', return_value=self.session)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.settings.disable()
+        shutil.rmtree(self.root)
+
+    def test_batch(self):
+        batch = MathoidMathParser('mml').batch()
+        html = '<p>%s and %s and %s</p>' % (batch.inline_math('x'), batch.display_math('y'), batch.inline_math('x'))
+        self.assertEqual(self.session.queries, [])
+
+        self.assertEqual(batch.substitute(html), r'<p><math>x</math> and <math>\displaystyle y</math> and '
+                                                 r'<math>x</math></p>')
+        self.assertEqual(sorted(self.session.queries), ['\\displaystyle y', 'x'])
+
+        batch = MathoidMathParser('mml').batch()
+        self.assertEqual(batch.substitute(batch.inline_math('x')), '<math>x</math>')
+        self.assertEqual(len(self.session.queries), 2)
+
+    def test_tex(self):
+        batch = MathoidMathParser('tex').batch()
+        self.assertEqual(batch.substitute(batch.inline_math('x < y')), r'\(x &lt; y\)')
+        self.assertEqual(self.session.queries, [])
+
+    @override_settings(MATHOID_MML_CACHE=None)
+    def test_missing_files(self):
+        for i in range(2):
+            batch = MathoidMathParser('mml').batch()
+            self.assertEqual(batch.substitute(batch.inline_math('z')), '<math>z</math>')
+        self.assertEqual(self.session.queries, ['z'])
+
+        # The CSS is still in the Django cache, but the files are gone, so the formula is rendered again.
+        shutil.rmtree(self.root)
+        batch = MathoidMathParser('mml').batch()
+        self.assertEqual(batch.substitute(batch.inline_math('z')), '<math>z</math>')
+        self.assertEqual(self.session.queries, ['z', 'z'])
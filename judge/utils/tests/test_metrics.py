@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from judge.utils import metrics
+from judge.utils.periodic import PeriodicTask
+
+
+class MetricsTestCase(SimpleTestCase):
+    def setUp(self):
+        self.settings = override_settings(DMOJ_METRICS_DIR=None)
+        self.settings.enable()
+        self.patcher = mock.patch('judge.utils.metrics.registry', metrics.MetricRegistry())
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.settings.disable()
+
+    def test_render(self):
+        metrics.increment('requests_total', view='a"b')
+        metrics.increment('requests_total', 2, view='a"b')
+        metrics.observe('queries', 3, buckets=(1, 5), view='c')
+        metrics.observe('queries', 9, buckets=(1, 5), view='c')
+
+        self.assertEqual(metrics.render_prometheus(*metrics.collect()), '\n'.join([
+            '# TYPE requests_total counter',
+            'requests_total{view="a\\"b"} 3',
+            '# TYPE queries histogram',
+            'queries_bucket{view="c",le="1"} 0',
+            'queries_bucket{view="c",le="5"} 1',
+            'queries_bucket{view="c",le="+Inf"} 2',
+            'queries_sum{view="c"} 12',
+            'queries_count{view="c"} 2',
+        ]) + '\n')
+
+    def test_merge(self):
+        metrics.observe('seconds', 0.5, buckets=(1,))
+        snapshot = metrics.registry.snapshot()
+        counters, histograms = metrics.merge([snapshot, snapshot])
+        self.assertEqual(histograms['seconds', ()], {'buckets': [1], 'counts': [2], 'sum': 1.0, 'count': 2})
+
+    def test_lock(self):
+        lock = metrics.InstrumentedLock(threading.RLock(), 'test')
+        with lock:
+            with lock:
+                pass
+        counters, histograms = metrics.collect()
+        self.assertEqual(histograms['dmoj_lock_wait_seconds', (('lock', 'test'),)]['count'], 2)
+
+    def test_stale_snapshots(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        exited = subprocess.Popen([sys.executable, '-c', ''])
+        exited.wait()
+
+        def save(name, value, age=0):
+            path = os.path.join(root, name)
+            with open(path, 'w') as f:
+                json.dump({'counters': [['requests_total', [], value]], 'histograms': []}, f)
+            os.utime(path, (time.time() - age, time.time() - age))
+
+        host = socket.gethostname()
+        save('%s-%d.json' % (host, os.getppid()), 1)
+        save('%s-%d.json' % (host, exited.pid), 2)
+        save('%s-%d.json.tmp' % (host, exited.pid), 4)
+        save('other-1.json', 8, age=30)
+        save('other-2.json', 16, age=3600)
+
+        with override_settings(DMOJ_METRICS_DIR=root, DMOJ_METRICS_FLUSH_INTERVAL=15):
+            counters, histograms = metrics.collect()
+        self.assertEqual(counters['requests_total', ()], 9)
+        self.assertEqual(sorted(os.listdir(root)), sorted(['%s-%d.json' % (host, os.getppid()), 'other-1.json']))
+
+    def test_idle_flush(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        flusher = PeriodicTask(0.01, metrics.save_snapshot)
+        self.addCleanup(flusher.stop)
+
+        with override_settings(DMOJ_METRICS_DIR=root), mock.patch.object(metrics, '_flusher', flusher):
+            metrics.start_flushing()
+            path = metrics.get_snapshot_path()
+            for _ in range(500):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.01)
+            self.assertTrue(os.path.exists(path))
+
+            # The snapshot keeps being saved without any further activity.
+            os.utime(path, (0, 0))
+            for _ in range(500):
+                if os.path.getmtime(path) > 0:
+                    break
+                time.sleep(0.01)
+            self.assertGreater(os.path.getmtime(path), 0)
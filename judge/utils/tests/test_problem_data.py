@@ -0,0 +1,19 @@
+import io
+import zipfile
+
+from django.test import SimpleTestCase
+
+from judge.utils.problem_data import get_zip_manifest, pair_test_cases
+
+
+class ZipManifestTestCase(SimpleTestCase):
+    def test_manifest(self):
+        data = io.BytesIO()
+        with zipfile.ZipFile(data, 'w') as archive:
+            archive.writestr('cases/', '')
+            archive.writestr('cases/1.in', 'input')
+        self.assertEqual(get_zip_manifest(data), [['cases/1.in', 5, zipfile.crc32(b'input')]])
+
+    def test_pair_test_cases(self):
+        self.assertEqual(pair_test_cases(['10.in', '10.out', '2.in', '2.ans', 'input.txt', 'output.txt', '3.in']),
+                         [('2.in', '2.ans'), ('10.in', '10.out'), ('input.txt', 'output.txt')])
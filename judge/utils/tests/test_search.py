@@ -0,0 +1,89 @@
+import sqlite3
+import unittest
+
+from django.test import SimpleTestCase
+
+from judge.utils.search import NgramSearchIndex, PrefixIndex, SQLiteSearchIndex
+
+WEIGHTS = {'code': 8, 'name': 6, 'summary': 1}
+DOCUMENTS = {
+    1: {'code': 'aplusb', 'name': 'A Plus B', 'summary': 'Add two numbers.'},
+    2: {'code': 'graph', 'name': 'Shortest Paths', 'summary': 'Dijkstra on a graph with plus edges.'},
+    3: {'code': 'ccc20s1', 'name': 'Surmising a Sprinter\'s Speed', 'summary': ''},
+    4: {'code': 'bfs', 'name': 'Graph Traversal', 'summary': None},
+}
+
+
+def has_fts5():
+    try:
+        sqlite3.connect(':memory:').execute('CREATE VIRTUAL TABLE test USING fts5(a)')
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+class NgramSearchIndexTestCase(SimpleTestCase):
+    index_class = NgramSearchIndex
+
+    def setUp(self):
+        self.index = self.index_class(WEIGHTS)
+        for id, fields in DOCUMENTS.items():
+            self.index.add(id, fields)
+
+    def test_ranking(self):
+        self.assertEqual(self.index.search('graph'), [2, 4])
+        self.assertEqual(self.index.search('plus'), [1, 2])
+
+    def test_short_words(self):
+        self.assertEqual(self.index.search('bf'), [4])
+        self.assertEqual(set(self.index.search('s1')), {3})
+
+    def test_all_words(self):
+        self.assertEqual(self.index.search('sprinter SPEED'), [3])
+        self.assertEqual(self.index.search('plus traversal'), [])
+
+    def test_substring(self):
+        self.assertEqual(self.index.search('ortest'), [2])
+        self.assertEqual(self.index.search('ccc20'), [3])
+
+    def test_empty(self):
+        self.assertEqual(self.index.search(''), [])
+        self.assertEqual(self.index.search('?!'), [])
+        self.assertEqual(self.index.search('nothing'), [])
+
+
+@unittest.skipUnless(has_fts5(), 'SQLite is not compiled with FTS5')
+class SQLiteSearchIndexTestCase(NgramSearchIndexTestCase):
+    index_class = SQLiteSearchIndex
+
+    def test_ranking(self):
+        self.assertEqual(set(self.index.search('graph')), {2, 4})
+        self.assertEqual(self.index.search('aplusb'), [1])
+
+
+class PrefixIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex([('Xyene', 1), ('quantum', 2), ('xiaowuc1', 3), ('Kirito', 4), ('x', 5)])
+
+    def test_prefix(self):
+        self.assertEqual(list(self.index.prefix('x')), [('x', 5), ('xiaowuc1', 3), ('Xyene', 1)])
+        self.assertEqual(list(self.index.prefix('XY')), [('Xyene', 1)])
+        self.assertEqual(list(self.index.prefix('xyz')), [])
+        self.assertEqual(len(self.index.prefix('')), 5)
+
+    def test_slice(self):
+        matches = self.index.prefix('x')
+        self.assertEqual(len(matches), 3)
+        self.assertEqual(matches[1:], [('xiaowuc1', 3), ('Xyene', 1)])
+        self.assertEqual(matches[-1], ('Xyene', 1))
+
+    def test_update(self):
+        matches = self.index.prefix('k')
+        self.index.add('kevin', 6)
+        self.index.remove('Kirito', 4)
+        self.assertEqual(list(matches), [('Kirito', 4)])
+        self.assertEqual(list(self.index.prefix('k')), [('kevin', 6)])
+
+        self.index.update([('xenon', 7), ('kate', 8)])
+        self.assertEqual(list(self.index.prefix('k')), [('kate', 8), ('kevin', 6)])
+        self.assertEqual(len(self.index), 7)
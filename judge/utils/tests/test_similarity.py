@@ -0,0 +1,39 @@
+from django.test import SimpleTestCase
+
+from judge.utils.similarity import SimilarityIndex, normalize_tokens
+
+ORIGINAL = '''
+n = int(input())
+total = 0
+for i in range(n):
+    total += int(input()) * i
+print(total)
+'''
+
+RENAMED = '''
+# read the count
+count = int(input())
+answer = 0
+for j in range(count):
+    answer += int(input()) * j
+print(answer)
+'''
+
+UNRELATED = '''
+a, b = map(int, input().split())
+while b:
+    a, b = b, a % b
+print("gcd", a)
+'''
+
+
+class SimilarityTestCase(SimpleTestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize_tokens(ORIGINAL, 'python3'), normalize_tokens(RENAMED, 'python3'))
+
+    def test_pairs(self):
+        index = SimilarityIndex()
+        index.add('original', ORIGINAL, 'python3')
+        index.add('renamed', RENAMED, 'python3')
+        index.add('unrelated', UNRELATED, 'python3')
+        self.assertEqual(index.pairs(0.5), [('original', 'renamed', 1.0)])
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from judge.models import Submission
+
+
+class StubUser(object):
+    is_authenticated = True
+
+    def __init__(self, profile_id, perms=()):
+        self.profile = SimpleNamespace(id=profile_id)
+        self.perms = set(perms)
+
+    def has_perm(self, perm):
+        return perm in self.perms
+
+
+def make_submission(id, user_id, problem_id, is_public=True):
+    return SimpleNamespace(id=id, user_id=user_id, problem_id=problem_id,
+                           problem=SimpleNamespace(id=problem_id, is_public=is_public))
+
+
+@mock.patch('judge.models.problem.Problem.get_role_problem_ids', return_value=(set(), {3}))
+@mock.patch('judge.utils.problems.user_completed_ids', return_value={1})
+class SubmissionVisibleDetailTestCase(SimpleTestCase):
+    submissions = [
+        make_submission(10, 1, 1),
+        make_submission(11, 2, 1),
+        make_submission(12, 2, 2),
+        make_submission(13, 2, 3, is_public=False),
+        make_submission(14, 2, 4, is_public=False),
+    ]
+
+    def visible(self, user, visibility):
+        with override_settings(DMOJ_SUBMISSION_SOURCE_VISIBILITY=visibility):
+            return Submission.get_visible_detail_ids(user, self.submissions)
+
+    def test_only_own(self, completed, roles):
+        self.assertEqual(self.visible(StubUser(1), 'only-own'), {10, 13})
+
+    def test_all_solved(self, completed, roles):
+        self.assertEqual(self.visible(StubUser(1), 'all-solved'), {10, 11})
+
+    def test_all(self, completed, roles):
+        self.assertEqual(self.visible(StubUser(1), 'all'), {10, 11, 12, 13, 14})
+
+    def test_public_problem_editor(self, completed, roles):
+        user = StubUser(1, ['judge.edit_public_problem'])
+        for visibility in ('only-own', 'all-solved'):
+            with self.subTest(visibility=visibility):
+                self.assertEqual(self.visible(user, visibility) & {11, 12, 14}, {11, 12})
+
+    def test_view_all_submission(self, completed, roles):
+        user = StubUser(1, ['judge.view_all_submission'])
+        self.assertEqual(self.visible(user, 'only-own'), {10, 11, 12, 13, 14})
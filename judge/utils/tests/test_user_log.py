@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase
+
+from judge.user_log import AccessLogBuffer
+
+
+@mock.patch('judge.user_log.PeriodicTask', mock.MagicMock())
+class AccessLogBufferTestCase(SimpleTestCase):
+    def saved(self, bulk_update):
+        return {profile.id: getattr(profile, 'ip', None)
+                for call in bulk_update.call_args_list for profile in call[0][0]}
+
+    @mock.patch('judge.user_log.Profile.objects')
+    def test_record_does_not_write(self, objects):
+        bulk_update = objects.bulk_update
+        buffer = AccessLogBuffer(60, 0)
+        buffer.record(1, '127.0.0.1')
+        buffer.record(2, None)
+        bulk_update.assert_not_called()
+
+        buffer.flush()
+        self.assertEqual(self.saved(bulk_update), {1: '127.0.0.1', 2: None})
+        self.assertEqual(buffer.pending, {})
+
+    @mock.patch('judge.user_log.Profile.objects')
+    def test_deduplicate(self, objects):
+        bulk_update = objects.bulk_update
+        buffer = AccessLogBuffer(60, 0)
+        buffer.record(1, '127.0.0.1')
+        buffer.flush()
+        buffer.record(1, '127.0.0.1')
+        buffer.flush()
+        self.assertEqual(bulk_update.call_count, 1)
+
+        buffer.record(1, '127.0.0.2')
+        buffer.flush()
+        self.assertEqual(bulk_update.call_count, 2)
+
+    @mock.patch('judge.user_log.Profile.objects')
+    def test_failed_write_is_kept(self, objects):
+        bulk_update = objects.bulk_update
+        buffer = AccessLogBuffer(60, 0)
+        buffer.record(1, '127.0.0.1')
+        buffer.record(2, '127.0.0.1')
+
+        def fail(*args, **kwargs):
+            buffer.record(2, '127.0.0.2')
+            raise DatabaseError
+        bulk_update.side_effect = fail
+        with self.assertLogs('judge.user_log', 'ERROR'):
+            buffer.flush()
+        self.assertEqual({id: ip for id, (_, ip) in buffer.pending.items()}, {1: '127.0.0.1', 2: '127.0.0.2'})
+
+        bulk_update.side_effect = None
+        buffer.flush()
+        self.assertEqual(self.saved(bulk_update), {1: '127.0.0.1', 2: '127.0.0.2'})
@@ -7,7 +7,7 @@ import requests
 from django.conf import settings
 from django.core.cache import caches
 
-from judge.utils.file_cache import HashFileCache
+from judge.utils.file_cache import get_file_cache
 from judge.utils.unicode import utf8bytes
 
 logger = logging.getLogger('judge.texoid')
@@ -17,9 +17,10 @@ TEXOID_ENABLED = hasattr(settings, 'TEXOID_URL')
 
 class TexoidRenderer(object):
     def __init__(self):
-        self.cache = HashFileCache(settings.TEXOID_CACHE_ROOT,
-                                   settings.TEXOID_CACHE_URL,
-                                   settings.TEXOID_GZIP)
+        self.cache = get_file_cache(settings.TEXOID_CACHE_FORMAT,
+                                    settings.TEXOID_CACHE_ROOT,
+                                    settings.TEXOID_CACHE_URL,
+                                    settings.TEXOID_GZIP)
         self.meta_cache = caches[settings.TEXOID_META_CACHE]
         self.meta_cache_ttl = settings.TEXOID_META_CACHE_TTL
 
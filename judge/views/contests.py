@@ -1,17 +1,19 @@
 import json
+import os
 from collections import defaultdict, namedtuple
 from functools import partial
 from itertools import chain
 from operator import attrgetter, itemgetter
+from uuid import uuid4
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import IntegrityError
-from django.db.models import Case, Count, F, FloatField, IntegerField, Max, Sum, Value, When
-from django.db.models.expressions import CombinedExpression
-from django.http import Http404, HttpResponseBadRequest, HttpResponseRedirect
+from django.db.models import Case, Count, F, IntegerField, Max, Sum, When
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.utils import timezone
@@ -24,16 +26,17 @@ from django.views.generic.detail import BaseDetailView, DetailView, SingleObject
 
 from judge import event_poster as event
 from judge.forms import ContestCloneForm
-from judge.models import Contest, ContestMoss, ContestParticipation, ContestProblem, \
-    Problem, Profile, Submission
-from judge.tasks import run_moss
-from judge.utils.celery import redirect_to_task_status
+from judge.models import Contest, ContestMoss, ContestParticipation, ContestProblem, ContestSubmissionCount, \
+    Problem, Profile
+from judge.pdf_problems import HAS_PDF, HAS_PDFUNITE, get_contest_pdf_path, get_contest_pdf_task_key
+from judge.tasks import render_contest_problem_pdf, run_moss
+from judge.utils.celery import redirect_to_task_status, task_status_url_by_id
 from judge.utils.opengraph import generate_opengraph
 from judge.utils.problems import _get_result_data
 from judge.utils.ranker import ranker
 from judge.utils.stats import get_bar_chart, get_pie_chart
 from judge.utils.views import DiggPaginatorMixin, QueryStringSortMixin, SingleObjectFormView, TitleMixin, \
-    generic_message
+    add_file_response, generic_message
 
 __all__ = ['ContestList', 'ContestDetail', 'ContestRanking', 'ContestJoin', 'ContestLeave',
            'ContestClone', 'ContestStats', 'ContestMossView', 'ContestMossDelete', 'contest_ranking_ajax',
@@ -322,38 +325,30 @@ class ContestStats(TitleMixin, ContestMixin, DetailView):
     def get_title(self):
         return _('%s Statistics') % self.object.name
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-
-        if not ((self.object.ended and self.object.can_see_full_scoreboard(self.request.user)) or
-                self.can_edit):
-            raise Http404()
-
-        queryset = Submission.objects.filter(contest_object=self.object)
-
-        ac_count = Count(Case(When(result='AC', then=Value(1)), output_field=IntegerField()))
-        ac_rate = CombinedExpression(ac_count / Count('problem'), '*', Value(100.0), output_field=FloatField())
-
-        status_count_queryset = list(
-            queryset.values('problem__code', 'result').annotate(count=Count('result'))
-                    .values_list('problem__code', 'result', 'count'),
-        )
-        labels, codes = [], []
-        contest_problems = self.object.contest_problems.order_by('order').values_list('problem__name', 'problem__code')
+    def get_stats(self):
+        labels, ids = [], []
+        contest_problems = self.object.contest_problems.order_by('order').values_list('problem__name', 'problem_id')
         if contest_problems:
-            labels, codes = zip(*contest_problems)
-        num_problems = len(labels)
-        status_counts = [[] for i in range(num_problems)]
-        for problem_code, result, count in status_count_queryset:
-            if problem_code in codes:
-                status_counts[codes.index(problem_code)].append((result, count))
-
-        result_data = defaultdict(partial(list, [0] * num_problems))
-        for i in range(num_problems):
-            for category in _get_result_data(defaultdict(int, status_counts[i]))['categories']:
+            labels, ids = zip(*contest_problems)
+        problem_index = {id: i for i, id in enumerate(ids)}
+
+        status_counts = [defaultdict(int) for i in range(len(ids))]
+        language_counts = defaultdict(int)
+        language_ac_counts = defaultdict(int)
+        for problem_id, language, result, count in (ContestSubmissionCount.objects.filter(contest=self.object)
+                                                    .values_list('problem_id', 'language__name', 'result', 'count')):
+            if problem_id in problem_index and result is not None:
+                status_counts[problem_index[problem_id]][result] += count
+            language_counts[language] += count
+            if result == 'AC':
+                language_ac_counts[language] += count
+
+        result_data = defaultdict(partial(list, [0] * len(ids)))
+        for i, counts in enumerate(status_counts):
+            for category in _get_result_data(counts)['categories']:
                 result_data[category['code']][i] = category['count']
 
-        stats = {
+        return {
             'problem_status_count': {
                 'labels': labels,
                 'datasets': [
@@ -366,15 +361,34 @@ class ContestStats(TitleMixin, ContestMixin, DetailView):
                 ],
             },
             'language_count': get_pie_chart(
-                queryset.values('language__name').annotate(count=Count('language__name'))
-                        .filter(count__gt=0).order_by('-count').values_list('language__name', 'count'),
+                sorted(((language, count) for language, count in language_counts.items() if count > 0),
+                       key=itemgetter(1), reverse=True),
             ),
             'language_ac_rate': get_bar_chart(
-                queryset.values('language__name').annotate(ac_rate=ac_rate)
-                        .filter(ac_rate__gt=0).values_list('language__name', 'ac_rate'),
+                [(language, language_ac_counts[language] * 100.0 / count)
+                 for language, count in language_counts.items() if language_ac_counts[language]],
             ),
         }
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        if not ((self.object.ended and self.object.can_see_full_scoreboard(self.request.user)) or
+                self.can_edit):
+            raise Http404()
+
+        # The version is deleted whenever the contest is saved or one of its submissions finishes.
+        version = cache.get('contest_stats_version:%d' % self.object.id)
+        if version is None:
+            cache.add('contest_stats_version:%d' % self.object.id, uuid4().hex, None)
+            version = cache.get('contest_stats_version:%d' % self.object.id)
+
+        key = 'contest_stats:%d:%s' % (self.object.id, version)
+        stats = cache.get(key)
+        if stats is None:
+            stats = self.get_stats()
+            cache.set(key, stats, 86400)
+
         context['stats'] = mark_safe(json.dumps(stats))
 
         return context
@@ -611,6 +625,52 @@ class ContestMossView(ContestMossMixin, TitleMixin, DetailView):
         )
 
 
+class ContestPdfView(ContestMixin, SingleObjectMixin, View):
+    languages = set(map(itemgetter(0), settings.LANGUAGES))
+    # Requests start a new task once this long has passed since the last one was queued, in case it was lost.
+    render_task_timeout = 3600
+
+    def get(self, request, *args, **kwargs):
+        if not HAS_PDF or not HAS_PDFUNITE:
+            raise Http404()
+
+        language = kwargs.get('language', self.request.LANGUAGE_CODE)
+        if language not in self.languages:
+            raise Http404()
+
+        self.object = self.get_object()
+        if not self.can_edit:
+            raise Http404()
+
+        pdf_path = get_contest_pdf_path(self.object.key, language)
+        if not os.path.exists(pdf_path):
+            if not self.object.contest_problems.exists():
+                raise Http404()
+
+            # Requests made while the PDF is rendering follow the task that is already queued.
+            task_id = uuid4().hex
+            queued_id = cache.get_or_set(get_contest_pdf_task_key(self.object.key, language), task_id,
+                                         self.render_task_timeout)
+            if queued_id == task_id:
+                render_contest_problem_pdf.apply_async((self.object.key, language), task_id=task_id)
+            return HttpResponseRedirect(task_status_url_by_id(
+                queued_id, message=_('Rendering problems of %s...') % (self.object.name,), redirect=request.path,
+            ))
+
+        response = HttpResponse()
+
+        if hasattr(settings, 'DMOJ_PDF_PROBLEM_INTERNAL'):
+            url_path = '%s/%s' % (settings.DMOJ_PDF_PROBLEM_INTERNAL, os.path.basename(pdf_path))
+        else:
+            url_path = None
+
+        add_file_response(request, response, url_path, pdf_path)
+
+        response['Content-Type'] = 'application/pdf'
+        response['Content-Disposition'] = 'inline; filename=%s.%s.pdf' % (self.object.key, language)
+        return response
+
+
 class ContestMossDelete(ContestMossMixin, SingleObjectMixin, View):
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from netaddr import AddrFormatError, IPAddress, IPSet
+
+from judge.utils import metrics
+from judge.utils.views import short_circuit_middleware
+
+allowed_ips = IPSet(settings.DMOJ_METRICS_ALLOWED_IPS)
+
+
+@short_circuit_middleware
+def prometheus_metrics(request):
+    if not settings.DMOJ_METRICS:
+        raise Http404()
+    try:
+        if IPAddress(request.META.get('REMOTE_ADDR')) not in allowed_ips:
+            raise Http404()
+    except (AddrFormatError, TypeError, ValueError):
+        raise Http404()
+
+    return HttpResponse(metrics.render_prometheus(*metrics.collect()),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
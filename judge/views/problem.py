@@ -1,6 +1,5 @@
 import logging
 import os
-import shutil
 from datetime import timedelta
 from operator import itemgetter
 
@@ -12,7 +11,6 @@ from django.db.models import Count, F, Prefetch, Q
 from django.db.utils import ProgrammingError
 from django.http import Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect
 from django.shortcuts import get_object_or_404
-from django.template.loader import get_template
 from django.urls import reverse
 from django.utils import translation
 from django.utils.functional import cached_property
@@ -27,7 +25,9 @@ from judge.forms import ProblemCloneForm, ProblemSubmitForm
 from judge.models import ContestSubmission, Judge, Language, Problem, \
     ProblemTranslation, RuntimeVersion, Solution, Submission, SubmissionSource, \
     TranslatedProblemForeignKeyQuerySet
-from judge.pdf_problems import DefaultPdfMaker, HAS_PDF
+from judge.pdf_problems import HAS_PDF, PdfRenderError, get_problem_pdf_path, render_problem_pdf
+from judge.search import filter_search
+from judge.tasks import highlight_submission_source
 from judge.utils.diggpaginator import DiggPaginator
 from judge.utils.opengraph import generate_opengraph
 from judge.utils.problems import contest_attempted_ids, contest_completed_ids, user_attempted_ids, \
@@ -217,7 +217,6 @@ class LatexError(Exception):
 
 
 class ProblemPdfView(ProblemMixin, SingleObjectMixin, View):
-    logger = logging.getLogger('judge.problem.pdf')
     languages = set(map(itemgetter(0), settings.LANGUAGES))
 
     def get(self, request, *args, **kwargs):
@@ -229,36 +228,13 @@ class ProblemPdfView(ProblemMixin, SingleObjectMixin, View):
             raise Http404()
 
         problem = self.get_object()
-        try:
-            trans = problem.translations.get(language=language)
-        except ProblemTranslation.DoesNotExist:
-            trans = None
-
-        cache = os.path.join(settings.DMOJ_PDF_PROBLEM_CACHE, '%s.%s.pdf' % (problem.code, language))
+        cache = get_problem_pdf_path(problem.code, language)
 
         if not os.path.exists(cache):
-            self.logger.info('Rendering: %s.%s.pdf', problem.code, language)
-            with DefaultPdfMaker() as maker, translation.override(language):
-                problem_name = problem.name if trans is None else trans.name
-                maker.html = get_template('problem/raw.html').render({
-                    'problem': problem,
-                    'problem_name': problem_name,
-                    'description': problem.description if trans is None else trans.description,
-                    'url': request.build_absolute_uri(),
-                    'math_engine': maker.math_engine,
-                }).replace('"//', '"https://').replace("'//", "'https://")
-                maker.title = problem_name
-
-                assets = ['style.css', 'pygment-github.css']
-                if maker.math_engine == 'jax':
-                    assets.append('mathjax_config.js')
-                for file in assets:
-                    maker.load(file, os.path.join(settings.DMOJ_RESOURCES, file))
-                maker.make()
-                if not maker.success:
-                    self.logger.error('Failed to render PDF for %s', problem.code)
-                    return HttpResponse(maker.log, status=500, content_type='text/plain')
-                shutil.move(maker.pdffile, cache)
+            try:
+                render_problem_pdf(problem, language, request.build_absolute_uri())
+            except PdfRenderError as e:
+                return HttpResponse(e.log, status=500, content_type='text/plain')
 
         response = HttpResponse()
 
@@ -367,15 +343,13 @@ class ProblemList(QueryStringSortMixin, TitleMixin, SolvedProblemMixin, ListView
                 if settings.ENABLE_FTS and self.full_text:
                     queryset = queryset.search(query, queryset.BOOLEAN).extra(order_by=['-relevance'])
                 else:
-                    queryset = queryset.filter(
-                        Q(code__icontains=query) | Q(name__icontains=query) |
-                        Q(translations__name__icontains=query, translations__language=self.request.LANGUAGE_CODE))
+                    queryset = filter_search(queryset, 'problem', query)
         self.prepoint_queryset = queryset
         if self.point_start is not None:
             queryset = queryset.filter(points__gte=self.point_start)
         if self.point_end is not None:
             queryset = queryset.filter(points__lte=self.point_end)
-        return queryset.distinct()
+        return queryset
 
     def get_queryset(self):
         if self.in_contest:
@@ -594,6 +568,8 @@ class ProblemSubmit(LoginRequiredMixin, ProblemMixin, TitleMixin, SingleObjectFo
         # Save a query.
         self.new_submission.source = source
         self.new_submission.judge(judge_id=form.cleaned_data['judge'])
+        if settings.DMOJ_SUBMISSION_SOURCE_PREHIGHLIGHT:
+            highlight_submission_source.delay(self.new_submission.id)
 
         return super().form_valid(form)
 
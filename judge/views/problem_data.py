@@ -2,7 +2,7 @@ import json
 import mimetypes
 import os
 from itertools import chain
-from zipfile import BadZipfile, ZipFile
+from zipfile import BadZipfile
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
@@ -19,7 +19,7 @@ from django.views.generic import DetailView
 
 from judge.highlight_code import highlight_code
 from judge.models import Problem, ProblemData, ProblemTestCase, Submission, problem_data_storage
-from judge.utils.problem_data import ProblemDataCompiler
+from judge.utils.problem_data import ProblemDataCompiler, get_zip_manifest, pair_test_cases
 from judge.utils.unicode import utf8text
 from judge.utils.views import TitleMixin, add_file_response
 from judge.views.problem import ProblemMixin
@@ -155,26 +155,26 @@ class ProblemDataView(TitleMixin, ProblemManagerMixin):
         return ProblemCaseFormSet(data=self.request.POST if post else None, prefix='cases', valid_files=files,
                                   queryset=ProblemTestCase.objects.filter(dataset_id=self.object.pk).order_by('order'))
 
-    def get_valid_files(self, data, post=False):
-        try:
-            if post and 'problem-data-zipfile-clear' in self.request.POST:
+    def get_manifest(self, data, post=False):
+        if post and 'problem-data-zipfile-clear' in self.request.POST:
+            return None
+        elif post and 'problem-data-zipfile' in self.request.FILES:
+            try:
+                return get_zip_manifest(self.request.FILES['problem-data-zipfile'])
+            except BadZipfile:
                 return []
-            elif post and 'problem-data-zipfile' in self.request.FILES:
-                return ZipFile(self.request.FILES['problem-data-zipfile']).namelist()
-            elif data.zipfile:
-                return ZipFile(data.zipfile.path).namelist()
-        except BadZipfile:
-            return []
-        return []
+        return data.get_zipfile_manifest()
 
     def get_context_data(self, **kwargs):
         context = super(ProblemDataView, self).get_context_data(**kwargs)
         if 'data_form' not in context:
             context['data_form'] = self.get_data_form()
-            valid_files = context['valid_files'] = self.get_valid_files(context['data_form'].instance)
+            manifest = context['data_form'].instance.get_zipfile_manifest()
+            valid_files = context['valid_files'] = [file[0] for file in manifest]
             context['data_form'].zip_valid = valid_files is not False
             context['cases_formset'] = self.get_case_formset(valid_files)
         context['valid_files_json'] = mark_safe(json.dumps(context['valid_files']))
+        context['case_pairs_json'] = mark_safe(json.dumps(pair_test_cases(context['valid_files'])))
         context['valid_files'] = set(context['valid_files'])
         context['all_case_forms'] = chain(context['cases_formset'], [context['cases_formset'].empty_form])
         return context
@@ -182,11 +182,14 @@ class ProblemDataView(TitleMixin, ProblemManagerMixin):
     def post(self, request, *args, **kwargs):
         self.object = problem = self.get_object()
         data_form = self.get_data_form(post=True)
-        valid_files = self.get_valid_files(data_form.instance, post=True)
+        manifest = self.get_manifest(data_form.instance, post=True)
+        valid_files = [file[0] for file in manifest or ()]
         data_form.zip_valid = valid_files is not False
         cases_formset = self.get_case_formset(valid_files, post=True)
         if data_form.is_valid() and cases_formset.is_valid():
-            data = data_form.save()
+            data = data_form.save(commit=False)
+            data.zipfile_manifest = manifest
+            data.save()
             for case in cases_formset.save(commit=False):
                 case.dataset_id = problem.id
                 case.save()
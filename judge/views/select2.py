@@ -1,4 +1,5 @@
-from django.db.models import F, Q
+from django.conf import settings
+from django.db.models import F
 from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils.encoding import smart_text
@@ -6,6 +7,19 @@ from django.views.generic.list import BaseListView
 
 from judge.jinja2.gravatar import gravatar
 from judge.models import Contest, Problem, Profile
+from judge.search import filter_search, search_usernames
+
+# Short terms can match most profiles, which are then matched by prefix in SQL rather than listed in an IN clause.
+USERNAME_MATCH_ID_LIMIT = 100
+
+
+def _filter_username(queryset, term):
+    matches = search_usernames(term)
+    if not matches and len(term) >= 3:
+        return queryset.filter(user__username__icontains=term)
+    if len(matches) > USERNAME_MATCH_ID_LIMIT:
+        return queryset.filter(user__username__istartswith=term) if term else queryset
+    return queryset.filter(id__in=matches.ids())
 
 
 def _get_user_queryset(term):
@@ -13,7 +27,7 @@ def _get_user_queryset(term):
     if term.endswith(' '):
         qs = qs.filter(user__username=term.strip())
     else:
-        qs = qs.filter(user__username__icontains=term)
+        qs = _filter_username(qs, term)
     return qs
 
 
@@ -41,6 +55,10 @@ class Select2View(BaseListView):
 
 class UserSelect2View(Select2View):
     def get_queryset(self):
+        if not self.term.endswith(' '):
+            matches = search_usernames(self.term)
+            if matches or len(self.term) < 3:
+                return matches
         return _get_user_queryset(self.term).annotate(username=F('user__username')).only('id')
 
     def get_name(self, obj):
@@ -49,14 +67,18 @@ class UserSelect2View(Select2View):
 
 class ProblemSelect2View(Select2View):
     def get_queryset(self):
-        return Problem.get_visible_problems(self.request.user) \
-                      .filter(Q(code__icontains=self.term) | Q(name__icontains=self.term)).distinct()
+        queryset = Problem.get_visible_problems(self.request.user)
+        if not self.term:
+            return queryset
+        return filter_search(queryset, 'problem', self.term, ranked=settings.DMOJ_SEARCH_RANKED_LIMIT)
 
 
 class ContestSelect2View(Select2View):
     def get_queryset(self):
-        return Contest.get_visible_contests(self.request.user) \
-                      .filter(Q(key__icontains=self.term) | Q(name__icontains=self.term))
+        queryset = Contest.get_visible_contests(self.request.user)
+        if not self.term:
+            return queryset
+        return filter_search(queryset, 'contest', self.term, ranked=settings.DMOJ_SEARCH_RANKED_LIMIT)
 
 
 class UserSearchSelect2View(BaseListView):
@@ -97,17 +119,14 @@ class ContestUserSearchSelect2View(UserSearchSelect2View):
         if not contest.is_accessible_by(self.request.user) or not contest.can_see_full_scoreboard(self.request.user):
             raise Http404()
 
-        return Profile.objects.filter(contest_history__contest=contest,
-                                      user__username__icontains=self.term).distinct()
+        return _filter_username(Profile.objects.filter(contest_history__contest=contest), self.term).distinct()
 
 
 class TicketUserSelect2View(UserSearchSelect2View):
     def get_queryset(self):
-        return Profile.objects.filter(tickets__isnull=False,
-                                      user__username__icontains=self.term).distinct()
+        return _filter_username(Profile.objects.filter(tickets__isnull=False), self.term).distinct()
 
 
 class AssigneeSelect2View(UserSearchSelect2View):
     def get_queryset(self):
-        return Profile.objects.filter(assigned_tickets__isnull=False,
-                                      user__username__icontains=self.term).distinct()
+        return _filter_username(Profile.objects.filter(assigned_tickets__isnull=False), self.term).distinct()
@@ -1,49 +1,66 @@
+from datetime import datetime
+from functools import wraps
 from itertools import chain, repeat
 from operator import itemgetter
 
 from django.conf import settings
-from django.db.models import Case, Count, FloatField, IntegerField, Value, When
-from django.db.models.expressions import CombinedExpression
-from django.http import JsonResponse
+from django.db.models import Sum
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render
 from django.utils.translation import gettext as _
 
-from judge.models import Language, Submission
+from judge.models import DailySubmissionCount, Submission
 from judge.utils.stats import chart_colors, get_bar_chart, get_pie_chart, highlight_colors
 
 
-ac_count = Count(Case(When(submission__result='AC', then=Value(1)), output_field=IntegerField()))
-
-
 def repeat_chain(iterable):
     return chain.from_iterable(repeat(iterable))
 
 
-def language_data(request, language_count=Language.objects.annotate(count=Count('submission'))):
-    languages = language_count.filter(count__gt=0).values('key', 'name', 'count').order_by('-count')
+def submission_counts_view(func):
+    """Passes the daily submission counts between the optional inclusive `start` and `end` dates to the view."""
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        counts = DailySubmissionCount.objects.all()
+        try:
+            if request.GET.get('start'):
+                counts = counts.filter(date__gte=datetime.strptime(request.GET['start'], '%Y-%m-%d').date())
+            if request.GET.get('end'):
+                counts = counts.filter(date__lte=datetime.strptime(request.GET['end'], '%Y-%m-%d').date())
+        except ValueError:
+            return HttpResponseBadRequest('Dates must be in YYYY-MM-DD format', content_type='text/plain')
+        return func(request, counts, *args, **kwargs)
+    return wrapper
+
+
+@submission_counts_view
+def language_data(request, counts, result=None):
+    if result is not None:
+        counts = counts.filter(result=result)
+    languages = list(counts.values('language__name').annotate(count=Sum('count'))
+                           .filter(count__gt=0).order_by('-count').values_list('language__name', 'count'))
     num_languages = min(len(languages), settings.DMOJ_STATS_LANGUAGE_THRESHOLD)
-    other_count = sum(map(itemgetter('count'), languages[num_languages:]))
+    other_count = sum(map(itemgetter(1), languages[num_languages:]))
 
     return JsonResponse({
-        'labels': list(map(itemgetter('name'), languages[:num_languages])) + ['Other'],
+        'labels': list(map(itemgetter(0), languages[:num_languages])) + ['Other'],
         'datasets': [
             {
                 'backgroundColor': chart_colors[:num_languages] + ['#FDB45C'],
                 'highlightBackgroundColor': highlight_colors[:num_languages] + ['#FFC870'],
-                'data': list(map(itemgetter('count'), languages[:num_languages])) + [other_count],
+                'data': list(map(itemgetter(1), languages[:num_languages])) + [other_count],
             },
         ],
     }, safe=False)
 
 
 def ac_language_data(request):
-    return language_data(request, Language.objects.annotate(count=ac_count))
+    return language_data(request, result='AC')
 
 
-def status_data(request, statuses=None):
-    if not statuses:
-        statuses = (Submission.objects.values('result').annotate(count=Count('result'))
-                    .values('result', 'count').order_by('-count'))
+@submission_counts_view
+def status_data(request, counts):
+    statuses = counts.values('result').annotate(count=Sum('count')).values('result', 'count').order_by('-count')
     data = []
     for status in statuses:
         res = status['result']
@@ -20,10 +20,10 @@ from django.views.decorators.http import require_POST
 from django.views.generic import DetailView, ListView
 
 from judge import event_poster as event
-from judge.highlight_code import highlight_code
-from judge.models import Contest, Language, Problem, ProblemTranslation, Profile, Submission
+from judge.highlight_code import cached_highlight_code
+from judge.models import Contest, Language, Problem, ProblemTranslation, Profile, Submission, SubmissionTestCase
 from judge.utils.infinite_paginator import InfinitePaginationMixin
-from judge.utils.problems import get_result_data, user_completed_ids, user_editable_ids, user_tester_ids
+from judge.utils.problems import get_result_data, user_editable_ids
 from judge.utils.raw_sql import join_sql_subquery, use_straight_join
 from judge.utils.views import DiggPaginatorMixin, TitleMixin
 
@@ -78,7 +78,7 @@ class SubmissionSource(SubmissionDetailBase):
         context = super(SubmissionSource, self).get_context_data(**kwargs)
         submission = self.object
         context['raw_source'] = submission.source.source.rstrip('\n')
-        context['highlighted_source'] = highlight_code(submission.source.source, submission.language.pygments)
+        context['highlighted_source'] = cached_highlight_code(submission.source.source, submission.language.pygments)
         return context
 
 
@@ -140,6 +140,38 @@ def group_test_cases(cases):
     return result, status, max_execution_time
 
 
+def get_test_case_data(submission):
+    """Returns the batches, combined statuses and maximum execution time shown for `submission`.
+
+    The test cases of a completed submission only change when it is graded again, which sets a new `judged_date`,
+    so they are cached under a key that includes it and never need to be invalidated.
+    """
+    key = None
+    if submission.status == 'D' and submission.judged_date is not None:
+        key = 'submission_test_cases:%d:%d' % (submission.id, submission.judged_date.timestamp() * 1000000)
+        data = cache.get(key)
+        if data is not None:
+            return data
+
+    # Not loaded through `submission.test_cases`, which would attach the submission to every case that is cached.
+    batches, statuses, max_execution_time = group_test_cases(
+        SubmissionTestCase.objects.filter(submission_id=submission.id))
+    statuses = combine_statuses(statuses, submission)
+
+    data = batches, statuses, max_execution_time
+    if key is not None:
+        cache.set(key, data, settings.DMOJ_SUBMISSION_STATUS_CACHE_TTL)
+    return data
+
+
+def get_time_limit(submission):
+    # Not cached with the test cases, since the limits can be edited without grading the submission again.
+    try:
+        return submission.problem.language_limits.get(language=submission.language).time_limit
+    except ObjectDoesNotExist:
+        return submission.problem.time_limit
+
+
 class SubmissionStatus(SubmissionDetailBase):
     template_name = 'submission/status.html'
 
@@ -147,17 +179,8 @@ class SubmissionStatus(SubmissionDetailBase):
         context = super(SubmissionStatus, self).get_context_data(**kwargs)
         submission = self.object
         context['last_msg'] = event.last()
-
-        context['batches'], statuses, context['max_execution_time'] = group_test_cases(submission.test_cases.all())
-        context['statuses'] = combine_statuses(statuses, submission)
-
-        context['time_limit'] = submission.problem.time_limit
-        try:
-            lang_limit = submission.problem.language_limits.get(language=submission.language)
-        except ObjectDoesNotExist:
-            pass
-        else:
-            context['time_limit'] = lang_limit.time_limit
+        context['batches'], context['statuses'], context['max_execution_time'] = get_test_case_data(submission)
+        context['time_limit'] = get_time_limit(submission)
         return context
 
 
@@ -190,7 +213,7 @@ def abort_submission(request, submission):
 def filter_submissions_by_visible_problems(queryset, user):
     join_sql_subquery(
         queryset,
-        subquery=str(Problem.get_visible_problems(user).distinct().only('id').query),
+        subquery=str(Problem.get_visible_problems(user).only('id').query),
         params=[],
         join_fields=[('problem_id', 'id')],
         alias='visible_problems',
@@ -283,9 +306,9 @@ class SubmissionsListBase(DiggPaginatorMixin, TitleMixin, ListView):
         authenticated = self.request.user.is_authenticated
         context['dynamic_update'] = False
         context['show_problem'] = self.show_problem
-        context['completed_problem_ids'] = user_completed_ids(self.request.profile) if authenticated else []
+        context['visible_submission_ids'] = Submission.get_visible_detail_ids(self.request.user,
+                                                                              context['submissions'])
         context['editable_problem_ids'] = user_editable_ids(self.request.profile) if authenticated else []
-        context['tester_problem_ids'] = user_tester_ids(self.request.profile) if authenticated else []
 
         context['all_languages'] = Language.objects.all().values_list('key', 'name')
         context['selected_languages'] = self.selected_languages
@@ -471,12 +494,10 @@ def single_submission(request):
 
     return render(request, 'submission/row.html', {
         'submission': submission,
-        'completed_problem_ids': user_completed_ids(request.profile) if authenticated else [],
+        'visible_submission_ids': Submission.get_visible_detail_ids(request.user, [submission]),
         'editable_problem_ids': user_editable_ids(request.profile) if authenticated else [],
-        'tester_problem_ids': user_tester_ids(request.profile) if authenticated else [],
         'show_problem': show_problem,
         'problem_name': show_problem and submission.problem.translated_name(request.LANGUAGE_CODE),
-        'profile_id': request.profile.id if authenticated else 0,
     })
 
 
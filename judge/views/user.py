@@ -25,6 +25,7 @@ from judge.forms import CustomAuthenticationForm, ProfileForm
 from judge.models import Profile, Rating, Submission, Ticket
 from judge.utils.problems import contest_completed_ids, user_completed_ids
 from judge.utils.pwned import PwnedPasswordsValidator
+from judge.utils.ranker import ranker
 from judge.utils.views import DiggPaginatorMixin, TitleMixin, generic_message
 from .contests import ContestRanking
 
@@ -184,13 +185,13 @@ class UserList(DiggPaginatorMixin, TitleMixin, ListView):
 
     def get_queryset(self):
         return (Profile.objects.filter(is_unlisted=False)
-                .order_by('id').select_related('user')
-                .only('display_rank', 'user__username', 'user__first_name', 'user__last_name'))
+                .order_by('-points', 'id').select_related('user')
+                .only('display_rank', 'points', 'problem_count',
+                      'user__username', 'user__first_name', 'user__last_name'))
 
     def get_context_data(self, **kwargs):
         context = super(UserList, self).get_context_data(**kwargs)
-        context['rank_header'] = _('Id')
-        context['users'] = list(map(lambda user: (user.id, user), context['users']))
+        context['users'] = ranker(context['users'], rank=self.paginate_by * (context['page_obj'].number - 1))
         context['first_page_href'] = '.'
         return context
 
@@ -220,9 +221,10 @@ def user_ranking_redirect(request):
     except KeyError:
         raise Http404()
     user = get_object_or_404(Profile, user__username=username)
-    rank = Profile.objects.filter(is_unlisted=False).count()
-    rank += Profile.objects.filter(is_unlisted=False, id__lt=user.id).count()
-    page = rank // UserList.paginate_by
+    rank = user.leaderboard_position
+    if rank is None:
+        raise Http404()
+    page = (rank - 1) // UserList.paginate_by
     return HttpResponseRedirect('%s%s#!%s' % (reverse('user_list'), '?page=%d' % (page + 1) if page else '', username))
 
 
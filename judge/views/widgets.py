@@ -15,8 +15,9 @@ from django.views.generic import View
 from martor.api import imgur_uploader
 
 from judge.models import Submission
+from judge.utils.file_cache import SegmentFileCache, get_file_cache
 
-__all__ = ['rejudge_submission', 'DetectTimezone']
+__all__ = ['rejudge_submission', 'DetectTimezone', 'file_cache_file']
 
 
 @login_required
@@ -76,6 +77,42 @@ class DetectTimezone(View):
         }.get(backend, self.default)(lat, long)
 
 
+FILE_CACHE_CONTENT_TYPES = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
+}
+
+
+def file_cache_file(request, cache, hash, file):
+    if cache == 'mathoid':
+        store = get_file_cache(settings.MATHOID_CACHE_FORMAT, settings.MATHOID_CACHE_ROOT,
+                               settings.MATHOID_CACHE_URL, settings.MATHOID_GZIP)
+    elif cache == 'texoid':
+        store = get_file_cache(settings.TEXOID_CACHE_FORMAT, settings.TEXOID_CACHE_ROOT,
+                               settings.TEXOID_CACHE_URL, settings.TEXOID_GZIP)
+    else:
+        raise Http404()
+
+    # Directory caches are served directly by the web server.
+    if not isinstance(store, SegmentFileCache) or file not in FILE_CACHE_CONTENT_TYPES:
+        raise Http404()
+
+    # The compressed copy stored alongside each file is served like the gzip_static module of nginx would.
+    gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '') and store.has_file(hash, file + '.gz')
+    try:
+        data = store.read_data(hash, file + '.gz' if gzip else file)
+    except FileNotFoundError:
+        raise Http404()
+
+    response = HttpResponse(data, content_type=FILE_CACHE_CONTENT_TYPES[file])
+    if gzip:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    # Entries are addressed by the hash of their content, so they never change.
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
 def django_uploader(image):
     ext = os.path.splitext(image.name)[1]
     if ext not in settings.MARTOR_UPLOAD_SAFE_EXTS:
@@ -3,7 +3,6 @@ from textwrap import dedent
 from django import forms
 from django.conf import settings
 from django.template import Context, Template
-from lxml import html
 
 
 class CompressorWidgetMixin(object):
@@ -19,12 +18,14 @@ class CompressorWidgetMixin(object):
         {% endcompress %}
     ''')
 
-    __templates = {
-        (False, False): Template(''),
-        (True, False): Template('{% load compress %}' + __template_css),
-        (False, True): Template('{% load compress %}' + __template_js),
-        (True, True): Template('{% load compress %}' + __template_js + __template_css),
+    # Compiling the templates loads every template library, so it waits until a widget is first rendered.
+    __sources = {
+        (False, False): '',
+        (True, False): '{% load compress %}' + __template_css,
+        (False, True): '{% load compress %}' + __template_js,
+        (True, True): '{% load compress %}' + __template_js + __template_css,
     }
+    __templates = {}
 
     compress_css = False
     compress_js = False
@@ -37,8 +38,13 @@ class CompressorWidgetMixin(object):
         if getattr(settings, 'COMPRESS_ENABLED', not settings.DEBUG):
             @property
             def media(self):
+                from lxml import html
+
                 media = super().media
-                template = self.__templates[self.compress_css, self.compress_js]
+                key = self.compress_css, self.compress_js
+                template = self.__templates.get(key)
+                if template is None:
+                    template = self.__templates[key] = Template(self.__sources[key])
                 result = html.fromstring(template.render(Context({'media': media})))
 
                 return forms.Media(